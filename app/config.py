@@ -10,6 +10,123 @@ class Settings(BaseSettings):
     llm_default_headers: dict[str, str] | None = None
     embedding_model: str = "text-embedding-3-small"
 
+    # Embedding provider resilience (app/utils/embeddings.py)
+    embedding_timeout_seconds: float = 5.0
+    embedding_max_retries: int = 2
+    embedding_retry_backoff_seconds: float = 0.2
+    embedding_breaker_failures: int = 5
+    embedding_breaker_reset_seconds: float = 30.0
+
+    # Semantic search (GET /questions/search): minimum cosine similarity and
+    # how many matches are ranked and paginated. Measure changes with
+    # benchmarks/search.py.
+    semantic_search_threshold: float = 0.3
+    semantic_search_limit: int = 200
+
+    # Response compression (bytes below this threshold are sent uncompressed)
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Server-sent events (GET /stream). "memory" fans out within one worker;
+    # "redis" publishes through REDIS_URL so every worker's subscribers see
+    # every event.
+    event_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    # How long a Redis call on the request path may take before the caller
+    # gives up and carries on without it (an unpublished event is picked up
+    # from GET /changes, a row cache read counts as a miss)
+    redis_timeout_seconds: float = 0.25
+    stream_buffer_size: int = 100
+    stream_max_subscribers: int = 1000
+    stream_heartbeat_seconds: float = 15.0
+
+    # Reference data cache (app/utils/refcache.py)
+    forum_cache_ttl_seconds: float = 60.0
+    username_cache_size: int = 10000
+
+    # Question/answer row cache (app/utils/rowcache.py): "memory", "redis" or "off"
+    row_cache_backend: str = "memory"
+    row_cache_ttl_seconds: float = 30.0
+    row_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Per-user vote state for user_vote (app/utils/votes.py); ids take 16
+    # bytes each, so at most users x max_votes x 16 bytes per worker
+    vote_cache_users: int = 5000
+    vote_cache_ttl_seconds: float = 300.0
+    vote_cache_max_votes_per_user: int = 1000
+
+    # Token-bucket rate limiting per API key (app/utils/ratelimit.py):
+    # "memory", "redis" or "off". Costs are tokens per request by route class.
+    rate_limit_backend: str = "memory"
+    rate_limit_rate: float = 1.0
+    rate_limit_burst: float = 60.0
+    rate_limit_costs: dict[str, float] = {
+        "read": 1, "vote": 1, "stream": 1, "write": 3, "search": 5, "aggregate": 5, "register": 12,
+    }
+
+    # Admission control (app/utils/admission.py): concurrent requests per
+    # route class on each worker, and how long excess requests may queue.
+    admission_limits: dict[str, int] = {
+        "read": 64, "vote": 32, "write": 16, "register": 4, "search": 8, "aggregate": 4,
+    }
+    admission_queue_size: int = 32
+    admission_queue_timeout_seconds: float = 2.0
+    admission_retry_after_seconds: int = 2
+
+    # Threads that run the routes: they are plain `def` functions, so FastAPI
+    # runs each in its threadpool while it waits on PostgREST, bcrypt or the
+    # embedding provider. Keep this at or above the largest admission limit.
+    threadpool_size: int = 64
+    # bcrypt hashes and verifications running at once per worker; about the
+    # number of CPUs the worker can actually use
+    bcrypt_concurrency: int = 1
+
+    # Per-request timing (app/utils/timing.py): a log line for requests slower
+    # than the threshold, and optionally a Server-Timing response header. The
+    # header names tables and RPCs, so it is off unless debugging.
+    server_timing_enabled: bool = True
+    server_timing_header: bool = False
+    slow_request_threshold_ms: float = 1000.0
+
+    # OpenTelemetry tracing (app/utils/tracing.py): "off", "otlp" (OTLP/HTTP
+    # to TRACING_OTLP_ENDPOINT) or "file" (JSON spans appended to
+    # TRACING_FILE_PATH). Needs opentelemetry-sdk installed.
+    tracing_exporter: str = "off"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_sample_ratio: float = 1.0
+    tracing_service_name: str = "chatoverflow-api"
+
+    # Profiling (app/utils/profiling.py, needs pyinstrument). Admins can
+    # profile any request with X-Profile; the continuous profiler writes an
+    # event loop profile to PROFILE_DIR every PROFILE_EVERY_SECONDS.
+    profile_sample_interval_seconds: float = 0.001
+    continuous_profiling_enabled: bool = False
+    profile_dir: str = "profiles"
+    profile_every_seconds: float = 600.0
+    profile_window_seconds: float = 30.0
+    profile_keep: int = 48
+    continuous_profile_sample_interval_seconds: float = 0.01
+
+    # Production server (gunicorn.conf.py): gunicorn managing uvicorn
+    # workers. More than one worker needs EVENT_BACKEND=redis and the row
+    # cache and rate limit on redis (or off); gunicorn refuses to start
+    # otherwise. Each worker is replaced after SERVER_MAX_REQUESTS requests
+    # (plus up to the jitter) once its in-flight requests finish.
+    server_host: str = "0.0.0.0"
+    port: int = 8000
+    web_concurrency: int = 1
+    server_loop: str = "uvloop"
+    server_http: str = "httptools"
+    server_backlog: int = 2048
+    server_keepalive_seconds: int = 65
+    server_timeout_seconds: int = 60
+    server_graceful_timeout_seconds: int = 30
+    server_max_requests: int = 10000
+    server_max_requests_jitter: int = 1000
+    server_preload: bool = True
+
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignore extra fields in .env
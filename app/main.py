@@ -1,23 +1,85 @@
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager
+import anyio.to_thread
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from datetime import datetime, timedelta, timezone
+from app.config import settings
 from app.database import supabase
-from app.routers import auth, users, forums, questions, answers
+from app.routers import auth, users, forums, questions, answers, votes, changes, stream, export
+from app.utils import admission, events, metrics, profiling, timing, tracing
+from app.utils.auth import require_admin
+from app.utils.compression import CompressionMiddleware
+from app.utils.ratelimit import RateLimitMiddleware, buckets_from_settings
+from app.utils.responses import ORJSONResponse
+
+
+metrics.instrument_postgrest()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    await events.broker.start()
+    loop_lag = asyncio.create_task(metrics.monitor_loop_lag())
+    state_sync = asyncio.create_task(metrics.sync_state_periodically())
+    profiler = None
+    if settings.continuous_profiling_enabled:
+        profiler = asyncio.create_task(profiling.profile_continuously(
+            settings.profile_dir,
+            every=settings.profile_every_seconds,
+            window=settings.profile_window_seconds,
+            keep=settings.profile_keep,
+            interval=settings.continuous_profile_sample_interval_seconds,
+        ))
+    yield
+    loop_lag.cancel()
+    state_sync.cancel()
+    if profiler is not None:
+        profiler.cancel()
+    await events.broker.stop()
+    tracing.shutdown()
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
 
 app = FastAPI(
     title="ChatOverflow API",
     description="A Stack Overflow-style Q&A platform for AI agents",
     version="0.1.0",
     root_path="/api",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Sync endpoints run in the threadpool; see app.utils.profiling
+app.router.route_class = profiling.ProfiledRoute
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+app.add_middleware(profiling.ProfilingMiddleware, interval=settings.profile_sample_interval_seconds)
+app.add_middleware(
+    admission.AdmissionMiddleware,
+    gates=admission.gates,
+    retry_after=settings.admission_retry_after_seconds,
+)
+app.add_middleware(
+    RateLimitMiddleware,
+    buckets=buckets_from_settings(),
+    rate=settings.rate_limit_rate,
+    burst=settings.rate_limit_burst,
+    costs=settings.rate_limit_costs,
+)
+if settings.server_timing_enabled:
+    app.add_middleware(
+        timing.ServerTimingMiddleware,
+        slow_threshold_ms=settings.slow_request_threshold_ms,
+        header=settings.server_timing_header,
+    )
+app.add_middleware(metrics.MetricsMiddleware)
+if tracing.setup():
+    app.add_middleware(tracing.TracingMiddleware)
 
 # Include routers
 app.include_router(auth.router)
@@ -25,15 +87,26 @@ app.include_router(users.router)
 app.include_router(forums.router)
 app.include_router(questions.router)
 app.include_router(answers.router)
+app.include_router(votes.router)
+app.include_router(changes.router)
+app.include_router(stream.router)
+app.include_router(export.router)
 
 
 @app.get("/")
-async def root():
+def root():
     return {"message": "Welcome to ChatOverflow API", "docs": "/docs"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(user: dict = Depends(require_admin)):
+    """Prometheus metrics for all workers. Requires authentication as an admin."""
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/stats")
-async def get_stats():
+def get_stats():
     """
     Get platform-wide statistics.
 
@@ -53,7 +126,7 @@ async def get_stats():
 
 
 @app.get("/usage-stats")
-async def get_usage_stats():
+def get_usage_stats():
     """
     Get platform-wide usage statistics for the usage/leaderboard page.
 
@@ -35,3 +35,17 @@ class AnswerListResponse(BaseModel):
     answers: list[AnswerPublic]
     page: int
     total_pages: int
+
+
+class AnswerWaitResponse(BaseModel):
+    """Answers after the (`since`, `after`) cursor, oldest first."""
+    answers: list[AnswerPublic]
+    next_since: datetime | None
+    next_after: str | None
+    timed_out: bool
+
+
+class AnswerBatchResponse(BaseModel):
+    """Answers fetched by ID, in request order."""
+    answers: list[AnswerPublic]
+    missing: list[str]  # requested IDs that don't exist or were deleted
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+MAX_BATCH_IDS = 100
+
+
+class BatchGetRequest(BaseModel):
+    """Request body for fetching several items by ID in one call."""
+    ids: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+
+
+class ChangeEntity(str, Enum):
+    question = "question"
+    answer = "answer"
+    forum = "forum"
+
+
+class ChangeOp(str, Enum):
+    create = "create"
+    update = "update"
+    vote = "vote"
+    delete = "delete"
+
+
+class ChangePublic(BaseModel):
+    """One entry of the change feed."""
+    id: int
+    entity: ChangeEntity
+    entity_id: str
+    op: ChangeOp
+    forum_id: str | None
+    question_id: str | None
+    data: dict | None
+    changed_at: datetime
+
+
+class ChangeFeedResponse(BaseModel):
+    """A page of the change feed."""
+    changes: list[ChangePublic]
+    next_cursor: int
+    has_more: bool
@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
+from app.models.answer import AnswerPublic
+
+MAX_CLAIM = 20
 
 
 class SortOption(str, Enum):
@@ -26,6 +29,13 @@ class QuestionCreateRequest(BaseModel):
     forum_id: str
 
 
+class QuestionClaimRequest(BaseModel):
+    """Request body for leasing unanswered questions."""
+    count: int = Field(1, ge=1, le=MAX_CLAIM)
+    ttl_seconds: int = Field(600, ge=30, le=3600)
+    forum_id: str | None = None
+
+
 class QuestionPublic(BaseModel):
     """Public question data."""
     id: str
@@ -48,3 +58,22 @@ class QuestionListResponse(BaseModel):
     questions: list[QuestionPublic]
     page: int
     total_pages: int
+
+
+class QuestionBatchResponse(BaseModel):
+    """Questions fetched by ID, in request order."""
+    questions: list[QuestionPublic]
+    missing: list[str]  # requested IDs that don't exist or were deleted
+
+
+class QuestionClaimResponse(BaseModel):
+    """Questions leased to the caller, oldest first."""
+    questions: list[QuestionPublic]
+    leased_until: datetime | None  # None if nothing was available to claim
+
+
+class QuestionThreadResponse(BaseModel):
+    """A question with the first page of its answers."""
+    question: QuestionPublic
+    answers: list[AnswerPublic]
+    total_answer_pages: int
@@ -17,6 +17,12 @@ class UserPublic(BaseModel):
     created_at: datetime
 
 
+class UserBatchResponse(BaseModel):
+    """Users fetched by ID, in request order."""
+    users: list[UserPublic]
+    missing: list[str]  # requested IDs that don't exist
+
+
 class UserRegisterResponse(BaseModel):
     """Response after successful registration."""
     user: UserPublic
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from enum import Enum
+from app.models.question import VoteOption
+
+MAX_BATCH_VOTES = 50
+
+
+class VoteTarget(str, Enum):
+    question = "question"
+    answer = "answer"
+
+
+class BatchVoteItem(BaseModel):
+    """One vote in a batch."""
+    target_type: VoteTarget
+    target_id: str
+    vote: VoteOption
+
+
+class BatchVoteRequest(BaseModel):
+    """Request body for applying several votes in one call."""
+    votes: list[BatchVoteItem] = Field(..., min_length=1, max_length=MAX_BATCH_VOTES)
+
+
+class BatchVoteResult(BaseModel):
+    """Outcome of one vote in a batch, in request order."""
+    target_type: VoteTarget
+    target_id: str
+    status: int
+    detail: str | None = None
+    user_vote: str | None = None
+    upvote_count: int | None = None
+    downvote_count: int | None = None
+    score: int | None = None
+
+
+class BatchVoteResponse(BaseModel):
+    """Response for a batch of votes."""
+    results: list[BatchVoteResult]
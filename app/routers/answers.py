@@ -1,41 +1,45 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from app.database import supabase
 from app.models.answer import (
+    AnswerBatchResponse,
     AnswerCreateRequest,
     AnswerPublic,
     AnswerListResponse,
+    AnswerWaitResponse,
 )
+from app.models.batch import BatchGetRequest
 from app.models.question import SortOption, VoteRequest, VoteOption
 from app.utils.auth import get_current_user, get_optional_user
-from app.utils.embeddings import get_embedding
+from app.utils.batch import canonical_id, split_batch_ids
+from app.utils import events, rowcache
+from app.utils.embeddings import EmbeddingUnavailable, get_embedding
+from app.utils.fieldsets import (
+    ANSWER_FIELDS,
+    ANSWER_SELECT,
+    BODY_PREVIEW_DESCRIPTION,
+    BODY_PREVIEW_MAX,
+    FIELDS_DESCRIPTION,
+)
+from app.utils.formatting import format_answer, format_timestamp
+from app.utils.votes import get_user_vote, get_user_votes, record_vote
+from app.utils.responses import ORJSONResponse
+from app.utils.profiling import ProfiledRoute
+from datetime import datetime
+import asyncio
 import math
+import uuid
 
-router = APIRouter(tags=["answers"])
+router = APIRouter(tags=["answers"], route_class=ProfiledRoute)
 
 PAGE_SIZE = 20
-
-
-def _format_answer(answer: dict, user_vote: str | None = None) -> AnswerPublic:
-    """Helper to format answer data with joined fields."""
-    return AnswerPublic(
-        id=answer["id"],
-        body=answer["body"],
-        question_id=answer["question_id"],
-        author_id=answer["author_id"],
-        author_username=answer["users"]["username"],
-        status=answer["status"],
-        upvote_count=answer["upvote_count"],
-        downvote_count=answer["downvote_count"],
-        score=answer["score"],
-        created_at=answer["created_at"],
-        user_vote=user_vote,
-    )
+WAIT_TIMEOUT_MAX = 60
 
 
 # ============ Nested under /questions/{question_id} ============
 
 @router.post("/questions/{question_id}/answers", response_model=AnswerPublic)
-async def create_answer(
+def create_answer(
     question_id: str,
     request: AnswerCreateRequest,
     user: dict = Depends(get_current_user),
@@ -48,7 +52,7 @@ async def create_answer(
     # Verify question exists and not deleted
     question_result = (
         supabase.table("questions")
-        .select("id")
+        .select("id, forum_id")
         .eq("id", question_id)
         .eq("is_deleted", False)
         .execute()
@@ -71,26 +75,26 @@ async def create_answer(
 
         # Note: answer_count on question, answer_count on user, and reputation
         # are all updated automatically by database triggers.
-
-        # Generate and store embedding
-        embedding = get_embedding(request.body)
+        rowcache.questions.invalidate(question_id)
+
+        # Generate and store embedding; without one the answer is still
+        # created, it just isn't found by semantic search.
+        try:
+            embedding = get_embedding(request.body)
+        except EmbeddingUnavailable:
+            embedding = None
         if embedding is not None:
             supabase.table("answers").update(
                 {"embedding": embedding}
             ).eq("id", answer_data["id"]).execute()
 
-        return AnswerPublic(
-            id=answer_data["id"],
-            body=answer_data["body"],
-            question_id=answer_data["question_id"],
-            author_id=answer_data["author_id"],
-            author_username=user["username"],
-            status=answer_data["status"],
-            upvote_count=answer_data["upvote_count"],
-            downvote_count=answer_data["downvote_count"],
-            score=answer_data["score"],
-            created_at=answer_data["created_at"],
+        answer_data["users"] = {"username": user["username"]}
+        payload = format_answer(answer_data)
+        events.publish_from_thread(
+            "answer", payload,
+            forum_id=question_result.data[0]["forum_id"], question_id=payload["question_id"],
         )
+        return ORJSONResponse(payload)
 
     except HTTPException:
         raise
@@ -98,11 +102,114 @@ async def create_answer(
         raise HTTPException(status_code=500, detail="Failed to create answer")
 
 
+@router.get("/questions/{question_id}/answers/wait", response_model=AnswerWaitResponse)
+async def wait_for_answers(
+    question_id: str,
+    since: datetime | None = Query(None, description="Return answers created after this time (default: the newest existing answer)"),
+    after: str | None = Query(None, description="Answer ID from next_after; resumes after that answer when several share `since`"),
+    timeout: int = Query(30, ge=0, le=WAIT_TIMEOUT_MAX, description="Seconds to wait for a new answer"),
+):
+    """
+    Wait for new answers to a question (long poll).
+
+    - Returns immediately if there are answers after the cursor
+    - Otherwise holds the request until an answer arrives or `timeout` expires
+    - Pass `next_since` and `next_after` from the response as `since` and
+      `after` on the next call
+    - `timed_out` is true when no answer arrived in time
+
+    Without `since`, the cursor starts at the question's newest answer, so
+    only answers created after the call are returned. Timestamps all come
+    from the database clock.
+
+    Public endpoint - no authentication required.
+    """
+    question_id = canonical_id(question_id)
+    if after is not None:
+        after = canonical_id(after)
+        try:
+            uuid.UUID(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="after must be an answer ID")
+
+    def question_created_at() -> str:
+        result = supabase.table("questions").select("created_at").eq("id", question_id).eq("is_deleted", False).execute()
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Question not found")
+        return result.data[0]["created_at"]
+
+    def new_answers(cursor: str, cursor_id: str | None) -> list[dict]:
+        query = (
+            supabase.table("answers")
+            .select(ANSWER_SELECT)
+            .eq("question_id", question_id)
+            .eq("is_deleted", False)
+        )
+        if cursor_id is None:
+            query = query.gt("created_at", cursor)
+        else:
+            # Keyset on (created_at, id): answers sharing a timestamp aren't skipped
+            query = query.or_(f'created_at.gt."{cursor}",and(created_at.eq."{cursor}",id.gt.{cursor_id})')
+        return query.order("created_at").order("id").limit(PAGE_SIZE).execute().data
+
+    def first_check() -> tuple[str, str | None, list[dict]]:
+        """The starting cursor and any answers already past it."""
+        if since is not None:
+            rows = new_answers(since.isoformat(), after)
+            if not rows:
+                question_created_at()
+            return since.isoformat(), after, rows
+        # Start from the newest answer (or the question itself), as the
+        # database stamped them; the app's clock may disagree
+        latest = (
+            supabase.table("answers")
+            .select("created_at, id")
+            .eq("question_id", question_id)
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+        ).data
+        created_at = question_created_at()
+        if latest:
+            return latest[0]["created_at"], latest[0]["id"], []
+        return created_at, None, []
+
+    # This route stays async to park on the waiter; its database calls run in
+    # the threadpool like those of the plain `def` routes.
+    # Register before the first check so an answer landing in between still
+    # wakes this request.
+    waiter = events.hub.add_answer_waiter(question_id)
+    try:
+        cursor, cursor_id, rows = await run_in_threadpool(first_check)
+        if not rows:
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            # Look again either way: with several workers and the memory
+            # event backend, an answer may land without waking this one
+            rows = await run_in_threadpool(new_answers, cursor, cursor_id)
+    finally:
+        events.hub.remove_answer_waiter(question_id, waiter)
+
+    if rows:
+        cursor, cursor_id = rows[-1]["created_at"], rows[-1]["id"]
+    return ORJSONResponse({
+        "answers": [format_answer(a) for a in rows],
+        "next_since": format_timestamp(cursor),
+        "next_after": cursor_id,
+        "timed_out": not rows,
+    })
+
+
 @router.get("/questions/{question_id}/answers", response_model=AnswerListResponse)
-async def list_answers(
+def list_answers(
     question_id: str,
     sort: SortOption = Query(SortOption.top, description="Sort order: 'top' (default) or 'newest'"),
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    body_preview: int | None = Query(None, ge=1, le=BODY_PREVIEW_MAX, description=BODY_PREVIEW_DESCRIPTION),
     user: dict | None = Depends(get_optional_user),
 ):
     """
@@ -112,9 +219,12 @@ async def list_answers(
     - Secondary sort is always by newest (created_at)
     - Returns 20 answers per page
     - If authenticated, includes user_vote for each answer
+    - Use `fields` (e.g. 'id,score,status') and `body_preview` to trim the payload
 
     Public endpoint - authentication optional.
     """
+    requested = ANSWER_FIELDS.parse(fields)
+
     # Verify question exists and not deleted
     question_check = supabase.table("questions").select("id").eq("id", question_id).eq("is_deleted", False).execute()
     if not question_check.data:
@@ -142,7 +252,7 @@ async def list_answers(
     offset = (page - 1) * PAGE_SIZE
     query = (
         supabase.table("answers")
-        .select("*, users!answers_author_id_fkey(username)")
+        .select(ANSWER_FIELDS.select(requested, body_preview))
         .eq("question_id", question_id)
         .eq("is_deleted", False)
     )
@@ -154,32 +264,65 @@ async def list_answers(
         query = query.order("created_at", desc=True)
 
     query = query.range(offset, offset + PAGE_SIZE - 1)
-    result = query.execute()
+    rows = ANSWER_FIELDS.attach_names(query.execute().data, requested)
 
     # Get user votes if authenticated
     user_votes = {}
-    if user and result.data:
-        answer_ids = [a["id"] for a in result.data]
-        votes_result = (
-            supabase.table("answer_votes")
-            .select("answer_id, vote_type")
-            .eq("user_id", user["id"])
-            .in_("answer_id", answer_ids)
-            .execute()
-        )
-        user_votes = {v["answer_id"]: v["vote_type"] for v in votes_result.data}
+    if ANSWER_FIELDS.wants(requested, "user_vote"):
+        user_votes = get_user_votes(user, [a["id"] for a in rows], target="answer")
 
-    return AnswerListResponse(
-        answers=[_format_answer(a, user_vote=user_votes.get(a["id"])) for a in result.data],
-        page=page,
-        total_pages=total_pages,
-    )
+    return ORJSONResponse({
+        "answers": [
+            ANSWER_FIELDS.format(a, requested, body_preview, user_vote=user_votes.get(a["id"]))
+            for a in rows
+        ],
+        "page": page,
+        "total_pages": total_pages,
+    })
 
 
 # ============ Top-level /answers endpoints ============
 
+@router.post("/answers/batch", response_model=AnswerBatchResponse)
+def get_answers_batch(
+    request: BatchGetRequest,
+    user: dict | None = Depends(get_optional_user),
+):
+    """
+    Get several answers by ID in one call (up to 100 IDs).
+
+    - Answers are returned in the order their IDs were requested
+    - IDs that don't exist, were deleted or aren't valid IDs are listed in `missing`
+    - If authenticated, includes user_vote for each answer
+
+    Public endpoint - authentication optional.
+    """
+    ids, invalid = split_batch_ids(request.ids)
+
+    rows = []
+    if ids:
+        rows = (
+            supabase.table("answers")
+            .select(ANSWER_SELECT)
+            .in_("id", ids)
+            .eq("is_deleted", False)
+            .execute()
+        ).data
+
+    answers_by_id = {a["id"]: a for a in rows}
+    user_votes = get_user_votes(user, list(answers_by_id), target="answer")
+
+    return ORJSONResponse({
+        "answers": [
+            format_answer(answers_by_id[aid], user_vote=user_votes.get(aid))
+            for aid in ids if aid in answers_by_id
+        ],
+        "missing": [aid for aid in ids if aid not in answers_by_id] + invalid,
+    })
+
+
 @router.get("/answers/{answer_id}", response_model=AnswerPublic)
-async def get_answer(
+def get_answer(
     answer_id: str,
     user: dict | None = Depends(get_optional_user),
 ):
@@ -190,35 +333,30 @@ async def get_answer(
 
     Public endpoint - authentication optional.
     """
-    result = (
-        supabase.table("answers")
-        .select("*, users!answers_author_id_fkey(username)")
-        .eq("id", answer_id)
-        .eq("is_deleted", False)
-        .execute()
-    )
+    answer = rowcache.answers.get(answer_id)
+    if answer is None:
+        result = (
+            supabase.table("answers")
+            .select(ANSWER_SELECT)
+            .eq("id", answer_id)
+            .eq("is_deleted", False)
+            .execute()
+        )
 
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Answer not found")
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Answer not found")
+
+        answer = result.data[0]
+        rowcache.answers.put(answer)
 
     # Get user's vote if authenticated
-    user_vote = None
-    if user:
-        vote_result = (
-            supabase.table("answer_votes")
-            .select("vote_type")
-            .eq("user_id", user["id"])
-            .eq("answer_id", answer_id)
-            .execute()
-        )
-        if vote_result.data:
-            user_vote = vote_result.data[0]["vote_type"]
+    user_vote = get_user_vote(user, answer_id, target="answer")
 
-    return _format_answer(result.data[0], user_vote=user_vote)
+    return ORJSONResponse(format_answer(answer, user_vote=user_vote))
 
 
 @router.post("/answers/{answer_id}/vote", response_model=AnswerPublic)
-async def vote_on_answer(
+def vote_on_answer(
     answer_id: str,
     request: VoteRequest,
     user: dict = Depends(get_current_user),
@@ -235,7 +373,7 @@ async def vote_on_answer(
     # Verify answer exists
     answer_result = (
         supabase.table("answers")
-        .select("*, users!answers_author_id_fkey(username)")
+        .select(ANSWER_SELECT)
         .eq("id", answer_id)
         .eq("is_deleted", False)
         .execute()
@@ -316,12 +454,18 @@ async def vote_on_answer(
     answer["upvote_count"] = new_upvote_count
     answer["downvote_count"] = new_downvote_count
     answer["score"] = new_score
+    rowcache.answers.update(answer_id, {
+        "upvote_count": new_upvote_count,
+        "downvote_count": new_downvote_count,
+        "score": new_score,
+    })
 
-    return _format_answer(answer, user_vote=requested_vote)
+    record_vote(user, answer_id, requested_vote, target="answer")
+    return ORJSONResponse(format_answer(answer, user_vote=requested_vote))
 
 
 @router.delete("/answers/{answer_id}", response_model=AnswerPublic)
-async def delete_answer(
+def delete_answer(
     answer_id: str,
     user: dict = Depends(get_current_user),
 ):
@@ -336,7 +480,7 @@ async def delete_answer(
     # Fetch the answer
     result = (
         supabase.table("answers")
-        .select("*, users!answers_author_id_fkey(username)")
+        .select(ANSWER_SELECT)
         .eq("id", answer_id)
         .eq("is_deleted", False)
         .execute()
@@ -352,12 +496,14 @@ async def delete_answer(
 
     # Soft-delete the answer
     supabase.table("answers").update({"is_deleted": True}).eq("id", answer_id).execute()
+    rowcache.answers.invalidate(answer_id)
 
     # Decrement question's answer_count
     q_result = supabase.table("questions").select("answer_count").eq("id", answer["question_id"]).execute()
     if q_result.data:
         new_count = max(0, q_result.data[0]["answer_count"] - 1)
         supabase.table("questions").update({"answer_count": new_count}).eq("id", answer["question_id"]).execute()
+        rowcache.questions.update(answer["question_id"], {"answer_count": new_count})
 
     # Decrement author's answer_count
     u_result = supabase.table("users").select("answer_count").eq("id", user["id"]).execute()
@@ -365,4 +511,4 @@ async def delete_answer(
         new_count = max(0, u_result.data[0]["answer_count"] - 1)
         supabase.table("users").update({"answer_count": new_count}).eq("id", user["id"]).execute()
 
-    return _format_answer(answer)
+    return ORJSONResponse(format_answer(answer))
@@ -1,20 +1,17 @@
 from fastapi import APIRouter, HTTPException
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from starlette.requests import Request
 from app.database import supabase
-from app.models.user import UserRegisterRequest, UserRegisterResponse, UserPublic
+from app.models.user import UserRegisterRequest, UserRegisterResponse
 from app.utils.api_key import generate_api_key
+from app.utils.formatting import format_user
 from app.utils.intro_messages import get_intro_message
+from app.utils.responses import ORJSONResponse
+from app.utils.profiling import ProfiledRoute
 
-limiter = Limiter(key_func=get_remote_address)
-
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=ProfiledRoute)
 
 
 @router.post("/register", response_model=UserRegisterResponse)
-@limiter.limit("5/minute")
-async def register(request: Request, body: UserRegisterRequest):
+def register(body: UserRegisterRequest):
     """
     Register a new user and receive an API key.
 
@@ -36,15 +33,11 @@ async def register(request: Request, body: UserRegisterRequest):
 
         user_data = result.data[0]
 
-        return UserRegisterResponse(
-            user=UserPublic(
-                id=user_data["id"],
-                username=user_data["username"],
-                question_count=user_data.get("question_count", 0),
-                answer_count=user_data.get("answer_count", 0),
-                reputation=user_data.get("reputation", 0),
-                created_at=user_data["created_at"],
-            ),
+        for counter in ("question_count", "answer_count", "reputation"):
+            user_data.setdefault(counter, 0)
+
+        return ORJSONResponse(UserRegisterResponse(
+            user=format_user(user_data),
             api_key=full_api_key,
             message=(
                 f"Welcome to ChatOverflow, {body.username}! "
@@ -79,7 +72,7 @@ async def register(request: Request, body: UserRegisterRequest):
                 ),
                 "api_docs": "https://www.chatoverflow.dev/api/openapi.json",
             },
-        )
+        ))
 
     except HTTPException:
         raise
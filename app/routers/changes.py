@@ -0,0 +1,61 @@
+import uuid
+from fastapi import APIRouter, HTTPException, Query
+from app.database import supabase
+from app.models.change import ChangeFeedResponse
+from app.utils.batch import canonical_id
+from app.utils.responses import ORJSONResponse
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/changes", tags=["changes"], route_class=ProfiledRoute)
+
+MAX_CHANGES = 500
+
+
+def _format_change(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "entity": row["entity"],
+        "entity_id": row["entity_id"],
+        "op": row["op"],
+        "forum_id": row["forum_id"],
+        "question_id": row["question_id"],
+        "data": row["data"],
+        "changed_at": row["changed_at"],
+    }
+
+
+@router.get("", response_model=ChangeFeedResponse)
+def get_changes(
+    since: int = Query(0, ge=0, description="Cursor from the previous page's next_cursor (0 to start from the beginning)"),
+    limit: int = Query(100, ge=1, le=MAX_CHANGES, description="Maximum number of changes to return"),
+    forum_id: str | None = Query(None, description="Only changes to this forum and its questions and answers"),
+):
+    """
+    Get create/update/vote/delete events for questions, answers and forums
+    after a cursor, oldest first.
+
+    - Pass the returned next_cursor as `since` on the next call
+    - has_more is true when another page is already available
+    - Vote events carry the new counts in `data`; for other events, re-fetch
+      changed items with the batch endpoints (POST /questions/batch etc.)
+
+    Public endpoint - no authentication required.
+    """
+    params = {"p_since": since, "p_limit": limit + 1}
+    if forum_id:
+        forum_id = canonical_id(forum_id)
+        try:
+            uuid.UUID(forum_id)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="forum_id must be a forum ID")
+        params["p_forum_id"] = forum_id
+    rows = supabase.rpc("read_change_log", params).execute().data or []
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return ORJSONResponse({
+        "changes": [_format_change(row) for row in rows],
+        "next_cursor": rows[-1]["id"] if rows else since,
+        "has_more": has_more,
+    })
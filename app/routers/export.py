@@ -0,0 +1,53 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.database import supabase
+from app.utils.auth import require_admin
+from app.utils import export
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/export", tags=["export"], route_class=ProfiledRoute)
+
+
+@router.get("", response_class=StreamingResponse)
+def export_corpus(
+    forum_id: str | None = Query(None, description="Only this forum and its questions and answers"),
+    since: datetime | None = Query(None, description="Only questions and answers created at or after this time"),
+    until: datetime | None = Query(None, description="Only questions and answers created before this time"),
+    include_deleted: bool = Query(False, description="Include soft-deleted questions and answers"),
+    include_embedding: bool = Query(False, description="Include embedding vectors"),
+    zstd: bool = Query(False, description="Compress the download with zstd (corpus.ndjson.zst)"),
+    user: dict = Depends(require_admin),
+):
+    """
+    Stream the forum, question and answer corpus as NDJSON.
+
+    - One JSON object per line, with a `type` of "forum", "question" or
+      "answer", in that order
+    - Rows are read in keyset pages, so the export runs in constant memory
+      however large the corpus is
+
+    Requires authentication as an admin.
+    """
+    if zstd and export.zstandard is None:
+        raise HTTPException(status_code=501, detail="zstd compression is not available on this server")
+
+    chunks = export.iter_export(
+        supabase,
+        forum_id=forum_id,
+        since=since,
+        until=until,
+        include_deleted=include_deleted,
+        include_embedding=include_embedding,
+    )
+    if zstd:
+        return StreamingResponse(
+            export.zstd_chunks(chunks),
+            media_type="application/zstd",
+            headers={"Content-Disposition": 'attachment; filename="corpus.ndjson.zst"'},
+        )
+    return StreamingResponse(
+        chunks,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="corpus.ndjson"'},
+    )
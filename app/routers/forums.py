@@ -1,7 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from app.database import supabase
 from app.models.forum import ForumCreateRequest, ForumPublic, ForumListResponse
+from app.utils import refcache
 from app.utils.auth import get_current_user
+from app.utils.formatting import format_forum
+from app.utils.responses import ORJSONResponse
+from app.utils.profiling import ProfiledRoute
 import math
 import re
 
@@ -9,26 +13,13 @@ def _sanitize_search_word(word: str) -> str:
     """Strip characters significant in PostgREST filter syntax."""
     return re.sub(r'[,.()*%\\]', '', word)
 
-router = APIRouter(prefix="/forums", tags=["forums"])
+router = APIRouter(prefix="/forums", tags=["forums"], route_class=ProfiledRoute)
 
 PAGE_SIZE = 50
 
 
-def _format_forum(forum: dict) -> ForumPublic:
-    """Helper to format forum data with username."""
-    return ForumPublic(
-        id=forum["id"],
-        name=forum["name"],
-        description=forum["description"],
-        created_by=forum["created_by"],
-        created_by_username=forum["users"]["username"],
-        question_count=forum["question_count"],
-        created_at=forum["created_at"],
-    )
-
-
 @router.get("", response_model=ForumListResponse)
-async def list_forums(
+def list_forums(
     search: str | None = Query(None, description="Search forums by name (space-separated words, all must match)"),
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
 ):
@@ -78,15 +69,15 @@ async def list_forums(
         .execute()
     )
 
-    return ForumListResponse(
-        forums=[_format_forum(forum) for forum in result.data],
-        page=page,
-        total_pages=total_pages,
-    )
+    return ORJSONResponse({
+        "forums": [format_forum(forum) for forum in result.data],
+        "page": page,
+        "total_pages": total_pages,
+    })
 
 
 @router.get("/{forum_id}", response_model=ForumPublic)
-async def get_forum(forum_id: str):
+def get_forum(forum_id: str):
     """
     Get a specific forum by ID.
 
@@ -97,11 +88,11 @@ async def get_forum(forum_id: str):
     if not result.data:
         raise HTTPException(status_code=404, detail="Forum not found")
 
-    return _format_forum(result.data[0])
+    return ORJSONResponse(format_forum(result.data[0]))
 
 
 @router.post("", response_model=ForumPublic)
-async def create_forum(
+def create_forum(
     request: ForumCreateRequest,
     user: dict = Depends(get_current_user),
 ):
@@ -120,16 +111,10 @@ async def create_forum(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create forum")
 
+        refcache.forums.invalidate()
         forum_data = result.data[0]
-        return ForumPublic(
-            id=forum_data["id"],
-            name=forum_data["name"],
-            description=forum_data["description"],
-            created_by=forum_data["created_by"],
-            created_by_username=user["username"],
-            question_count=forum_data["question_count"],
-            created_at=forum_data["created_at"],
-        )
+        forum_data["users"] = {"username": user["username"]}
+        return ORJSONResponse(format_forum(forum_data))
 
     except HTTPException:
         raise
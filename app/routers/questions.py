@@ -1,15 +1,34 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from app.config import settings
 from app.database import supabase
+from app.models.batch import BatchGetRequest
 from app.models.question import (
+    QuestionBatchResponse,
+    QuestionClaimRequest,
+    QuestionClaimResponse,
     QuestionCreateRequest,
     QuestionPublic,
     QuestionListResponse,
+    QuestionThreadResponse,
     SortOption,
     VoteRequest,
     VoteOption,
 )
 from app.utils.auth import get_current_user, get_optional_user
-from app.utils.embeddings import get_embedding
+from app.utils.batch import split_batch_ids
+from app.utils import events, refcache, rowcache
+from app.utils.embeddings import EmbeddingUnavailable, get_embedding
+from app.utils.fieldsets import (
+    BODY_PREVIEW_DESCRIPTION,
+    BODY_PREVIEW_MAX,
+    FIELDS_DESCRIPTION,
+    QUESTION_FIELDS,
+    QUESTION_SELECT,
+)
+from app.utils.formatting import format_question, format_timestamp
+from app.utils.votes import get_user_vote, get_user_votes, record_vote
+from app.utils.responses import ORJSONResponse
+from app.utils.profiling import ProfiledRoute
 import math
 import re
 
@@ -18,32 +37,13 @@ def _sanitize_search_word(word: str) -> str:
     return re.sub(r'[,.()*%\\]', '', word)
 
 
-router = APIRouter(prefix="/questions", tags=["questions"])
+router = APIRouter(prefix="/questions", tags=["questions"], route_class=ProfiledRoute)
 
 PAGE_SIZE = 20
 
 
-def _format_question(question: dict, user_vote: str | None = None) -> QuestionPublic:
-    """Helper to format question data with joined fields."""
-    return QuestionPublic(
-        id=question["id"],
-        title=question["title"],
-        body=question["body"],
-        forum_id=question["forum_id"],
-        forum_name=question["forums"]["name"],
-        author_id=question["author_id"],
-        author_username=question["users"]["username"],
-        upvote_count=question["upvote_count"],
-        downvote_count=question["downvote_count"],
-        score=question["score"],
-        answer_count=question["answer_count"],
-        created_at=question["created_at"],
-        user_vote=user_vote,
-    )
-
-
 @router.post("", response_model=QuestionPublic)
-async def create_question(
+def create_question(
     request: QuestionCreateRequest,
     user: dict = Depends(get_current_user),
 ):
@@ -53,17 +53,15 @@ async def create_question(
     Requires authentication.
     """
     # Verify forum exists
-    forum_result = supabase.table("forums").select("id, name").eq("id", request.forum_id).execute()
-    if not forum_result.data:
+    forum = refcache.forums.get(request.forum_id)
+    if forum is None:
         raise HTTPException(status_code=404, detail="Forum not found")
 
-    forum = forum_result.data[0]
-
     try:
         result = supabase.table("questions").insert({
             "title": request.title,
             "body": request.body,
-            "forum_id": request.forum_id,
+            "forum_id": forum["id"],
             "author_id": user["id"],
         }).execute()
 
@@ -75,27 +73,22 @@ async def create_question(
         # Note: question_count on forum, question_count on user, and reputation
         # are all updated automatically by database triggers.
 
-        # Generate and store embedding
-        embedding = get_embedding(request.title + "\n\n" + request.body)
+        # Generate and store embedding; without one the question is still
+        # created, it just isn't found by semantic search.
+        try:
+            embedding = get_embedding(request.title + "\n\n" + request.body)
+        except EmbeddingUnavailable:
+            embedding = None
         if embedding is not None:
             supabase.table("questions").update(
                 {"embedding": embedding}
             ).eq("id", question_data["id"]).execute()
 
-        return QuestionPublic(
-            id=question_data["id"],
-            title=question_data["title"],
-            body=question_data["body"],
-            forum_id=question_data["forum_id"],
-            forum_name=forum["name"],
-            author_id=question_data["author_id"],
-            author_username=user["username"],
-            upvote_count=question_data["upvote_count"],
-            downvote_count=question_data["downvote_count"],
-            score=question_data["score"],
-            answer_count=question_data["answer_count"],
-            created_at=question_data["created_at"],
-        )
+        question_data["forums"] = {"name": forum["name"]}
+        question_data["users"] = {"username": user["username"]}
+        payload = format_question(question_data)
+        events.publish_from_thread("question", payload, forum_id=payload["forum_id"], question_id=payload["id"])
+        return ORJSONResponse(payload)
 
     except HTTPException:
         raise
@@ -103,8 +96,46 @@ async def create_question(
         raise HTTPException(status_code=500, detail="Failed to create question")
 
 
+@router.post("/batch", response_model=QuestionBatchResponse)
+def get_questions_batch(
+    request: BatchGetRequest,
+    user: dict | None = Depends(get_optional_user),
+):
+    """
+    Get several questions by ID in one call (up to 100 IDs).
+
+    - Questions are returned in the order their IDs were requested
+    - IDs that don't exist, were deleted or aren't valid IDs are listed in `missing`
+    - If authenticated, includes user_vote for each question
+
+    Public endpoint - authentication optional.
+    """
+    ids, invalid = split_batch_ids(request.ids)
+
+    rows = []
+    if ids:
+        rows = (
+            supabase.table("questions")
+            .select(QUESTION_SELECT)
+            .in_("id", ids)
+            .eq("is_deleted", False)
+            .execute()
+        ).data
+
+    questions_by_id = {q["id"]: q for q in rows}
+    user_votes = get_user_votes(user, list(questions_by_id))
+
+    return ORJSONResponse({
+        "questions": [
+            format_question(questions_by_id[qid], user_vote=user_votes.get(qid))
+            for qid in ids if qid in questions_by_id
+        ],
+        "missing": [qid for qid in ids if qid not in questions_by_id] + invalid,
+    })
+
+
 @router.post("/{question_id}/vote", response_model=QuestionPublic)
-async def vote_on_question(
+def vote_on_question(
     question_id: str,
     request: VoteRequest,
     user: dict = Depends(get_current_user),
@@ -121,7 +152,7 @@ async def vote_on_question(
     # Verify question exists
     question_result = (
         supabase.table("questions")
-        .select("*, users!questions_author_id_fkey(username), forums(name)")
+        .select(QUESTION_SELECT)
         .eq("id", question_id)
         .eq("is_deleted", False)
         .execute()
@@ -202,13 +233,21 @@ async def vote_on_question(
     question["upvote_count"] = new_upvote_count
     question["downvote_count"] = new_downvote_count
     question["score"] = new_score
+    rowcache.questions.update(question_id, {
+        "upvote_count": new_upvote_count,
+        "downvote_count": new_downvote_count,
+        "score": new_score,
+    })
 
-    return _format_question(question, user_vote=requested_vote)
+    record_vote(user, question_id, requested_vote)
+    return ORJSONResponse(format_question(question, user_vote=requested_vote))
 
 
 @router.get("/unanswered", response_model=list[QuestionPublic])
-async def get_unanswered_questions(
+def get_unanswered_questions(
     limit: int = Query(10, ge=1, description="Number of unanswered questions to return"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    body_preview: int | None = Query(None, ge=1, le=BODY_PREVIEW_MAX, description=BODY_PREVIEW_DESCRIPTION),
 ):
     """
     Get unanswered questions (answer_count = 0), oldest first.
@@ -216,9 +255,12 @@ async def get_unanswered_questions(
     - Returns questions with no answers, sorted by oldest first
     - Use `limit` to control how many (default 10)
     - Returns 400 if limit exceeds total unanswered questions
+    - Use `fields` and `body_preview` to trim the payload
 
     Public endpoint - no authentication required.
     """
+    requested = QUESTION_FIELDS.parse(fields)
+
     # Count total unanswered questions
     count_result = (
         supabase.table("questions")
@@ -240,7 +282,7 @@ async def get_unanswered_questions(
 
     result = (
         supabase.table("questions")
-        .select("*, users!questions_author_id_fkey(username), forums(name)")
+        .select(QUESTION_FIELDS.select(requested, body_preview))
         .eq("answer_count", 0)
         .eq("is_deleted", False)
         .order("created_at", desc=False)
@@ -248,32 +290,78 @@ async def get_unanswered_questions(
         .execute()
     )
 
-    return [_format_question(q) for q in result.data]
+    rows = QUESTION_FIELDS.attach_names(result.data, requested)
+    return ORJSONResponse([QUESTION_FIELDS.format(q, requested, body_preview) for q in rows])
 
 
-SEMANTIC_SEARCH_LIMIT = 200
+@router.post("/unanswered/claim", response_model=QuestionClaimResponse)
+def claim_unanswered_questions(
+    request: QuestionClaimRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Lease unanswered questions to answer, so agents don't all pick the same ones.
 
+    - Claims up to `count` (max 20) unanswered questions, oldest first,
+      that nobody else currently holds
+    - The lease lasts `ttl_seconds` (default 600); after that the question
+      can be claimed again if it is still unanswered
+    - Optionally restrict to one forum with `forum_id`
+    - Returns an empty list if there is nothing left to claim
 
-def _get_user_votes(user: dict | None, question_ids: list[str]) -> dict:
-    """Fetch user's votes for a list of question IDs."""
-    if not user or not question_ids:
-        return {}
-    votes_result = (
-        supabase.table("question_votes")
-        .select("question_id, vote_type")
-        .eq("user_id", user["id"])
-        .in_("question_id", question_ids)
-        .execute()
-    )
-    return {v["question_id"]: v["vote_type"] for v in votes_result.data}
+    Requires authentication.
+    """
+    params = {
+        "p_user_id": user["id"],
+        "p_limit": request.count,
+        "p_ttl_seconds": request.ttl_seconds,
+    }
+    if request.forum_id:
+        params["p_forum_id"] = request.forum_id
+    leases = supabase.rpc("claim_unanswered_questions", params).execute().data or []
+
+    rows = []
+    if leases:
+        rows = (
+            supabase.table("questions")
+            .select(QUESTION_SELECT)
+            .in_("id", [lease["question_id"] for lease in leases])
+            .execute()
+        ).data
+    questions_by_id = {q["id"]: q for q in rows}
+
+    return ORJSONResponse({
+        "questions": [
+            format_question(questions_by_id[lease["question_id"]])
+            for lease in leases if lease["question_id"] in questions_by_id
+        ],
+        "leased_until": leases[0]["leased_until"] if leases else None,
+    })
+
+
+SEMANTIC_SEARCH_LIMIT = settings.semantic_search_limit
+
+
+def _keyword_search_ids(q: str, forum_id: str | None) -> list[str]:
+    """Question IDs whose title or body contains every word of q, best score first."""
+    words = [w for w in (_sanitize_search_word(word) for word in q.split()) if w]
+    query = supabase.table("questions").select("id").eq("is_deleted", False)
+    if forum_id:
+        query = query.eq("forum_id", forum_id)
+    for word in words:
+        query = query.or_(f"title.ilike.%{word}%,body.ilike.%{word}%")
+    result = query.order("score", desc=True).order("created_at", desc=True).limit(SEMANTIC_SEARCH_LIMIT).execute()
+    return [row["id"] for row in result.data]
 
 
 @router.get("/search", response_model=QuestionListResponse)
-async def search_questions(
+def search_questions(
     q: str = Query(..., min_length=1, description="Semantic search query (searches question and answer content by meaning)"),
     keywords: str | None = Query(None, description="Optional keyword filter on title and body (space-separated words, all must match)"),
     forum_id: str | None = Query(None, description="Filter by forum ID"),
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    body_preview: int | None = Query(None, ge=1, le=BODY_PREVIEW_MAX, description=BODY_PREVIEW_DESCRIPTION),
     user: dict | None = Depends(get_optional_user),
 ):
     """
@@ -281,7 +369,9 @@ async def search_questions(
 
     Finds questions whose meaning matches your query, ranked by relevance.
     Searches both question content (title + body) and answer content,
-    returning the parent questions.
+    returning the parent questions. If the embedding provider is unavailable,
+    falls back to matching every word of q in the title or body, ranked by
+    score; the `X-Search-Mode` response header says which was used.
 
     - **q** (required): Natural language search query.
     - **keywords**: Optional keyword filter — each space-separated word must appear
@@ -289,33 +379,45 @@ async def search_questions(
     - **forum_id**: Filter to a specific forum.
     - Returns 20 questions per page, sorted by relevance.
     - If authenticated, includes user_vote for each question.
+    - **fields** / **body_preview**: Trim the payload to the fields you need.
 
     Public endpoint - authentication optional.
     """
-    query_embedding = get_embedding(q)
-    if query_embedding is None:
-        raise HTTPException(
-            status_code=503,
-            detail="Semantic search is not available (embedding model not configured)",
-        )
+    requested = QUESTION_FIELDS.parse(fields)
 
-    # Call the semantic_search RPC function
-    rpc_params = {
-        "query_embedding": query_embedding,
-        "match_threshold": 0.3,
-        "match_count": SEMANTIC_SEARCH_LIMIT,
-    }
-    if forum_id:
-        rpc_params["p_forum_id"] = forum_id
-
-    rpc_result = supabase.rpc("semantic_search", rpc_params).execute()
-    matched = rpc_result.data or []
-
-    if not matched:
-        return QuestionListResponse(questions=[], page=1, total_pages=1)
+    try:
+        query_embedding = get_embedding(q)
+    except EmbeddingUnavailable:
+        query_embedding = None
+        search_mode = "keyword"
+    else:
+        if query_embedding is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Semantic search is not available (embedding model not configured)",
+            )
+        search_mode = "semantic"
+    headers = {"X-Search-Mode": search_mode}
+
+    if query_embedding is not None:
+        # Call the semantic_search RPC function
+        rpc_params = {
+            "query_embedding": query_embedding,
+            "match_threshold": settings.semantic_search_threshold,
+            "match_count": SEMANTIC_SEARCH_LIMIT,
+        }
+        if forum_id:
+            rpc_params["p_forum_id"] = forum_id
+
+        rpc_result = supabase.rpc("semantic_search", rpc_params).execute()
+        # Ordered IDs by similarity (RPC returns them sorted)
+        ordered_ids = [m["question_id"] for m in rpc_result.data or []]
+    else:
+        # Embedding provider is down: match the query words instead, best score first
+        ordered_ids = _keyword_search_ids(q, forum_id)
 
-    # Ordered IDs by similarity (RPC returns them sorted)
-    ordered_ids = [m["question_id"] for m in matched]
+    if not ordered_ids:
+        return ORJSONResponse({"questions": [], "page": 1, "total_pages": 1}, headers=headers)
 
     # Apply keyword filter if provided
     if keywords:
@@ -342,37 +444,42 @@ async def search_questions(
     page_ids = ordered_ids[offset : offset + PAGE_SIZE]
 
     if not page_ids:
-        return QuestionListResponse(questions=[], page=page, total_pages=total_pages)
+        return ORJSONResponse({"questions": [], "page": page, "total_pages": total_pages}, headers=headers)
 
     # Fetch full question data for this page
     result = (
         supabase.table("questions")
-        .select("*, users!questions_author_id_fkey(username), forums(name)")
+        .select(QUESTION_FIELDS.select(requested, body_preview))
         .in_("id", page_ids)
         .eq("is_deleted", False)
         .execute()
     )
 
     # Re-order by similarity (DB fetch doesn't preserve in-list order)
-    questions_by_id = {q_data["id"]: q_data for q_data in result.data}
+    questions_by_id = {q_data["id"]: q_data for q_data in QUESTION_FIELDS.attach_names(result.data, requested)}
     ordered_questions = [questions_by_id[qid] for qid in page_ids if qid in questions_by_id]
 
-    user_votes = _get_user_votes(user, page_ids)
+    user_votes = get_user_votes(user, page_ids) if QUESTION_FIELDS.wants(requested, "user_vote") else {}
 
-    return QuestionListResponse(
-        questions=[_format_question(q_data, user_vote=user_votes.get(q_data["id"])) for q_data in ordered_questions],
-        page=page,
-        total_pages=total_pages,
-    )
+    return ORJSONResponse({
+        "questions": [
+            QUESTION_FIELDS.format(q_data, requested, body_preview, user_vote=user_votes.get(q_data["id"]))
+            for q_data in ordered_questions
+        ],
+        "page": page,
+        "total_pages": total_pages,
+    }, headers=headers)
 
 
 @router.get("", response_model=QuestionListResponse)
-async def list_questions(
+def list_questions(
     forum_id: str | None = Query(None, description="Filter by forum ID"),
     user_id: str | None = Query(None, description="Filter by author user ID"),
     search: str | None = Query(None, description="Search in title and body (space-separated words, all must match)"),
     sort: SortOption = Query(SortOption.top, description="Sort order: 'top' (default) or 'newest'"),
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    body_preview: int | None = Query(None, ge=1, le=BODY_PREVIEW_MAX, description=BODY_PREVIEW_DESCRIPTION),
     user: dict | None = Depends(get_optional_user),
 ):
     """
@@ -384,16 +491,19 @@ async def list_questions(
     - Secondary sort is always by newest (created_at)
     - Returns 20 questions per page
     - If authenticated, includes user_vote for each question
+    - Use `fields` (e.g. 'id,title,score') and `body_preview` to trim the payload
 
     Public endpoint - authentication optional.
     """
+    requested = QUESTION_FIELDS.parse(fields)
+
     # Validate user_id is a valid UUID if provided
     if user_id:
         try:
             import uuid
             uuid.UUID(user_id)
         except ValueError:
-            return QuestionListResponse(questions=[], page=1, total_pages=1)
+            return ORJSONResponse({"questions": [], "page": 1, "total_pages": 1})
 
     # Parse search words
     search_words = []
@@ -424,7 +534,7 @@ async def list_questions(
 
     # Build query for results
     offset = (page - 1) * PAGE_SIZE
-    query = supabase.table("questions").select("*, users!questions_author_id_fkey(username), forums(name)").eq("is_deleted", False)
+    query = supabase.table("questions").select(QUESTION_FIELDS.select(requested, body_preview)).eq("is_deleted", False)
 
     if forum_id:
         query = query.eq("forum_id", forum_id)
@@ -442,20 +552,25 @@ async def list_questions(
         query = query.order("created_at", desc=True)
 
     query = query.range(offset, offset + PAGE_SIZE - 1)
-    result = query.execute()
+    rows = QUESTION_FIELDS.attach_names(query.execute().data, requested)
 
     # Get user votes if authenticated
-    user_votes = _get_user_votes(user, [q["id"] for q in result.data])
+    user_votes = {}
+    if QUESTION_FIELDS.wants(requested, "user_vote"):
+        user_votes = get_user_votes(user, [q["id"] for q in rows])
 
-    return QuestionListResponse(
-        questions=[_format_question(q, user_vote=user_votes.get(q["id"])) for q in result.data],
-        page=page,
-        total_pages=total_pages,
-    )
+    return ORJSONResponse({
+        "questions": [
+            QUESTION_FIELDS.format(q, requested, body_preview, user_vote=user_votes.get(q["id"]))
+            for q in rows
+        ],
+        "page": page,
+        "total_pages": total_pages,
+    })
 
 
 @router.get("/{question_id}", response_model=QuestionPublic)
-async def get_question(
+def get_question(
     question_id: str,
     user: dict | None = Depends(get_optional_user),
 ):
@@ -466,35 +581,69 @@ async def get_question(
 
     Public endpoint - authentication optional.
     """
-    result = (
-        supabase.table("questions")
-        .select("*, users!questions_author_id_fkey(username), forums(name)")
-        .eq("id", question_id)
-        .eq("is_deleted", False)
-        .execute()
-    )
+    question = rowcache.questions.get(question_id)
+    if question is None:
+        result = (
+            supabase.table("questions")
+            .select(QUESTION_SELECT)
+            .eq("id", question_id)
+            .eq("is_deleted", False)
+            .execute()
+        )
 
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Question not found")
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Question not found")
+
+        question = result.data[0]
+        rowcache.questions.put(question)
 
     # Get user's vote if authenticated
-    user_vote = None
-    if user:
-        vote_result = (
-            supabase.table("question_votes")
-            .select("vote_type")
-            .eq("user_id", user["id"])
-            .eq("question_id", question_id)
-            .execute()
-        )
-        if vote_result.data:
-            user_vote = vote_result.data[0]["vote_type"]
+    user_vote = get_user_vote(user, question_id)
+
+    return ORJSONResponse(format_question(question, user_vote=user_vote))
+
+
+@router.get("/{question_id}/thread", response_model=QuestionThreadResponse)
+def get_question_thread(
+    question_id: str,
+    sort: SortOption = Query(SortOption.top, description="Answer sort order: 'top' (default) or 'newest'"),
+    user: dict | None = Depends(get_optional_user),
+):
+    """
+    Get a question together with the first page of its answers.
 
-    return _format_question(result.data[0], user_vote=user_vote)
+    Equivalent to `GET /questions/{id}` plus `GET /questions/{id}/answers`,
+    served from a single database call. Use `total_answer_pages` to decide
+    whether to fetch further pages from the answers endpoint.
+
+    If authenticated, includes user_vote on the question and every answer.
+
+    Public endpoint - authentication optional.
+    """
+    result = supabase.rpc("get_question_thread", {
+        "p_question_id": question_id,
+        "p_user_id": user["id"] if user else None,
+        "p_sort": sort.value,
+        "p_limit": PAGE_SIZE,
+    }).execute()
+
+    thread = result.data
+    if not thread:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    total = thread["answer_total"]
+    # The RPC builds the payload in SQL; match the formatters' timestamps
+    for item in (thread["question"], *thread["answers"]):
+        item["created_at"] = format_timestamp(item["created_at"])
+    return ORJSONResponse({
+        "question": thread["question"],
+        "answers": thread["answers"],
+        "total_answer_pages": math.ceil(total / PAGE_SIZE) if total > 0 else 1,
+    })
 
 
 @router.delete("/{question_id}", response_model=QuestionPublic)
-async def delete_question(
+def delete_question(
     question_id: str,
     user: dict = Depends(get_current_user),
 ):
@@ -510,7 +659,7 @@ async def delete_question(
     # Fetch the question
     result = (
         supabase.table("questions")
-        .select("*, users!questions_author_id_fkey(username), forums(name)")
+        .select(QUESTION_SELECT)
         .eq("id", question_id)
         .eq("is_deleted", False)
         .execute()
@@ -540,6 +689,9 @@ async def delete_question(
     for answer in deleted_answers:
         supabase.table("answers").update({"is_deleted": True}).eq("id", answer["id"]).execute()
 
+    rowcache.questions.invalidate(question_id)
+    rowcache.answers.invalidate(*(answer["id"] for answer in deleted_answers))
+
     # Decrement forum question_count
     forum_result = supabase.table("forums").select("question_count").eq("id", question["forum_id"]).execute()
     if forum_result.data:
@@ -564,4 +716,4 @@ async def delete_question(
             new_count = max(0, u_result.data[0]["answer_count"] - count)
             supabase.table("users").update({"answer_count": new_count}).eq("id", author_id).execute()
 
-    return _format_question(question)
+    return ORJSONResponse(format_question(question))
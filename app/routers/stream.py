@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.utils import events
+from app.utils.batch import canonical_id
+from app.utils.events import EVENT_TYPES, EVICTED
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(tags=["stream"], route_class=ProfiledRoute)
+
+
+async def _event_stream(forum_id: str | None, wanted: set[str]):
+    # Ask clients to wait a few seconds before reconnecting
+    retry = b"retry: 5000\n\n"
+    # Subscribed here rather than in the handler, and with nothing that can
+    # be interrupted before the try: the finally only runs once iteration
+    # has started, and a client can go away before that
+    subscription = events.hub.subscribe(forum_id, wanted)
+    if subscription is None:
+        # Filled up since the handler checked
+        yield retry + b"event: evicted\ndata: {}\n\n"
+        return
+    try:
+        yield retry
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.stream_heartbeat_seconds
+                )
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield b": ping\n\n"
+                continue
+            if message is EVICTED:
+                yield b"event: evicted\ndata: {}\n\n"
+                return
+            yield message
+    finally:
+        events.hub.unsubscribe(subscription)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_events(
+    forum_id: str | None = Query(None, description="Only events from this forum"),
+    types: str | None = Query(None, description="Comma-separated event types: 'question', 'answer' (default both)"),
+):
+    """
+    Server-sent events stream of newly created questions and answers.
+
+    - `event: question` / `event: answer`, with the same payload as
+      GET /questions/{id} and GET /answers/{id}
+    - A `: ping` comment is sent when the stream has been idle for a while
+    - A client that falls too far behind receives `event: evicted` and the
+      stream closes; reconnect and catch up with GET /changes
+    - Returns 503 if the server has too many open streams
+
+    Public endpoint - no authentication required.
+    """
+    if forum_id is not None:
+        forum_id = canonical_id(forum_id)
+        try:
+            uuid.UUID(forum_id)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="forum_id must be a forum ID")
+
+    wanted = set(EVENT_TYPES)
+    if types is not None:
+        wanted = {t.strip() for t in types.split(",") if t.strip()}
+        unknown = wanted - set(EVENT_TYPES)
+        if unknown or not wanted:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown event type(s): {', '.join(sorted(unknown)) or types}. Allowed: {', '.join(EVENT_TYPES)}",
+            )
+
+    if events.hub.full():
+        raise HTTPException(status_code=503, detail="Too many open streams, try again later")
+
+    return StreamingResponse(
+        _event_stream(forum_id, wanted),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
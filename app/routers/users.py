@@ -1,15 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from app.database import supabase
-from app.models.user import UserPublic
-from app.models.question import QuestionPublic, QuestionListResponse, SortOption
-from app.models.answer import AnswerPublic, AnswerListResponse
+from app.models.batch import BatchGetRequest
+from app.models.user import UserBatchResponse, UserPublic
+from app.models.question import QuestionListResponse, SortOption
+from app.models.answer import AnswerListResponse
 from app.utils.auth import get_current_user
+from app.utils.batch import split_batch_ids
+from app.utils.fieldsets import (
+    ANSWER_FIELDS,
+    BODY_PREVIEW_DESCRIPTION,
+    BODY_PREVIEW_MAX,
+    FIELDS_DESCRIPTION,
+    QUESTION_FIELDS,
+)
+from app.utils.formatting import format_user
+from app.utils.responses import ORJSONResponse
+from app.utils.profiling import ProfiledRoute
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 import math
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=ProfiledRoute)
 
 PAGE_SIZE = 20
 
@@ -40,30 +52,18 @@ class UsageListResponse(BaseModel):
     total_users: int
 
 
-def _format_user(user: dict) -> UserPublic:
-    """Helper to format user data."""
-    return UserPublic(
-        id=user["id"],
-        username=user["username"],
-        question_count=user["question_count"],
-        answer_count=user["answer_count"],
-        reputation=user["reputation"],
-        created_at=user["created_at"],
-    )
-
-
 @router.get("/me", response_model=UserPublic)
-async def get_my_profile(user: dict = Depends(get_current_user)):
+def get_my_profile(user: dict = Depends(get_current_user)):
     """
     Get the currently authenticated user's profile.
 
     Requires a valid API key in the Authorization header.
     """
-    return _format_user(user)
+    return ORJSONResponse(format_user(user))
 
 
 @router.get("/top", response_model=list[UserPublic])
-async def get_top_users(
+def get_top_users(
     limit: int = Query(10, ge=1, le=50, description="Number of top users to return (max 50)"),
 ):
     """
@@ -79,14 +79,38 @@ async def get_top_users(
         .execute()
     )
 
-    return [_format_user(u) for u in result.data]
+    return ORJSONResponse([format_user(u) for u in result.data])
+
+
+@router.post("/batch", response_model=UserBatchResponse)
+def get_users_batch(request: BatchGetRequest):
+    """
+    Get several users' public profiles by ID in one call (up to 100 IDs).
+
+    - Users are returned in the order their IDs were requested
+    - IDs that don't exist or aren't valid IDs are listed in `missing`
+
+    Public endpoint - no authentication required.
+    """
+    ids, invalid = split_batch_ids(request.ids)
+
+    rows = []
+    if ids:
+        rows = supabase.table("users").select(USER_PUBLIC_FIELDS).in_("id", ids).execute().data
+
+    users_by_id = {u["id"]: u for u in rows}
+
+    return ORJSONResponse({
+        "users": [format_user(users_by_id[uid]) for uid in ids if uid in users_by_id],
+        "missing": [uid for uid in ids if uid not in users_by_id] + invalid,
+    })
 
 
 USAGE_PAGE_SIZE = 20
 
 
 @router.get("/usage", response_model=UsageListResponse)
-async def get_usage_stats(
+def get_usage_stats(
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
     period: UsagePeriod = Query(UsagePeriod.all, description="Time period: '24h', '30d', or 'all'"),
 ):
@@ -136,7 +160,7 @@ async def get_usage_stats(
     user_list = users_result.data or []
 
     if not user_list:
-        return UsageListResponse(users=[], page=page, total_pages=total_pages, total_users=total_count)
+        return ORJSONResponse(UsageListResponse(users=[], page=page, total_pages=total_pages, total_users=total_count))
 
     user_ids = [u["id"] for u in user_list]
 
@@ -204,7 +228,7 @@ async def get_usage_stats(
         ))
 
     stats.sort(key=lambda s: s.activity_score, reverse=True)
-    return UsageListResponse(users=stats, page=page, total_pages=total_pages, total_users=total_count)
+    return ORJSONResponse(UsageListResponse(users=stats, page=page, total_pages=total_pages, total_users=total_count))
 
 
 class DailyActivity(BaseModel):
@@ -213,7 +237,7 @@ class DailyActivity(BaseModel):
 
 
 @router.get("/{user_id}/activity", response_model=list[DailyActivity])
-async def get_user_activity(user_id: str):
+def get_user_activity(user_id: str):
     """
     Get daily activity (questions + answers) for a user over the last year.
 
@@ -249,14 +273,14 @@ async def get_user_activity(user_id: str):
         day = row["created_at"][:10]  # "YYYY-MM-DD"
         day_counts[day] = day_counts.get(day, 0) + 1
 
-    return [
+    return ORJSONResponse([
         DailyActivity(date=d, count=c)
         for d, c in sorted(day_counts.items())
-    ]
+    ])
 
 
 @router.get("/username/{username}", response_model=UserPublic)
-async def get_user_by_username(username: str):
+def get_user_by_username(username: str):
     """
     Get a user's public profile by username.
 
@@ -272,11 +296,11 @@ async def get_user_by_username(username: str):
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return _format_user(result.data[0])
+    return ORJSONResponse(format_user(result.data[0]))
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-async def get_user_profile(user_id: str):
+def get_user_profile(user_id: str):
     """
     Get a user's public profile by ID.
 
@@ -292,23 +316,28 @@ async def get_user_profile(user_id: str):
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return _format_user(result.data[0])
+    return ORJSONResponse(format_user(result.data[0]))
 
 
 @router.get("/{user_id}/questions", response_model=QuestionListResponse)
-async def get_user_questions(
+def get_user_questions(
     user_id: str,
     sort: SortOption = Query(SortOption.newest, description="Sort order: 'newest' (default) or 'top'"),
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    body_preview: int | None = Query(None, ge=1, le=BODY_PREVIEW_MAX, description=BODY_PREVIEW_DESCRIPTION),
 ):
     """
     Get all questions posted by a user.
 
     - Sort by 'newest' (default) or 'top' (by score)
     - Returns 20 questions per page
+    - Use `fields` and `body_preview` to trim the payload
 
     Public endpoint - no authentication required.
     """
+    requested = QUESTION_FIELDS.parse(fields)
+
     # Verify user exists
     user_check = supabase.table("users").select("id").eq("id", user_id).execute()
     if not user_check.data:
@@ -335,7 +364,7 @@ async def get_user_questions(
     offset = (page - 1) * PAGE_SIZE
     query = (
         supabase.table("questions")
-        .select("*, users!questions_author_id_fkey(username), forums(name)")
+        .select(QUESTION_FIELDS.select(requested, body_preview))
         .eq("author_id", user_id)
         .eq("is_deleted", False)
     )
@@ -347,45 +376,35 @@ async def get_user_questions(
 
     result = query.range(offset, offset + PAGE_SIZE - 1).execute()
 
-    questions = [
-        QuestionPublic(
-            id=q["id"],
-            title=q["title"],
-            body=q["body"],
-            forum_id=q["forum_id"],
-            forum_name=q["forums"]["name"],
-            author_id=q["author_id"],
-            author_username=q["users"]["username"],
-            upvote_count=q["upvote_count"],
-            downvote_count=q["downvote_count"],
-            score=q["score"],
-            answer_count=q["answer_count"],
-            created_at=q["created_at"],
-        )
-        for q in result.data
-    ]
+    rows = QUESTION_FIELDS.attach_names(result.data, requested)
+    questions = [QUESTION_FIELDS.format(q, requested, body_preview) for q in rows]
 
-    return QuestionListResponse(
-        questions=questions,
-        page=page,
-        total_pages=total_pages,
-    )
+    return ORJSONResponse({
+        "questions": questions,
+        "page": page,
+        "total_pages": total_pages,
+    })
 
 
 @router.get("/{user_id}/answers", response_model=AnswerListResponse)
-async def get_user_answers(
+def get_user_answers(
     user_id: str,
     sort: SortOption = Query(SortOption.newest, description="Sort order: 'newest' (default) or 'top'"),
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    body_preview: int | None = Query(None, ge=1, le=BODY_PREVIEW_MAX, description=BODY_PREVIEW_DESCRIPTION),
 ):
     """
     Get all answers posted by a user.
 
     - Sort by 'newest' (default) or 'top' (by score)
     - Returns 20 answers per page
+    - Use `fields` and `body_preview` to trim the payload
 
     Public endpoint - no authentication required.
     """
+    requested = ANSWER_FIELDS.parse(fields)
+
     # Verify user exists
     user_check = supabase.table("users").select("id").eq("id", user_id).execute()
     if not user_check.data:
@@ -412,7 +431,7 @@ async def get_user_answers(
     offset = (page - 1) * PAGE_SIZE
     query = (
         supabase.table("answers")
-        .select("*, users!answers_author_id_fkey(username)")
+        .select(ANSWER_FIELDS.select(requested, body_preview))
         .eq("author_id", user_id)
         .eq("is_deleted", False)
     )
@@ -424,24 +443,11 @@ async def get_user_answers(
 
     result = query.range(offset, offset + PAGE_SIZE - 1).execute()
 
-    answers = [
-        AnswerPublic(
-            id=a["id"],
-            body=a["body"],
-            question_id=a["question_id"],
-            author_id=a["author_id"],
-            author_username=a["users"]["username"],
-            status=a["status"],
-            upvote_count=a["upvote_count"],
-            downvote_count=a["downvote_count"],
-            score=a["score"],
-            created_at=a["created_at"],
-        )
-        for a in result.data
-    ]
+    rows = ANSWER_FIELDS.attach_names(result.data, requested)
+    answers = [ANSWER_FIELDS.format(a, requested, body_preview) for a in rows]
 
-    return AnswerListResponse(
-        answers=answers,
-        page=page,
-        total_pages=total_pages,
-    )
+    return ORJSONResponse({
+        "answers": answers,
+        "page": page,
+        "total_pages": total_pages,
+    })
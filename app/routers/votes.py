@@ -0,0 +1,80 @@
+import uuid
+from fastapi import APIRouter, Depends
+from app.database import supabase
+from app.models.vote import BatchVoteRequest, BatchVoteResponse, VoteTarget
+from app.utils import rowcache
+from app.utils.auth import get_current_user
+from app.utils.responses import ORJSONResponse
+from app.utils.votes import record_vote
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/votes", tags=["votes"], route_class=ProfiledRoute)
+
+NOT_FOUND = {
+    VoteTarget.question: "Question not found",
+    VoteTarget.answer: "Answer not found",
+}
+
+
+@router.post("/batch", response_model=BatchVoteResponse)
+def vote_batch(
+    request: BatchVoteRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Apply several question and answer votes in one call (up to 50).
+
+    - Each item is {"target_type": "question"|"answer", "target_id", "vote"}
+    - Votes are applied in order, in a single transaction
+    - Each result has its own status, with the same rules as the single-vote
+      endpoints: 200 applied, 409 already voted the same way, 400 no vote to
+      remove, 404 target not found
+    - Applied results include the target's updated vote counts
+
+    Requires authentication.
+    """
+    results = []
+    items = []
+    for vote in request.votes:
+        try:
+            target_id = str(uuid.UUID(vote.target_id))
+        except ValueError:
+            target_id = None
+        result = {
+            "target_type": vote.target_type.value,
+            "target_id": target_id or vote.target_id,
+            "status": 404,
+            "detail": NOT_FOUND[vote.target_type],
+            "user_vote": None,
+            "upvote_count": None,
+            "downvote_count": None,
+            "score": None,
+        }
+        results.append(result)
+        # Malformed IDs can't match anything and would fail the uuid cast
+        # for the whole batch, so they never reach the database.
+        if target_id is not None:
+            items.append((result, {
+                "target_type": vote.target_type.value,
+                "target_id": target_id,
+                "vote": vote.vote.value,
+            }))
+
+    if items:
+        applied = supabase.rpc("apply_vote_batch", {
+            "p_user_id": user["id"],
+            "p_items": [item for _, item in items],
+        }).execute().data
+        for (result, item), outcome in zip(items, applied["results"]):
+            result["status"] = outcome["status"]
+            result["detail"] = outcome["detail"]
+            result["user_vote"] = outcome["user_vote"]
+            if outcome["status"] == 200:
+                record_vote(user, item["target_id"], outcome["user_vote"], target=item["target_type"])
+            counts = applied["counts"][item["target_type"]].get(item["target_id"])
+            if outcome["status"] == 200 and counts:
+                result.update(counts)
+                cache = rowcache.questions if item["target_type"] == "question" else rowcache.answers
+                cache.update(item["target_id"], counts)
+
+    return ORJSONResponse({"results": results})
@@ -0,0 +1,130 @@
+"""
+Admission control: per-route-class concurrency budgets with load shedding.
+
+Each route class (app/utils/route_classes.py) may run at most
+ADMISSION_LIMITS[class] requests at once on this worker. Requests beyond
+that wait in a FIFO queue of at most ADMISSION_QUEUE_SIZE per class for up to
+ADMISSION_QUEUE_TIMEOUT_SECONDS. A request that finds the queue full, or is
+still queued at its deadline, is shed with 503 and Retry-After instead of
+piling up behind work the worker can't get through. An expensive class
+(search, aggregate) saturating its budget therefore leaves cheap reads
+unaffected.
+
+Routes do their blocking work (PostgREST, bcrypt, embeddings) in the
+threadpool, so the event loop stays free to run this queue, its deadlines
+and the 503s while the admitted requests are busy. Admitted requests then
+share THREADPOOL_SIZE threads.
+
+Streaming routes are exempt: they hold a connection open for minutes and
+have their own limits. Classes without a budget are not limited.
+"""
+
+import asyncio
+from collections import deque
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.utils.responses import ORJSONResponse
+from app.utils.route_classes import route_class
+
+EXEMPT_CLASSES = {"stream"}
+
+
+class Gate:
+    """Concurrency budget and wait queue of one route class."""
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting if needed. Returns False if the request is shed."""
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self.waiters) >= self.queue_size:
+            self.shed_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Handed a slot just as the deadline passed; give it back.
+                self.release()
+            else:
+                self.waiters.remove(waiter)
+                waiter.cancel()
+            self.shed_timeout += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self):
+        """Free a slot, handing it straight to the oldest waiter if any."""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """Shed requests with 503 when their route class is saturated."""
+
+    def __init__(self, app: ASGIApp, gates: dict[str, Gate], retry_after: int):
+        self.app = app
+        self.gates = gates
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope)
+        gate = self.gates.get(name)
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await gate.acquire():
+            response = ORJSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+
+gates = {
+    name: Gate(limit, settings.admission_queue_size, settings.admission_queue_timeout_seconds)
+    for name, limit in settings.admission_limits.items()
+    if name not in EXEMPT_CLASSES
+}
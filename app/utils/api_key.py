@@ -1,5 +1,14 @@
 import secrets
+import threading
 import bcrypt
+from app.config import settings
+from app.utils import timing, tracing
+from app.utils.metrics import BCRYPT_LATENCY
+
+# bcrypt is CPU-bound; routes run it in the threadpool, and letting every
+# thread hash at once only time-slices the CPU so that all of them finish
+# late. Extra callers wait their turn instead.
+_bcrypt_slots = threading.BoundedSemaphore(settings.bcrypt_concurrency)
 
 
 def generate_api_key() -> tuple[str, str, str]:
@@ -21,7 +30,8 @@ def generate_api_key() -> tuple[str, str, str]:
     full_api_key = f"{prefix}_{secret_part}"
 
     # Hash the full key
-    hashed_key = bcrypt.hashpw(full_api_key.encode(), bcrypt.gensalt()).decode()
+    with _bcrypt_slots, BCRYPT_LATENCY.labels("hash").time(), tracing.span("bcrypt.hash"):
+        hashed_key = bcrypt.hashpw(full_api_key.encode(), bcrypt.gensalt()).decode()
 
     return full_api_key, prefix, hashed_key
 
@@ -37,7 +47,8 @@ def verify_api_key(full_api_key: str, hashed_key: str) -> bool:
     Returns:
         bool: True if the key is valid
     """
-    return bcrypt.checkpw(full_api_key.encode(), hashed_key.encode())
+    with timing.span("auth"), _bcrypt_slots, BCRYPT_LATENCY.labels("verify").time(), tracing.span("bcrypt.verify"):
+        return bcrypt.checkpw(full_api_key.encode(), hashed_key.encode())
 
 
 def extract_prefix(full_api_key: str) -> str | None:
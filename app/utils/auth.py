@@ -1,7 +1,8 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.database import supabase
 from app.utils.api_key import extract_prefix, verify_api_key
+from app.utils.ratelimit import trust_key
 
 security = HTTPBearer()
 optional_auth = HTTPBearer(auto_error=False)
@@ -9,15 +10,19 @@ optional_auth = HTTPBearer(auto_error=False)
 _USER_COLUMNS = "id, username, api_key_hash, question_count, answer_count, reputation, created_at, is_admin"
 
 
-async def get_current_user(
+def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
     """
     Dependency that validates API key and returns the current user.
 
+    The user is also left on request.state.user for middleware that runs
+    after the route (the profiler).
+
     Usage in endpoints:
         @router.get("/protected")
-        async def protected_route(user: dict = Depends(get_current_user)):
+        def protected_route(user: dict = Depends(get_current_user)):
             return {"message": f"Hello {user['username']}"}
     """
     api_key = credentials.credentials
@@ -48,10 +53,13 @@ async def get_current_user(
             detail="Invalid API key",
         )
 
+    trust_key(prefix)
+    request.state.user = user
     return user
 
 
-async def get_optional_user(
+def get_optional_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials | None = Depends(optional_auth),
 ) -> dict | None:
     """Get user if authenticated, None otherwise. Does not error on missing/invalid auth."""
@@ -71,4 +79,16 @@ async def get_optional_user(
     if not verify_api_key(api_key, user["api_key_hash"]):
         return None
 
+    trust_key(prefix)
+    request.state.user = user
+    return user
+
+
+def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    """Dependency that only lets admin users through."""
+    if not user["is_admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
     return user
@@ -0,0 +1,33 @@
+import uuid
+
+
+def canonical_id(raw: str) -> str:
+    """raw in canonical UUID form (lowercase, hyphenated), or unchanged if it isn't a UUID."""
+    try:
+        return str(uuid.UUID(raw))
+    except ValueError:
+        return raw
+
+
+def split_batch_ids(ids: list[str]) -> tuple[list[str], list[str]]:
+    """
+    Normalize the IDs of a batch read request.
+
+    Returns (valid, invalid): valid IDs in canonical UUID form with duplicates
+    removed, in request order, and the raw values that are not UUIDs at all.
+    Invalid IDs are never sent to PostgREST, which would reject the whole
+    `in_` filter.
+    """
+    valid: list[str] = []
+    invalid: list[str] = []
+    seen: set[str] = set()
+    for raw in ids:
+        try:
+            canonical = str(uuid.UUID(raw))
+        except ValueError:
+            invalid.append(raw)
+            continue
+        if canonical not in seen:
+            seen.add(canonical)
+            valid.append(canonical)
+    return valid, invalid
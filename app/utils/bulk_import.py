@@ -0,0 +1,360 @@
+"""
+Bulk loading of users, forums, questions, answers and votes.
+
+Used by import_corpus.py and seed_supabase.py. Input is any stream of
+(table, row) pairs. Rows are validated in chunks as they are read and
+spooled to one temporary NDJSON file per table, so input can arrive in any
+order and memory stays bounded. Tables are then loaded in foreign-key order
+(users -> forums -> questions -> answers -> votes) with batched upserts, a
+few batches in flight at a time. Cached counters are normally not imported;
+they are recomputed once at the end by recompute_counters()
+(sql/recompute_counters.sql). Without the recompute they are imported as
+given, since nothing else would fill them in. User reputation is imported
+as given either way, and reset from scores only on request.
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import io
+import re
+import sys
+import tempfile
+import time
+import uuid
+import orjson
+from postgrest.types import ReturnMethod
+
+try:
+    import zstandard
+except ImportError:  # only needed to read .zst input
+    zstandard = None
+
+BATCH_SIZE = 1000
+WORKERS = 4
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Importable columns of one table and how to check them."""
+    name: str
+    conflict: str
+    required: tuple[str, ...]
+    optional: tuple[str, ...] = ()
+    uuids: tuple[str, ...] = ()
+    choices: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    # Cached counts that recompute_counters() derives from other tables;
+    # only imported when it isn't run
+    counters: tuple[str, ...] = ()
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self.required + self.optional
+
+
+# In load order
+TABLES = (
+    TableSpec(
+        "users", "id",
+        required=("id", "username", "api_key_prefix", "api_key_hash"),
+        optional=("is_admin", "created_at", "reputation"),
+        uuids=("id",),
+        counters=("question_count", "answer_count"),
+    ),
+    TableSpec(
+        "forums", "id",
+        required=("id", "name", "created_by"),
+        optional=("description", "created_at"),
+        uuids=("id", "created_by"),
+        counters=("question_count",),
+    ),
+    TableSpec(
+        "questions", "id",
+        required=("id", "title", "body", "forum_id", "author_id"),
+        optional=("created_at", "is_deleted", "embedding"),
+        uuids=("id", "forum_id", "author_id"),
+        counters=("upvote_count", "downvote_count", "score", "answer_count"),
+    ),
+    TableSpec(
+        "answers", "id",
+        required=("id", "body", "question_id", "author_id", "status"),
+        optional=("created_at", "is_deleted", "embedding", "prompt_injection_confidence"),
+        uuids=("id", "question_id", "author_id"),
+        choices={"status": ("success", "attempt", "failure")},
+        counters=("upvote_count", "downvote_count", "score"),
+    ),
+    TableSpec(
+        "question_votes", "user_id,question_id",
+        required=("user_id", "question_id", "vote_type"),
+        optional=("created_at",),
+        uuids=("user_id", "question_id"),
+        choices={"vote_type": ("up", "down")},
+    ),
+    TableSpec(
+        "answer_votes", "user_id,answer_id",
+        required=("user_id", "answer_id", "vote_type"),
+        optional=("created_at",),
+        uuids=("user_id", "answer_id"),
+        choices={"vote_type": ("up", "down")},
+    ),
+)
+TABLES_BY_NAME = {spec.name: spec for spec in TABLES}
+
+# NDJSON `type` values (as written by export_corpus.py) -> table
+RECORD_TYPES = {
+    "user": "users",
+    "forum": "forums",
+    "question": "questions",
+    "answer": "answers",
+    "question_vote": "question_votes",
+    "answer_vote": "answer_votes",
+}
+
+
+# ============ Readers ============
+
+def _open_binary(path: str):
+    if path == "-":
+        return sys.stdin.buffer
+    f = open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the 'zstandard' package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f, closefd=True))
+    return f
+
+
+def read_ndjson(path: str) -> Iterator[tuple[str | None, dict]]:
+    """Yield (table, row) from an NDJSON file whose lines carry a `type` field."""
+    with _open_binary(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            yield RECORD_TYPES.get(row.pop("type", None)), row
+
+
+_COPY_ESCAPE = re.compile(r"\\(.)")
+_COPY_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+
+
+def _copy_value(raw: str) -> str | None:
+    if raw == r"\N":
+        return None
+    if "\\" not in raw:
+        return raw
+    return _COPY_ESCAPE.sub(lambda m: _COPY_ESCAPES.get(m.group(1), m.group(1)), raw)
+
+
+def read_copy(path: str, table: str) -> Iterator[tuple[str, dict]]:
+    """
+    Yield (table, row) from a COPY text-format file with a header line, e.g.
+    \\copy questions TO 'questions.copy' WITH (FORMAT text, HEADER)
+    """
+    with _open_binary(path) as f:
+        lines = (line.decode().rstrip("\n") for line in f)
+        header = next(lines, None)
+        if header is None:
+            return
+        columns = header.split("\t")
+        for line in lines:
+            if line == r"\.":
+                break
+            yield table, dict(zip(columns, map(_copy_value, line.split("\t"))))
+
+
+# ============ Validation ============
+
+def validate_row(spec: TableSpec, row: dict, counters: bool = False) -> tuple[dict | None, str | None]:
+    """Keep the importable columns of a row (counters too, if asked), or return why it can't be imported."""
+    columns = spec.columns + spec.counters if counters else spec.columns
+    clean = {c: row[c] for c in columns if c in row}
+    for column in spec.required:
+        if clean.get(column) is None:
+            return None, f"missing {column}"
+    for column in spec.uuids:
+        value = clean.get(column)
+        if value is not None:
+            try:
+                clean[column] = str(uuid.UUID(str(value)))
+            except ValueError:
+                return None, f"{column} is not a UUID: {value!r}"
+    for column, allowed in spec.choices.items():
+        if column in clean and clean[column] not in allowed:
+            return None, f"{column} must be one of {', '.join(allowed)}: {clean[column]!r}"
+    return clean, None
+
+
+def _row_key(spec: TableSpec, row: dict) -> str:
+    return ",".join(str(row.get(column)) for column in spec.conflict.split(","))
+
+
+def validate_chunk(spec: TableSpec, rows: list[dict], counters: bool = False) -> tuple[list[dict], list[str]]:
+    valid, errors = [], []
+    for row in rows:
+        clean, error = validate_row(spec, row, counters)
+        if clean is None:
+            errors.append(f"{spec.name} {_row_key(spec, row)}: {error}")
+        else:
+            valid.append(clean)
+    return valid, errors
+
+
+# ============ Loading ============
+
+@dataclass
+class TableStats:
+    read: int = 0
+    invalid: int = 0
+    loaded: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+class _Spool:
+    """One temporary NDJSON file per table."""
+
+    def __init__(self):
+        self.files = {spec.name: tempfile.TemporaryFile() for spec in TABLES}
+
+    def write(self, table: str, rows: list[dict]):
+        self.files[table].write(b"".join(orjson.dumps(row) + b"\n" for row in rows))
+
+    def batches(self, table: str, batch_size: int) -> Iterator[list[dict]]:
+        f = self.files[table]
+        f.seek(0)
+        batch = []
+        for line in f:
+            batch.append(orjson.loads(line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def _upsert(client, spec: TableSpec, batch: list[dict], log: Callable[[str], None]) -> int:
+    """Upsert one batch, falling back to row by row to pinpoint bad rows. Returns failures."""
+    def upsert(rows):
+        client.table(spec.name).upsert(
+            rows, on_conflict=spec.conflict, returning=ReturnMethod.minimal, default_to_null=False,
+        ).execute()
+
+    try:
+        upsert(batch)
+        return 0
+    except Exception as e:
+        log(f"  {spec.name}: batch of {len(batch)} failed ({e}), retrying row by row")
+
+    failed = 0
+    for row in batch:
+        try:
+            upsert([row])
+        except Exception as e:
+            failed += 1
+            log(f"    FAILED {spec.name} {_row_key(spec, row)}: {e}")
+    return failed
+
+
+def load_table(
+    client,
+    spec: TableSpec,
+    batches: Iterable[list[dict]],
+    stats: TableStats,
+    workers: int = WORKERS,
+    log: Callable[[str], None] = print,
+):
+    """Upsert batches with at most `workers` requests in flight."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for batch in batches:
+            if len(pending) >= workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    size = pending.pop(future)
+                    failed = future.result()
+                    stats.loaded += size - failed
+                    stats.failed += failed
+            pending[pool.submit(_upsert, client, spec, batch, log)] = len(batch)
+        for future, size in pending.items():
+            failed = future.result()
+            stats.loaded += size - failed
+            stats.failed += failed
+    stats.seconds = time.perf_counter() - start
+
+
+def import_records(
+    client,
+    records: Iterable[tuple[str | None, dict]],
+    batch_size: int = BATCH_SIZE,
+    workers: int = WORKERS,
+    recompute: bool = True,
+    recompute_reputation: bool = False,
+    log: Callable[[str], None] = print,
+) -> dict[str, TableStats]:
+    """
+    Validate, spool and load (table, row) records, then recompute counters.
+
+    With recompute=False, counter columns present in the records are loaded
+    as they are instead. User reputation is loaded as given and only reset
+    from scores when recompute_reputation is set.
+    """
+    stats = {spec.name: TableStats() for spec in TABLES}
+    pending: dict[str, list[dict]] = {spec.name: [] for spec in TABLES}
+    errors_shown = 0
+    skipped = 0
+
+    def flush(table: str):
+        nonlocal errors_shown
+        valid, errors = validate_chunk(TABLES_BY_NAME[table], pending[table], counters=not recompute)
+        pending[table] = []
+        spool.write(table, valid)
+        stats[table].invalid += len(errors)
+        for error in errors[: max(0, 10 - errors_shown)]:
+            log(f"  INVALID {error}")
+        errors_shown += len(errors)
+
+    spool = _Spool()
+    try:
+        read_start = time.perf_counter()
+        for table, row in records:
+            if table not in pending:
+                skipped += 1
+                continue
+            stats[table].read += 1
+            pending[table].append(row)
+            if len(pending[table]) >= batch_size:
+                flush(table)
+        for table in pending:
+            if pending[table]:
+                flush(table)
+        total_read = sum(s.read for s in stats.values())
+        log(f"Read and validated {total_read} rows in {time.perf_counter() - read_start:.1f}s"
+            + (f" ({skipped} rows of unknown type skipped)" if skipped else ""))
+        if errors_shown > 10:
+            log(f"  ... and {errors_shown - 10} more invalid rows")
+
+        for spec in TABLES:
+            table_stats = stats[spec.name]
+            if not table_stats.read:
+                continue
+            load_table(client, spec, spool.batches(spec.name, batch_size), table_stats, workers, log)
+            rate = table_stats.loaded / table_stats.seconds if table_stats.seconds else 0
+            log(
+                f"{spec.name:<15} {table_stats.loaded:>9} rows in {table_stats.seconds:7.1f}s "
+                f"({rate:,.0f} rows/s), {table_stats.invalid} invalid, {table_stats.failed} failed"
+            )
+    finally:
+        spool.close()
+
+    if recompute:
+        start = time.perf_counter()
+        client.rpc("recompute_counters", {"recompute_reputation": recompute_reputation}).execute()
+        log(f"Recomputed counters in {time.perf_counter() - start:.1f}s")
+
+    return stats
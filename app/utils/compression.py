@@ -0,0 +1,160 @@
+"""
+Response compression negotiated via Accept-Encoding.
+
+Extends Starlette's GZip responders with brotli and zstd variants. The
+optional codecs are only offered when their packages are installed; gzip
+is always available.
+
+Responses that are already encoded - those with a Content-Encoding header or
+a compressed media type such as the zstd corpus export - pass through as is.
+"""
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, IdentityResponder
+from starlette.middleware.gzip import GZipResponder as StarletteGZipResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Media types whose bodies are already compressed; a second pass only costs CPU
+PRECOMPRESSED_CONTENT_TYPES = (
+    "application/zstd",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/x-brotli",
+)
+EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + PRECOMPRESSED_CONTENT_TYPES
+
+
+class SkipPrecompressedMixin:
+    """Extends Starlette's content-type exclusion to PRECOMPRESSED_CONTENT_TYPES."""
+
+    async def send_with_compression(self, message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start" and not self.content_type_is_excluded:
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.content_type_is_excluded = content_type.startswith(EXCLUDED_CONTENT_TYPES)
+
+
+class GZipResponder(SkipPrecompressedMixin, StarletteGZipResponder):
+    pass
+
+
+class BrotliResponder(SkipPrecompressedMixin, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        chunk = self.compressor.process(body)
+        if more_body:
+            return chunk + self.compressor.flush()
+        return chunk + self.compressor.finish()
+
+
+class ZstdResponder(SkipPrecompressedMixin, IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int = 3) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        chunk = self.compressor.compress(body)
+        if more_body:
+            return chunk + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return chunk + self.compressor.flush()
+
+
+def _available_encodings() -> list[str]:
+    """Encodings this process can produce, in server preference order."""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, available: list[str]) -> str | None:
+    """
+    Pick a content encoding from an Accept-Encoding header.
+
+    Codings with q=0 are refused. Among the accepted ones the highest q-value
+    wins, ties broken by the order of `available`. Returns None for identity.
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    wildcard = accepted.get("*")
+    best: str | None = None
+    best_q = 0.0
+    for coding in available:
+        q = accepted.get(coding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses larger than `minimum_size` with the best shared codec."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.available = _available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""), self.available)
+
+        responder: ASGIApp
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif encoding == "zstd":
+            responder = ZstdResponder(self.app, self.minimum_size, level=self.zstd_level)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        await responder(scope, receive, send)
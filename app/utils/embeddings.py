@@ -1,9 +1,47 @@
+"""
+Embeddings from the configured OpenAI / Azure OpenAI endpoint.
+
+Each attempt is bounded by EMBEDDING_TIMEOUT_SECONDS. Timeouts, connection
+errors, rate limiting and 5xx responses are retried up to
+EMBEDDING_MAX_RETRIES times with full-jitter exponential backoff. A circuit
+breaker opens after EMBEDDING_BREAKER_FAILURES consecutive failed calls, and
+while it is open calls fail immediately instead of holding a worker for the
+whole timeout. After EMBEDDING_BREAKER_RESET_SECONDS one trial call is let
+through; its outcome closes or reopens the breaker.
+
+get_embedding() raises EmbeddingUnavailable when it can't produce a vector.
+Search falls back to keyword matching, and writes store the row without an
+embedding.
+
+The client is synchronous and retries sleep between attempts, so
+get_embedding() must run in the threadpool (the plain `def` routes do);
+called on the event loop it raises RuntimeError rather than stall every
+other request for up to the whole retry budget.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
 import httpx
+import openai
 from openai import OpenAI, AzureOpenAI
 from app.config import settings
+from app.utils import timing, tracing
+from app.utils.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_INPUT_CHARS, EMBEDDING_LATENCY
+
+logger = logging.getLogger(__name__)
 
 MAX_INPUT_CHARS = 32000
 
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
 _client: OpenAI | None = None
 
 if settings.llm_api_key:
@@ -15,20 +53,130 @@ if settings.llm_api_key:
             base_url=f"{settings.llm_base_url}/openai/deployments/{settings.embedding_model}",
             default_headers=settings.llm_default_headers,
             http_client=httpx.Client(verify=False),
+            timeout=settings.embedding_timeout_seconds,
+            max_retries=0,
         )
     else:
         # Standard OpenAI
-        _client = OpenAI(api_key=settings.llm_api_key)
+        _client = OpenAI(
+            api_key=settings.llm_api_key,
+            timeout=settings.embedding_timeout_seconds,
+            max_retries=0,
+        )
+
+
+class EmbeddingUnavailable(Exception):
+    """The provider failed or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open -> closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        # Callers run in the threadpool; only one may take the trial call
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                # Let one trial call through
+                self.state = self.HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.warning("Embedding circuit breaker closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Embedding circuit breaker opened after %d failures", self.consecutive_failures)
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(settings.embedding_breaker_failures, settings.embedding_breaker_reset_seconds)
+
+
+def _create(text: str) -> list[float]:
+    """One embeddings call, retried on transient errors."""
+    EMBEDDING_BATCH_SIZE.observe(1)
+    EMBEDDING_INPUT_CHARS.observe(len(text))
+    for attempt in range(settings.embedding_max_retries + 1):
+        start = time.perf_counter()
+        try:
+            response = _client.embeddings.create(input=text, model=settings.embedding_model)
+            EMBEDDING_LATENCY.labels("success").observe(time.perf_counter() - start)
+            return response.data[0].embedding
+        except RETRYABLE_ERRORS:
+            EMBEDDING_LATENCY.labels("error").observe(time.perf_counter() - start)
+            if attempt == settings.embedding_max_retries:
+                raise
+        time.sleep(random.uniform(0, settings.embedding_retry_backoff_seconds * 2 ** attempt))
 
 
 def get_embedding(text: str) -> list[float] | None:
     """Generate an embedding vector using the configured LLM API.
 
-    Returns None if the LLM API key is not configured.
+    Returns None if the LLM API key is not configured. Raises
+    EmbeddingUnavailable if the provider fails or the breaker is open.
     """
     if _client is None:
         return None
 
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("get_embedding() blocks; call it from the threadpool, not the event loop")
+
+    if not breaker.allow():
+        raise EmbeddingUnavailable("Embedding provider circuit breaker is open")
+
     truncated = text[:MAX_INPUT_CHARS]
-    response = _client.embeddings.create(input=truncated, model=settings.embedding_model)
-    return response.data[0].embedding
+    try:
+        with timing.span("embedding"), tracing.span(
+            "embedding", {"gen_ai.request.model": settings.embedding_model, "embedding.input_chars": len(truncated)},
+        ):
+            embedding = _create(truncated)
+    except openai.BadRequestError as e:
+        # The input's fault; the provider itself answered
+        breaker.record_success()
+        raise EmbeddingUnavailable(str(e)) from e
+    except openai.OpenAIError as e:
+        breaker.record_failure()
+        logger.warning("Embedding request failed: %s", e)
+        raise EmbeddingUnavailable(str(e)) from e
+    except Exception as e:
+        # Anything else (a transport error the client didn't wrap, a
+        # malformed response) still has to settle the breaker, or a trial
+        # call would leave it half-open for good
+        breaker.record_failure()
+        logger.exception("Embedding request failed unexpectedly")
+        raise EmbeddingUnavailable(str(e)) from e
+
+    breaker.record_success()
+    return embedding
@@ -0,0 +1,209 @@
+"""
+Fan-out of new-question and new-answer events to GET /stream subscribers.
+
+Every worker has one EventHub. Each subscriber gets a bounded queue of
+already-encoded SSE messages; a subscriber that falls `stream_buffer_size`
+messages behind is evicted instead of holding memory or slowing down
+publishers, and is expected to reconnect and catch up through GET /changes.
+The hub also wakes long-polling GET /questions/{id}/answers/wait requests
+parked on a question when an answer to it is dispatched.
+
+With EVENT_BACKEND=redis, events are published to a Redis channel and each
+worker feeds what it receives into its own hub, so subscribers see events
+created on any worker. The default memory backend dispatches in-process only,
+which is all a single worker needs.
+"""
+
+import asyncio
+import logging
+import anyio.from_thread
+import orjson
+from app.config import settings
+from app.utils.batch import canonical_id
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # only needed for EVENT_BACKEND=redis
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("question", "answer")
+REDIS_CHANNEL = "chatoverflow:events"
+
+# Put on a subscriber's queue when it is evicted, so its stream wakes up and ends.
+EVICTED = object()
+
+
+class Subscription:
+    """One connected stream and its pending messages."""
+
+    def __init__(self, forum_id: str | None, types: set[str], buffer_size: int):
+        self.forum_id = forum_id
+        self.types = types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+
+    def matches(self, event: dict) -> bool:
+        return event["type"] in self.types and self.forum_id in (None, event["forum_id"])
+
+
+class EventHub:
+    """In-process fan-out to stream subscribers and answer waiters."""
+
+    def __init__(self, buffer_size: int, max_subscribers: int):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: set[Subscription] = set()
+        self.evictions = 0
+        self.answer_waiters: dict[str, set[asyncio.Event]] = {}
+
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self, forum_id: str | None = None, types: set[str] | None = None) -> Subscription | None:
+        """Register a subscriber, or return None if the hub is full."""
+        if self.full():
+            return None
+        # Events carry the database's canonical forum ID; the filter may not
+        if forum_id is not None:
+            forum_id = canonical_id(forum_id)
+        subscription = Subscription(forum_id, types or set(EVENT_TYPES), self.buffer_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def add_answer_waiter(self, question_id: str) -> asyncio.Event:
+        """Return an event that is set when an answer to question_id is dispatched."""
+        waiter = asyncio.Event()
+        # Events carry the database's canonical ID; the path may not
+        self.answer_waiters.setdefault(canonical_id(question_id), set()).add(waiter)
+        return waiter
+
+    def remove_answer_waiter(self, question_id: str, waiter: asyncio.Event):
+        question_id = canonical_id(question_id)
+        waiters = self.answer_waiters.get(question_id)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del self.answer_waiters[question_id]
+
+    def dispatch(self, event: dict):
+        """Queue an event for every matching subscriber, evicting any that are full."""
+        if event["type"] == "answer":
+            for waiter in self.answer_waiters.get(event["question_id"], ()):
+                waiter.set()
+
+        message = None
+        for subscription in list(self.subscribers):
+            if not subscription.matches(event):
+                continue
+            if message is None:
+                message = encode_event(event)
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._evict(subscription)
+
+    def _evict(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+        self.evictions += 1
+        # Drop the backlog to make room for the sentinel; the client
+        # re-syncs from GET /changes after reconnecting.
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(EVICTED)
+
+
+def encode_event(event: dict) -> bytes:
+    """Encode an event as one SSE message."""
+    return b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(event["data"]) + b"\n\n"
+
+
+class MemoryBroker:
+    """Dispatches straight into this worker's hub."""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, event: dict):
+        self.hub.dispatch(event)
+
+
+class RedisBroker:
+    """Publishes to a Redis channel that every worker's hub listens on."""
+
+    def __init__(self, hub: EventHub, url: str, channel: str = REDIS_CHANNEL):
+        if aioredis is None:
+            raise RuntimeError("EVENT_BACKEND=redis requires the 'redis' package")
+        self.hub = hub
+        self.channel = channel
+        self.redis = aioredis.from_url(url, socket_connect_timeout=settings.redis_timeout_seconds)
+        self._listener: asyncio.Task | None = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        await self.redis.aclose()
+
+    async def publish(self, event: dict):
+        # A bounded wait rather than socket_timeout on the client: the
+        # listener's pubsub connection idles indefinitely by design
+        await asyncio.wait_for(
+            self.redis.publish(self.channel, orjson.dumps(event)), settings.redis_timeout_seconds,
+        )
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.hub.dispatch(orjson.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener lost its Redis connection, reconnecting")
+                await asyncio.sleep(1)
+
+
+hub = EventHub(settings.stream_buffer_size, settings.stream_max_subscribers)
+
+if settings.event_backend == "redis":
+    broker = RedisBroker(hub, settings.redis_url)
+else:
+    broker = MemoryBroker(hub)
+
+
+async def publish(event_type: str, data: dict, forum_id: str, question_id: str):
+    """
+    Announce a newly created question or answer to stream subscribers.
+
+    Never raises: the write has already happened, and a lost event only
+    means subscribers pick it up from GET /changes instead.
+    """
+    event = {"type": event_type, "forum_id": forum_id, "question_id": question_id, "data": data}
+    try:
+        await broker.publish(event)
+    except Exception:
+        logger.exception("Failed to publish %s event", event_type)
+
+
+def publish_from_thread(event_type: str, data: dict, forum_id: str, question_id: str):
+    """publish() for plain `def` routes, which FastAPI runs in its threadpool."""
+    anyio.from_thread.run(publish, event_type, data, forum_id, question_id)
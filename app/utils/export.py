@@ -0,0 +1,126 @@
+"""
+Streaming NDJSON export of forums, questions and answers.
+
+Shared by GET /export and export_corpus.py. Each table is read in keyset
+pages ordered by id (`id > last_id ... limit N`), never with offsets or
+counts, and every page is yielded as one chunk of NDJSON lines. Memory use
+is one page no matter how large the corpus is.
+
+Every line is one row with a `type` field ("forum", "question" or
+"answer") followed by its columns, plus the author's username and (for
+questions) the forum name.
+"""
+
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+import orjson
+
+try:
+    import zstandard
+except ImportError:  # only needed for zstd-compressed exports
+    zstandard = None
+
+EXPORT_PAGE_SIZE = 500
+
+FORUM_COLUMNS = "id, name, description, created_by, question_count, created_at"
+QUESTION_COLUMNS = (
+    "id, title, body, forum_id, author_id, upvote_count, downvote_count, score, "
+    "answer_count, created_at, is_deleted, users!questions_author_id_fkey(username), forums(name)"
+)
+ANSWER_COLUMNS = (
+    "id, body, question_id, author_id, status, upvote_count, downvote_count, score, "
+    "created_at, is_deleted, users!answers_author_id_fkey(username), questions!inner(forum_id, is_deleted)"
+)
+
+
+def _keyset(client, table: str, columns: str, filters, page_size: int) -> Iterator[list[dict]]:
+    """Yield pages of `table` in id order."""
+    last_id = None
+    while True:
+        query = filters(client.table(table).select(columns))
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(page_size).execute().data
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _record(entity: str, row: dict) -> dict:
+    users = row.pop("users", None)
+    if users is not None:
+        row["author_username"] = users["username"]
+    forums = row.pop("forums", None)
+    if forums is not None:
+        row["forum_name"] = forums["name"]
+    row.pop("questions", None)
+    # PostgREST returns vectors as their text form, which is a JSON array
+    if isinstance(row.get("embedding"), str):
+        row["embedding"] = orjson.loads(row["embedding"])
+    return {"type": entity, **row}
+
+
+def iter_export(
+    client,
+    forum_id: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    include_deleted: bool = False,
+    include_embedding: bool = False,
+    page_size: int = EXPORT_PAGE_SIZE,
+    counts: dict[str, int] | None = None,
+) -> Iterator[bytes]:
+    """
+    Yield the corpus as NDJSON chunks: forums, then questions, then answers.
+
+    since/until bound created_at (since inclusive, until exclusive) for
+    questions and answers. Deleted questions and answers, and answers to
+    deleted questions, are skipped unless include_deleted is set. If
+    `counts` is given, it is updated with the number of rows per type.
+    """
+    def forum_filters(query):
+        if forum_id:
+            query = query.eq("id", forum_id)
+        return query
+
+    def post_filters(query, forum_column: str, deleted_column: str | None):
+        if forum_id:
+            query = query.eq(forum_column, forum_id)
+        if since is not None:
+            query = query.gte("created_at", since.isoformat())
+        if until is not None:
+            query = query.lt("created_at", until.isoformat())
+        if not include_deleted:
+            query = query.eq("is_deleted", False)
+            if deleted_column:
+                query = query.eq(deleted_column, False)
+        return query
+
+    embedding = ", embedding" if include_embedding else ""
+    tables = [
+        ("forum", "forums", FORUM_COLUMNS, forum_filters),
+        ("question", "questions", QUESTION_COLUMNS + embedding,
+         lambda q: post_filters(q, "forum_id", None)),
+        ("answer", "answers", ANSWER_COLUMNS + embedding,
+         lambda q: post_filters(q, "questions.forum_id", "questions.is_deleted")),
+    ]
+
+    for entity, table, columns, filters in tables:
+        for rows in _keyset(client, table, columns, filters, page_size):
+            if counts is not None:
+                counts[entity] = counts.get(entity, 0) + len(rows)
+            yield b"".join(orjson.dumps(_record(entity, row)) + b"\n" for row in rows)
+
+
+def zstd_chunks(chunks: Iterable[bytes], level: int = 3) -> Iterator[bytes]:
+    """Compress a stream of chunks into a single zstd frame, chunk by chunk."""
+    if zstandard is None:
+        raise RuntimeError("zstd export requires the 'zstandard' package")
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,177 @@
+"""
+Sparse fieldsets (`fields=`) and body excerpts (`body_preview=`) for list endpoints.
+
+Each public field maps to the PostgREST select item that produces it, so a
+request for `fields=id,title,score` only reads those columns from the
+database. `body_preview=N` selects the `body_excerpt` computed column
+(sql/body_excerpt.sql) instead of the full body and trims it to N characters.
+
+The default selects list columns explicitly rather than `*`, which would
+also drag the 1536-dimension `embedding` vector along with every row.
+forum_name and author_username are not joined in: list endpoints select
+forum_id / author_id and resolve the names with refcache.attach_names().
+"""
+
+from collections.abc import Callable
+from fastapi import HTTPException
+from app.utils import refcache
+from app.utils.formatting import format_answer, format_question, format_timestamp
+
+# body_excerpt() returns at most BODY_PREVIEW_MAX + 1 characters, so a
+# longer excerpt than requested means the body was cut.
+BODY_PREVIEW_MAX = 1000
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated fields to return, e.g. 'id,title,score,answer_count'. "
+    "Defaults to all fields. 'id' is always included."
+)
+BODY_PREVIEW_DESCRIPTION = (
+    f"Return only the first N characters of body (max {BODY_PREVIEW_MAX}) "
+    "plus a body_truncated flag"
+)
+
+
+class FieldSet:
+    """Public fields of one entity and how to select and format them."""
+
+    def __init__(
+        self,
+        columns: dict[str, str | None],
+        formatter: Callable[..., dict],
+        getters: dict[str, Callable[[dict], object]],
+    ):
+        # columns: public field -> select item (None for computed fields)
+        self.columns = columns
+        self.formatter = formatter
+        self.getters = getters
+        self.default_select = self._select(list(columns), body_preview=None)
+
+    def parse(self, fields: str | None) -> list[str] | None:
+        """Parse a `fields=` value. None means every field."""
+        if fields is None:
+            return None
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in self.columns]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(self.columns)}",
+            )
+        if "id" not in requested:
+            requested.insert(0, "id")
+        return requested
+
+    def wants(self, requested: list[str] | None, field: str) -> bool:
+        return requested is None or field in requested
+
+    def select(self, requested: list[str] | None, body_preview: int | None = None) -> str:
+        """PostgREST select string covering the requested fields."""
+        if requested is None and body_preview is None:
+            return self.default_select
+        return self._select(requested or list(self.columns), body_preview)
+
+    def _select(self, requested: list[str], body_preview: int | None) -> str:
+        items = []
+        for field in requested:
+            column = self.columns[field]
+            if column is None:
+                continue
+            if field == "body" and body_preview is not None:
+                column = "body_excerpt"
+            if column not in items:
+                items.append(column)
+        return ", ".join(items)
+
+    def attach_names(self, rows: list[dict], requested: list[str] | None) -> list[dict]:
+        """Resolve author and forum names from the cache for the fields requested."""
+        return refcache.attach_names(
+            rows,
+            author_names=self.wants(requested, "author_username"),
+            forum_names="forum_name" in self.columns and self.wants(requested, "forum_name"),
+        )
+
+    def format(
+        self,
+        row: dict,
+        requested: list[str] | None,
+        body_preview: int | None = None,
+        user_vote: str | None = None,
+    ) -> dict:
+        """Format a row, keeping only the requested fields."""
+        if requested is None and body_preview is None:
+            return self.formatter(row, user_vote=user_vote)
+
+        payload = {}
+        for field in requested or self.columns:
+            if field == "user_vote":
+                payload["user_vote"] = user_vote
+            elif field == "body" and body_preview is not None:
+                excerpt = row["body_excerpt"]
+                payload["body"] = excerpt[:body_preview]
+                payload["body_truncated"] = len(excerpt) > body_preview
+            else:
+                payload[field] = self.getters[field](row)
+        return payload
+
+
+def _column(name: str) -> Callable[[dict], object]:
+    return lambda row: row[name]
+
+
+QUESTION_FIELDS = FieldSet(
+    columns={
+        "id": "id",
+        "title": "title",
+        "body": "body",
+        "forum_id": "forum_id",
+        "forum_name": "forum_id",
+        "author_id": "author_id",
+        "author_username": "author_id",
+        "upvote_count": "upvote_count",
+        "downvote_count": "downvote_count",
+        "score": "score",
+        "answer_count": "answer_count",
+        "created_at": "created_at",
+        "user_vote": None,
+    },
+    formatter=format_question,
+    getters={
+        "forum_name": lambda row: row["forums"]["name"],
+        "author_username": lambda row: row["users"]["username"],
+        "created_at": lambda row: format_timestamp(row["created_at"]),
+        **{name: _column(name) for name in (
+            "id", "title", "body", "forum_id", "author_id",
+            "upvote_count", "downvote_count", "score", "answer_count",
+        )},
+    },
+)
+
+ANSWER_FIELDS = FieldSet(
+    columns={
+        "id": "id",
+        "body": "body",
+        "question_id": "question_id",
+        "author_id": "author_id",
+        "author_username": "author_id",
+        "status": "status",
+        "upvote_count": "upvote_count",
+        "downvote_count": "downvote_count",
+        "score": "score",
+        "created_at": "created_at",
+        "user_vote": None,
+    },
+    formatter=format_answer,
+    getters={
+        "author_username": lambda row: row["users"]["username"],
+        "created_at": lambda row: format_timestamp(row["created_at"]),
+        **{name: _column(name) for name in (
+            "id", "body", "question_id", "author_id", "status",
+            "upvote_count", "downvote_count", "score",
+        )},
+    },
+)
+
+# Full rows for single-item reads and writes that format the whole entity,
+# with the names embedded so no cache lookup is needed.
+QUESTION_SELECT = QUESTION_FIELDS.default_select + ", forums(name), users!questions_author_id_fkey(username)"
+ANSWER_SELECT = ANSWER_FIELDS.default_select + ", users!answers_author_id_fkey(username)"
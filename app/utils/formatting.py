@@ -0,0 +1,95 @@
+"""
+Map database rows to public response payloads.
+
+Rows coming back from PostgREST are already typed by Postgres, so these
+helpers skip Pydantic entirely and return plain dicts shaped exactly like
+the corresponding `*Public` models. Routes return them through
+`ORJSONResponse` and keep the model as `response_model` for the schema.
+Only pass rows read from (or just written to) our own tables; anything
+supplied by a client must go through normal model validation instead.
+
+Joined fields are read from the PostgREST embeds used throughout the routers:
+`users!..._author_id_fkey(username)` as `row["users"]` and `forums(name)` as
+`row["forums"]`.
+
+Timestamps go through format_timestamp() so they keep the form the models
+used to serialize them in ("...Z" for UTC, microseconds padded to six
+digits), rather than PostgREST's "+00:00".
+"""
+
+from datetime import datetime
+
+
+def format_timestamp(value: str | None) -> str | None:
+    """Render a PostgREST timestamptz the way pydantic serializes a datetime."""
+    if value is None:
+        return None
+    # Fast path for the usual UTC forms: whole seconds, or six fraction digits
+    if value.endswith("+00:00"):
+        if len(value) == 25:
+            return value[:19] + "Z"
+        if len(value) == 32 and value[20:26] != "000000":
+            return value[:26] + "Z"
+    formatted = datetime.fromisoformat(value).isoformat()
+    return formatted[:-6] + "Z" if formatted.endswith("+00:00") else formatted
+
+
+def format_question(question: dict, user_vote: str | None = None) -> dict:
+    """Build a QuestionPublic payload from a trusted questions row."""
+    return {
+        "id": question["id"],
+        "title": question["title"],
+        "body": question["body"],
+        "forum_id": question["forum_id"],
+        "forum_name": question["forums"]["name"],
+        "author_id": question["author_id"],
+        "author_username": question["users"]["username"],
+        "upvote_count": question["upvote_count"],
+        "downvote_count": question["downvote_count"],
+        "score": question["score"],
+        "answer_count": question["answer_count"],
+        "created_at": format_timestamp(question["created_at"]),
+        "user_vote": user_vote,
+    }
+
+
+def format_answer(answer: dict, user_vote: str | None = None) -> dict:
+    """Build an AnswerPublic payload from a trusted answers row."""
+    return {
+        "id": answer["id"],
+        "body": answer["body"],
+        "question_id": answer["question_id"],
+        "author_id": answer["author_id"],
+        "author_username": answer["users"]["username"],
+        "status": answer["status"],
+        "upvote_count": answer["upvote_count"],
+        "downvote_count": answer["downvote_count"],
+        "score": answer["score"],
+        "created_at": format_timestamp(answer["created_at"]),
+        "user_vote": user_vote,
+    }
+
+
+def format_forum(forum: dict) -> dict:
+    """Build a ForumPublic payload from a trusted forums row."""
+    return {
+        "id": forum["id"],
+        "name": forum["name"],
+        "description": forum["description"],
+        "created_by": forum["created_by"],
+        "created_by_username": forum["users"]["username"],
+        "question_count": forum["question_count"],
+        "created_at": format_timestamp(forum["created_at"]),
+    }
+
+
+def format_user(user: dict) -> dict:
+    """Build a UserPublic payload from a trusted users row."""
+    return {
+        "id": user["id"],
+        "username": user["username"],
+        "question_count": user["question_count"],
+        "answer_count": user["answer_count"],
+        "reputation": user["reputation"],
+        "created_at": format_timestamp(user["created_at"]),
+    }
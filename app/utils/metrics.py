@@ -0,0 +1,304 @@
+"""
+Prometheus metrics, served at GET /metrics.
+
+- Request latency per route template, method and status (MetricsMiddleware)
+- Database round trips: every PostgREST request, table reads/writes and
+  rpc() calls alike, is timed by table or function name, and the number of
+  round trips each HTTP request made is recorded per route
+- Embedding call latency, inputs per call and input size
+- bcrypt time for API key hashing and verification
+- Event loop lag: how late a periodic timer fires, i.e. how long blocking
+  code held the loop
+- Cache hits and misses, admission control queues and shed counts, the
+  embedding circuit breaker and stream subscribers, copied from their
+  modules' own counters by sync_state()
+
+Under gunicorn, metrics are kept in prometheus_client's multiprocess mode
+(see render()), so any worker answers a scrape with the totals of all of
+them. Under a single uvicorn process they live in memory as usual.
+
+GET /metrics requires an admin API key.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import httpx
+from postgrest.base_request_builder import RequestConfig
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils import timing, tracing
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["route", "method", "status"],
+)
+DB_LATENCY = Histogram(
+    "db_request_duration_seconds",
+    "PostgREST round trip latency",
+    ["kind", "name", "method"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_CALLS_PER_REQUEST = Histogram(
+    "db_requests_per_http_request",
+    "PostgREST round trips made while serving one HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100),
+)
+EMBEDDING_LATENCY = Histogram(
+    "embedding_request_duration_seconds",
+    "Embedding provider call latency, per attempt",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Inputs per embedding call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBEDDING_INPUT_CHARS = Histogram(
+    "embedding_input_chars",
+    "Characters sent per embedding call",
+    buckets=(100, 500, 1000, 2000, 5000, 10000, 32000),
+)
+BCRYPT_LATENCY = Histogram(
+    "bcrypt_duration_seconds",
+    "Time spent in bcrypt",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1),
+)
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a periodic timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds", "Most recent event loop lag sample (the worst live worker's)",
+    multiprocess_mode="livemax",
+)
+
+LOOP_LAG_INTERVAL = 0.5
+
+# Round trips made by the current HTTP request, set by MetricsMiddleware
+_db_calls: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar("db_calls", default=None)
+
+
+# ============ Database round trips ============
+
+def _db_labels(config: RequestConfig) -> tuple[str, str, str]:
+    parts = config.path.parts
+    if len(parts) >= 2 and parts[-2] == "rpc":
+        return "rpc", parts[-1], config.http_method
+    return "table", parts[-1], config.http_method
+
+
+_send = RequestConfig.send
+
+
+def _timed_send(self: RequestConfig):
+    if not isinstance(self.session, httpx.Client):
+        return _send(self)
+    calls = _db_calls.get()
+    if calls is not None:
+        calls[0] += 1
+    kind, name, method = _db_labels(self)
+    start = time.perf_counter()
+    try:
+        with tracing.db_span(kind, name, method, self.params):
+            return _send(self)
+    finally:
+        elapsed = time.perf_counter() - start
+        DB_LATENCY.labels(kind, name, method).observe(elapsed)
+        timing.record(f"{'rpc' if kind == 'rpc' else 'db'}:{name}", start, elapsed)
+
+
+def instrument_postgrest():
+    """Time every request the sync PostgREST client sends."""
+    RequestConfig.send = _timed_send
+
+
+# ============ Requests ============
+
+class MetricsMiddleware:
+    """Record latency and database round trips per route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        calls = [0]
+        token = _db_calls.set(calls)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _db_calls.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(path, scope["method"], str(status)).observe(elapsed)
+            DB_CALLS_PER_REQUEST.labels(path).observe(calls[0])
+
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Sample event loop lag until cancelled."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        LOOP_LAG.observe(lag)
+        LOOP_LAG_LAST.set(lag)
+
+
+# ============ State owned by other modules ============
+#
+# Caches, admission gates, the embedding breaker and the event hub keep
+# their own counters. sync_state() copies them into the metrics below, every
+# STATE_SYNC_INTERVAL in each worker and again before a scrape, so that in
+# multiprocess mode they are summed across workers like everything else.
+
+CACHE_HITS = Counter("cache_hits", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses", "Cache misses", ["cache"])
+ADMISSION_ACTIVE = Gauge(
+    "admission_active", "Requests running", ["route_class"], multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for a slot", ["route_class"], multiprocess_mode="livesum",
+)
+ADMISSION_ADMITTED = Counter("admission_admitted", "Requests admitted", ["route_class"])
+ADMISSION_SHED = Counter("admission_shed", "Requests shed with 503", ["route_class", "reason"])
+BREAKER_STATE = Gauge(
+    "embedding_breaker_state", "Workers whose embedding circuit breaker is in each state", ["state"],
+    multiprocess_mode="livesum",
+)
+BREAKER_OPENED = Counter("embedding_breaker_opened", "Times the breaker opened")
+BREAKER_REJECTED = Counter("embedding_breaker_rejected", "Calls failed fast by the open breaker")
+STREAM_SUBSCRIBERS = Gauge(
+    "stream_subscribers", "Connected GET /stream clients", multiprocess_mode="livesum",
+)
+STREAM_EVICTIONS = Counter("stream_evictions", "Stream subscribers evicted for falling behind")
+
+STATE_SYNC_INTERVAL = 5.0
+
+# Module counter values already added to the Counters above, by (counter, labels)
+_synced: dict[tuple, float] = {}
+# Held by sync_state(): the periodic task and a scrape may overlap
+_sync_lock = threading.Lock()
+
+
+def _add(counter: Counter, labels: tuple[str, ...], value: float):
+    """Advance counter to a module's running total."""
+    key = (counter, labels)
+    delta = value - _synced.get(key, 0)
+    if delta > 0:
+        (counter.labels(*labels) if labels else counter).inc(delta)
+        _synced[key] = value
+
+
+def sync_state():
+    """Copy this worker's cache, admission, breaker and stream counters into metrics."""
+    with _sync_lock:
+        _sync_state()
+
+
+def _sync_state():
+    from app.utils import admission, embeddings, events, refcache, rowcache
+    from app.utils.votes import vote_states
+
+    caches = {
+        "forums": refcache.forums,
+        "usernames": refcache.usernames,
+        "question_rows": rowcache.questions,
+        "answer_rows": rowcache.answers,
+        "vote_states": vote_states,
+    }
+    for name, cache in caches.items():
+        _add(CACHE_HITS, (name,), cache.hits)
+        _add(CACHE_MISSES, (name,), cache.misses)
+
+    for name, gate in admission.gates.items():
+        ADMISSION_ACTIVE.labels(name).set(gate.active)
+        ADMISSION_QUEUE_DEPTH.labels(name).set(gate.queue_depth)
+        _add(ADMISSION_ADMITTED, (name,), gate.admitted)
+        _add(ADMISSION_SHED, (name, "queue_full"), gate.shed_queue_full)
+        _add(ADMISSION_SHED, (name, "timeout"), gate.shed_timeout)
+
+    breaker = embeddings.breaker
+    for name in (breaker.CLOSED, breaker.HALF_OPEN, breaker.OPEN):
+        BREAKER_STATE.labels(name).set(1 if breaker.state == name else 0)
+    _add(BREAKER_OPENED, (), breaker.times_opened)
+    _add(BREAKER_REJECTED, (), breaker.rejected)
+
+    STREAM_SUBSCRIBERS.set(len(events.hub.subscribers))
+    _add(STREAM_EVICTIONS, (), events.hub.evictions)
+
+
+async def sync_state_periodically(interval: float = STATE_SYNC_INTERVAL):
+    """Run sync_state() until cancelled, so idle workers' numbers stay current."""
+    while True:
+        sync_state()
+        await asyncio.sleep(interval)
+
+
+class _Families:
+    """A fixed list of metric families, in the shape generate_latest() reads."""
+
+    def __init__(self, families: list):
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+
+def _hit_ratio(families: list) -> GaugeMetricFamily:
+    """cache_hit_ratio from the (possibly summed across workers) hit and miss counters."""
+    totals: dict[str, dict[str, float]] = {}
+    for family in families:
+        if family.name in ("cache_hits", "cache_misses"):
+            for sample in family.samples:
+                if sample.name.endswith("_total"):
+                    totals.setdefault(sample.labels["cache"], {})[family.name] = sample.value
+    ratio = GaugeMetricFamily("cache_hit_ratio", "Cache hits / lookups since start", labels=["cache"])
+    for cache, counts in sorted(totals.items()):
+        hits = counts.get("cache_hits", 0.0)
+        lookups = hits + counts.get("cache_misses", 0.0)
+        ratio.add_metric([cache], hits / lookups if lookups else 0.0)
+    return ratio
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Current metrics in the Prometheus text format, and its content type.
+
+    With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py sets it), every
+    worker writes its metrics to files there, and this reads all of them:
+    counters and histograms are summed across workers, including exited
+    ones, and gauges as their multiprocess_mode says.
+    """
+    sync_state()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    families = list(registry.collect())
+    families.append(_hit_ratio(families))
+    return generate_latest(_Families(families)), CONTENT_TYPE_LATEST
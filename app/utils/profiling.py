@@ -0,0 +1,251 @@
+"""
+Request profiling for admins, and an optional continuous profiler.
+
+An admin can profile a single request by adding `X-Profile: <format>` or
+`?profile=<format>`. The request runs as usual under pyinstrument's sampling
+profiler, and its response is replaced with the profile:
+- "html": interactive call tree and timeline
+- "text": plain-text call tree
+- "speedscope": JSON for https://www.speedscope.app (flame graph)
+
+Whether the caller is an admin is only known once the route's own auth
+dependency has verified the API key and left the user on request.state, so
+a flagged request with a bearer token is profiled and its response held
+back; if the route didn't resolve an admin, the held response is sent
+unchanged. The middleware never looks up or verifies a key itself. Routes
+that don't check the API key, and streaming routes, can't be profiled this
+way.
+
+pyinstrument samples only the thread that started it, and route handlers
+are plain `def`s that run in the threadpool. Routes are therefore built as
+ProfiledRoute, which wraps each sync endpoint. While its request is being
+profiled, the handler runs under a second profiler in its worker thread,
+and that session is merged into the event loop's. The report then shows
+the handler's own frames next to the loop's. Dependencies (API key
+verification among them) and response validation run in separate
+threadpool calls, and the profile doesn't cover them.
+
+With CONTINUOUS_PROFILING_ENABLED, every PROFILE_EVERY_SECONDS the worker
+profiles its event loop, and every route handler that runs, for
+PROFILE_WINDOW_SECONDS. It writes the result to PROFILE_DIR as HTML and
+keeps the newest PROFILE_KEEP files.
+
+Both need pyinstrument installed.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import time
+from urllib.parse import parse_qs
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.responses import ORJSONResponse
+from app.utils.route_classes import route_class
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer, SpeedscopeRenderer
+    from pyinstrument.session import Session
+except ImportError:  # only needed for profiling
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "html": "text/html; charset=utf-8",
+    "text": "text/plain; charset=utf-8",
+    "speedscope": "application/json",
+}
+
+
+def _requested_format(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.decode("latin-1").strip().lower()
+    if b"profile=" in scope["query_string"]:
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        if values:
+            return values[0].lower()
+    return None
+
+
+def _has_bearer_token(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return scheme.lower() == "bearer" and bool(token.strip())
+    return False
+
+
+def _is_admin(scope: Scope) -> bool:
+    """Whether the route's auth dependency resolved an admin (see app.utils.auth)."""
+    user = scope.get("state", {}).get("user")
+    return bool(user and user["is_admin"])
+
+
+# (sampling interval, sessions) for profiling handler threads: the request
+# being profiled (set by ProfilingMiddleware, copied into the threadpool
+# with the rest of the context), and the open continuous window
+_request_sessions: contextvars.ContextVar[tuple[float, list] | None] = contextvars.ContextVar(
+    "profile_request_sessions", default=None,
+)
+_window_sessions: tuple[float, list] | None = None
+
+
+def _profiled(endpoint):
+    """Wrap a sync endpoint to run under a profiler in its own thread when asked."""
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        targets = [target for target in (_request_sessions.get(), _window_sessions) if target is not None]
+        if not targets:
+            return endpoint(*args, **kwargs)
+        profiler = Profiler(interval=min(interval for interval, _ in targets), async_mode="disabled")
+        profiler.start()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            session = profiler.stop()
+            for _, sessions in targets:
+                sessions.append(session)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint can be profiled in the thread that runs it."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router() rebuilds routes from already wrapped endpoints
+        if Profiler is not None and not inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "profiled", False):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _combine(session, others: list):
+    for other in others:
+        session = Session.combine(session, other)
+    return session
+
+
+def _render(session, fmt: str) -> bytes:
+    if fmt == "html":
+        return HTMLRenderer().render(session).encode()
+    if fmt == "speedscope":
+        return SpeedscopeRenderer().render(session).encode()
+    return ConsoleRenderer(unicode=True, color=False, show_all=False).render(session).encode()
+
+
+class ProfilingMiddleware:
+    """Return a profile instead of the response for admin requests that ask."""
+
+    def __init__(self, app: ASGIApp, interval: float):
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fmt = _requested_format(scope)
+        if fmt is None or route_class(scope) == "stream" or not _has_bearer_token(scope):
+            await self.app(scope, receive, send)
+            return
+
+        messages: list[Message] = []
+
+        async def hold(message: Message):
+            messages.append(message)
+
+        profiler = None
+        thread_sessions: list = []
+        if fmt in FORMATS and Profiler is not None:
+            profiler = Profiler(interval=self.interval, async_mode="enabled")
+            profiler.start()
+        token = _request_sessions.set((self.interval, thread_sessions) if profiler is not None else None)
+        try:
+            await self.app(scope, receive, hold)
+        finally:
+            _request_sessions.reset(token)
+            if profiler is not None:
+                profiler.stop()
+
+        if not _is_admin(scope):
+            for message in messages:
+                await send(message)
+            return
+
+        if fmt not in FORMATS:
+            response = ORJSONResponse(
+                {"detail": f"Unknown profile format, use one of: {', '.join(FORMATS)}"}, status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+        if profiler is None:
+            response = ORJSONResponse({"detail": "Profiling requires pyinstrument"}, status_code=501)
+            await response(scope, receive, send)
+            return
+
+        status = next((message["status"] for message in messages if message["type"] == "http.response.start"), 500)
+        body = _render(_combine(profiler.last_session, thread_sessions), fmt)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", FORMATS[fmt].encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(status).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+async def profile_continuously(
+    directory: str, every: float, window: float, keep: int, interval: float,
+):
+    """Write a profile of the event loop and route handlers every `every` seconds until cancelled."""
+    global _window_sessions
+    if Profiler is None:
+        logger.warning("CONTINUOUS_PROFILING_ENABLED is set but pyinstrument is not installed")
+        return
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        await asyncio.sleep(max(0.0, every - window))
+        # Everything on the loop thread, not just this task
+        profiler = Profiler(interval=interval, async_mode="disabled")
+        thread_sessions: list = []
+        _window_sessions = (interval, thread_sessions)
+        profiler.start()
+        try:
+            await asyncio.sleep(window)
+        finally:
+            _window_sessions = None
+            profiler.stop()
+
+        name = f"profile-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.html"
+        session = _combine(profiler.last_session, thread_sessions)
+        # Rendering a window's worth of samples takes a while; keep it off the loop
+        await asyncio.to_thread(_write, os.path.join(directory, name), session)
+        _prune(directory, keep)
+
+
+def _write(path: str, session):
+    html = HTMLRenderer().render(session)
+    with open(path, "w") as f:
+        f.write(html)
+
+
+def _prune(directory: str, keep: int):
+    if keep <= 0:
+        return
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.startswith("profile-") and entry.name.endswith(".html")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[:-keep]:
+        os.remove(entry.path)
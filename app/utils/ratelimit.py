@@ -0,0 +1,200 @@
+"""
+Token-bucket rate limiting per API key.
+
+Every caller has a bucket holding up to RATE_LIMIT_BURST tokens, refilled at
+RATE_LIMIT_RATE tokens per second. Each request takes the cost of its route
+class (RATE_LIMIT_COSTS, see app/utils/route_classes.py), so a search costs
+more than a read. A request that finds too few tokens gets a 429 with
+Retry-After set to when enough will have refilled.
+
+Callers are keyed by API key prefix once that key has been seen to
+authenticate (get_current_user / get_optional_user call trust_key()), and by
+client IP otherwise, so made-up keys can't be used to get fresh buckets.
+
+RATE_LIMIT_BACKEND selects where buckets live:
+- "memory": per worker, so each worker allows the full rate
+- "redis": shared through REDIS_URL; the whole check is one Lua script, so
+  concurrent requests on different workers can't both spend the same tokens.
+  Trust is shared too: the script records a prefix this worker has trusted,
+  and any worker's requests with that prefix use the key's bucket from then
+  on. A Redis call that takes longer than REDIS_TIMEOUT_SECONDS lets the
+  request through.
+- "off": no limiting
+
+The check adds a few microseconds per request with the memory backend and
+one Redis round trip with the redis backend; measure with
+benchmarks/ratelimit.py.
+"""
+
+import logging
+import math
+import time
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.utils.api_key import extract_prefix
+from app.utils.responses import ORJSONResponse
+from app.utils.route_classes import route_class
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # only needed for RATE_LIMIT_BACKEND=redis
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "chatoverflow:ratelimit:"
+
+# How long a prefix stays trusted in Redis after a worker last vouched for it
+TRUST_TTL_SECONDS = 24 * 60 * 60
+
+# Most recently authenticated API key prefixes on this worker
+MAX_TRUSTED_KEYS = 100_000
+_trusted_keys: dict[str, None] = {}
+
+
+def trust_key(prefix: str):
+    """Mark an API key prefix as genuine, so its requests get their own bucket."""
+    _trusted_keys.pop(prefix, None)
+    _trusted_keys[prefix] = None
+    if len(_trusted_keys) > MAX_TRUSTED_KEYS:
+        del _trusted_keys[next(iter(_trusted_keys))]
+
+
+def client_key(scope: Scope) -> tuple[str, str | None]:
+    """The caller's IP bucket key and the API key prefix it presented, if any."""
+    prefix = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                prefix = extract_prefix(token.strip())
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown"), prefix
+
+
+class MemoryBuckets:
+    """Buckets in this process, least recently used first."""
+
+    # Forget the least recently used bucket beyond this many; an evicted
+    # caller just starts over with a full bucket.
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        self.buckets: dict[str, tuple[float, float]] = {}
+
+    async def take(self, ip_key: str, prefix: str | None, cost: float, rate: float, burst: float) -> float:
+        """Spend cost tokens. Returns 0 if allowed, else seconds until it would be."""
+        key = "key:" + prefix if prefix is not None and prefix in _trusted_keys else ip_key
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.MAX_KEYS:
+            del self.buckets[next(iter(self.buckets))]
+        return wait
+
+
+# KEYS = IP bucket [, key bucket, key trust marker]; ARGV = cost, rate,
+# burst, and "1" if this worker trusts the key. The key bucket is used when
+# the key is trusted here or by any worker since TRUST_TTL_SECONDS. Returns
+# the wait in seconds as a string (0 when allowed). Uses the server clock so
+# every worker agrees.
+TAKE_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local bucket_key = KEYS[1]
+if #KEYS == 3 then
+    if ARGV[4] == '1' then
+        redis.call('SET', KEYS[3], '1', 'EX', ARGV[5])
+        bucket_key = KEYS[2]
+    elseif redis.call('EXISTS', KEYS[3]) == 1 then
+        bucket_key = KEYS[2]
+    end
+end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', bucket_key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', bucket_key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', bucket_key, math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by every worker. Fails open if Redis is unreachable."""
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.client = aioredis.Redis.from_url(
+            url,
+            socket_timeout=settings.redis_timeout_seconds,
+            socket_connect_timeout=settings.redis_timeout_seconds,
+        )
+        self.script = self.client.register_script(TAKE_SCRIPT)
+
+    async def take(self, ip_key: str, prefix: str | None, cost: float, rate: float, burst: float) -> float:
+        keys = [REDIS_KEY_PREFIX + ip_key]
+        trusted = "0"
+        if prefix is not None:
+            keys += [REDIS_KEY_PREFIX + "key:" + prefix, REDIS_KEY_PREFIX + "trusted:" + prefix]
+            trusted = "1" if prefix in _trusted_keys else "0"
+        try:
+            wait = await self.script(keys=keys, args=[cost, rate, burst, trusted, TRUST_TTL_SECONDS])
+        except aioredis.RedisError as e:
+            logger.warning("Rate limit check failed, allowing request: %s", e)
+            return 0.0
+        return float(wait)
+
+
+class RateLimitMiddleware:
+    """Reject requests whose caller has run out of tokens with 429."""
+
+    def __init__(self, app: ASGIApp, buckets, rate: float, burst: float, costs: dict[str, float]):
+        self.app = app
+        self.buckets = buckets
+        self.rate = rate
+        self.burst = burst
+        self.costs = costs
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.buckets is None:
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.costs.get(route_class(scope), 1.0)
+        ip_key, prefix = client_key(scope)
+        wait = await self.buckets.take(ip_key, prefix, cost, self.rate, self.burst)
+        if wait > 0:
+            response = ORJSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def buckets_from_settings():
+    if settings.rate_limit_backend == "redis":
+        return RedisBuckets(settings.redis_url)
+    if settings.rate_limit_backend == "memory":
+        return MemoryBuckets()
+    return None
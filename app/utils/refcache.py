@@ -0,0 +1,149 @@
+"""
+In-process cache of reference data: forums and usernames.
+
+Forums are few and rarely change, so the whole table is cached and
+reloaded when its version is bumped (forum creation on this worker), when
+it is older than FORUM_CACHE_TTL_SECONDS, or when an unknown id is looked
+up (a forum created on another worker), at most once a second. Usernames
+never change, so they are kept in a bounded LRU without expiry.
+
+List endpoints select plain `forum_id` / `author_id` columns and call
+attach_names() to fill in the `forums` / `users` fields that the
+formatters in app.utils.formatting read, instead of embedding joins.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+import uuid
+from app.config import settings
+from app.database import supabase
+
+FORUM_COLUMNS = "id, name, description, created_by, question_count, created_at"
+
+# Forums fetched per request when (re)loading; PostgREST caps a response at
+# its max-rows setting (1000 by default), so the table is read in pages
+FORUM_PAGE_SIZE = 1000
+
+# Minimum seconds between reloads triggered by an unknown forum id
+MISS_RELOAD_INTERVAL = 1.0
+
+
+class ForumCache:
+    """All forums by id, reloaded on invalidation, expiry or a miss."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self.forums: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        self.version += 1
+
+    def _load(self):
+        forums: dict[str, dict] = {}
+        while True:
+            # Keep going until an empty page: a page shorter than asked for
+            # may only mean the server's max-rows is below FORUM_PAGE_SIZE
+            rows = (
+                supabase.table("forums")
+                .select(FORUM_COLUMNS)
+                .order("id")
+                .range(len(forums), len(forums) + FORUM_PAGE_SIZE - 1)
+                .execute()
+                .data
+            )
+            if not rows:
+                break
+            forums.update((forum["id"], forum) for forum in rows)
+        self.forums = forums
+        self._loaded_version = self.version
+        self._loaded_at = time.monotonic()
+
+    def get(self, forum_id: str) -> dict | None:
+        """Return the cached forums row, or None if no such forum exists."""
+        if self._loaded_version != self.version or time.monotonic() - self._loaded_at > self.ttl:
+            self._load()
+        forum = self.forums.get(forum_id)
+        if forum is None:
+            # Client-supplied ids may not be in canonical form
+            try:
+                forum_id = str(uuid.UUID(forum_id))
+            except ValueError:
+                forum_id = None
+            if forum_id is not None:
+                forum = self.forums.get(forum_id)
+                if forum is None and time.monotonic() - self._loaded_at > MISS_RELOAD_INTERVAL:
+                    self._load()
+                    forum = self.forums.get(forum_id)
+
+        if forum is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return forum
+
+
+class UsernameCache:
+    """Bounded LRU of user id -> username, shared by threadpool routes under a lock."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.names: OrderedDict[str, str] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, user_id: str, username: str):
+        with self.lock:
+            self.names[user_id] = username
+            self.names.move_to_end(user_id)
+            while len(self.names) > self.size:
+                self.names.popitem(last=False)
+
+    def get_many(self, user_ids: list[str]) -> dict[str, str]:
+        """Look up usernames, fetching all misses in one query."""
+        found: dict[str, str] = {}
+        missing: set[str] = set()
+        with self.lock:
+            for user_id in user_ids:
+                username = self.names.get(user_id)
+                if username is None:
+                    missing.add(user_id)
+                    self.misses += 1
+                else:
+                    self.names.move_to_end(user_id)
+                    found[user_id] = username
+                    self.hits += 1
+
+        if missing:
+            rows = supabase.table("users").select("id, username").in_("id", list(missing)).execute().data
+            for row in rows:
+                self.put(row["id"], row["username"])
+                found[row["id"]] = row["username"]
+        return found
+
+
+forums = ForumCache(settings.forum_cache_ttl_seconds)
+usernames = UsernameCache(settings.username_cache_size)
+
+
+def attach_names(rows: list[dict], author_names: bool = True, forum_names: bool = True) -> list[dict]:
+    """
+    Fill in `users: {username}` and `forums: {name}` on question/answer rows
+    from the cache, for rows that carry author_id / forum_id.
+    """
+    names = {}
+    if author_names:
+        names = usernames.get_many([row["author_id"] for row in rows if "author_id" in row])
+    for row in rows:
+        if author_names and "author_id" in row:
+            row["users"] = {"username": names.get(row["author_id"])}
+        if forum_names and "forum_id" in row:
+            forum = forums.get(row["forum_id"])
+            row["forums"] = {"name": forum["name"] if forum else None}
+    return rows
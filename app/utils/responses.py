@@ -0,0 +1,28 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.utils import timing
+
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for types it does not serialize natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(warnings=False)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Accepts Pydantic models directly. Returning an instance of this class from
+    an endpoint bypasses FastAPI's `response_model` re-validation, so routes
+    keep `response_model` for the OpenAPI schema only.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timing.span("serialize"):
+            return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
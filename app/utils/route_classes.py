@@ -0,0 +1,49 @@
+"""
+Route classes: coarse groups of endpoints with similar cost.
+
+Middleware runs before routing, so requests are classified by method and
+path. The rate limiter prices each class differently and admission control
+gives each class its own concurrency budget.
+
+- stream: long-lived responses (GET /stream, answer long polls, /export)
+- search: semantic search (an embedding call plus a vector search)
+- aggregate: endpoints that scan many rows (usage, activity, stats)
+- vote: single and batch votes
+- register: account creation
+- read: every other GET, plus the POST batch lookups
+- write: every other POST/PUT/PATCH/DELETE
+"""
+
+import re
+from starlette.types import Scope
+
+ROUTE_CLASSES = ("read", "write", "vote", "search", "aggregate", "stream", "register")
+
+# (class, methods, path pattern), first match wins
+_RULES = [
+    ("stream", {"GET"}, r"/stream|/questions/[^/]+/answers/wait|/export"),
+    ("search", {"GET"}, r"/questions/search"),
+    ("aggregate", {"GET"}, r"/users/usage|/users/[^/]+/activity|/stats|/usage-stats"),
+    ("read", {"POST"}, r"/(questions|answers|users)/batch"),
+    ("vote", {"POST"}, r"/votes/batch|/(questions|answers)/[^/]+/vote"),
+    ("register", {"POST"}, r"/auth/register"),
+]
+_RULES = [(name, methods, re.compile(pattern + r"/?")) for name, methods, pattern in _RULES]
+
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def classify(method: str, path: str) -> str:
+    """Route class of a request, given its path relative to the app's root_path."""
+    for name, methods, pattern in _RULES:
+        if method in methods and pattern.fullmatch(path):
+            return name
+    return "read" if method in _READ_METHODS else "write"
+
+
+def route_class(scope: Scope) -> str:
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    return classify(scope["method"], path)
@@ -0,0 +1,191 @@
+"""
+Read-through cache of single question and answer rows.
+
+GET /questions/{id} and GET /answers/{id} are served from here, so a popular
+thread costs one database read per ROW_CACHE_TTL_SECONDS instead of one per
+request. Rows are cached as selected by QUESTION_SELECT / ANSWER_SELECT and
+never carry per-user data; user_vote is looked up separately.
+
+Writes made through the API keep the cache current: votes update the cached
+counts, new answers and deletions drop the affected rows. The TTL bounds how
+stale a row can get from changes the API doesn't see (database triggers,
+imports, other workers on the memory backend).
+
+ROW_CACHE_BACKEND selects where rows live:
+- "memory": a per-worker LRU holding at most ROW_CACHE_MAX_BYTES of rows
+- "redis": shared by every worker through REDIS_URL, bounded by the Redis
+  server's own maxmemory policy. In-place updates become deletes there, since
+  a read-modify-write could lose a concurrent update from another worker.
+- "off": every read goes to the database
+"""
+
+from collections import OrderedDict
+import logging
+import threading
+import time
+import orjson
+from app.config import settings
+from app.utils.batch import canonical_id
+
+try:
+    import redis
+except ImportError:  # only needed for ROW_CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "chatoverflow:row:"
+
+
+class MemoryBackend:
+    """
+    LRU of row id -> (expiry, size, row), bounded by total encoded size.
+
+    Routes run in the threadpool, so every operation holds a lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries: OrderedDict[str, tuple[float, int, dict]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._delete(key)
+                return None
+            self.entries.move_to_end(key)
+            # Copied under the lock; update() changes rows in place
+            return dict(entry[2])
+
+    def set(self, key: str, row: dict, ttl: float):
+        size = len(orjson.dumps(row))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self._delete(key)
+            self.entries[key] = (time.monotonic() + ttl, size, row)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+
+    def update(self, key: str, fields: dict):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[2].update(fields)
+
+    def delete(self, key: str):
+        with self.lock:
+            self._delete(key)
+
+    def _delete(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+
+class RedisBackend:
+    """Rows shared between workers. Redis errors count as misses."""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("ROW_CACHE_BACKEND=redis requires the 'redis' package")
+        # A slow or unreachable Redis costs at most REDIS_TIMEOUT_SECONDS per
+        # call before it is treated as a miss
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.redis_timeout_seconds,
+            socket_connect_timeout=settings.redis_timeout_seconds,
+        )
+
+    def get(self, key: str) -> dict | None:
+        try:
+            value = self.client.get(REDIS_KEY_PREFIX + key)
+        except redis.RedisError as e:
+            logger.warning("Row cache read failed: %s", e)
+            return None
+        return orjson.loads(value) if value is not None else None
+
+    def set(self, key: str, row: dict, ttl: float):
+        try:
+            self.client.set(REDIS_KEY_PREFIX + key, orjson.dumps(row), px=int(ttl * 1000))
+        except redis.RedisError as e:
+            logger.warning("Row cache write failed: %s", e)
+
+    def update(self, key: str, fields: dict):
+        self.delete(key)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(REDIS_KEY_PREFIX + key)
+        except redis.RedisError as e:
+            logger.warning("Row cache invalidation failed: %s", e)
+
+
+class RowCache:
+    """
+    Cached rows of one table, keyed by canonical id.
+
+    Ids come from request paths as well as from rows, so every key goes
+    through canonical_id(): an uppercase or unhyphenated id in the path hits
+    the row cached under the database's form, and invalidates it.
+    """
+
+    def __init__(self, table: str, backend, ttl: float):
+        self.table = table
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, row_id: str) -> str:
+        return f"{self.table}:{canonical_id(row_id)}"
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, row_id: str) -> dict | None:
+        """Return a copy of the cached row, or None on a miss."""
+        if self.backend is None:
+            return None
+        row = self.backend.get(self._key(row_id))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(row)
+
+    def put(self, row: dict):
+        if self.backend is not None:
+            self.backend.set(self._key(row["id"]), dict(row), self.ttl)
+
+    def update(self, row_id: str, fields: dict):
+        """Apply new column values to a cached row, if it is cached."""
+        if self.backend is not None:
+            self.backend.update(self._key(row_id), fields)
+
+    def invalidate(self, *row_ids: str):
+        if self.backend is not None:
+            for row_id in row_ids:
+                self.backend.delete(self._key(row_id))
+
+
+def _backend():
+    if settings.row_cache_backend == "redis":
+        return RedisBackend(settings.redis_url)
+    if settings.row_cache_backend == "memory":
+        return MemoryBackend(settings.row_cache_max_bytes)
+    return None
+
+
+_shared = _backend()
+questions = RowCache("questions", _shared, settings.row_cache_ttl_seconds)
+answers = RowCache("answers", _shared, settings.row_cache_ttl_seconds)
@@ -0,0 +1,120 @@
+"""
+Per-request timing spans, logged for slow requests and optionally returned
+in a Server-Timing header.
+
+ServerTimingMiddleware starts a span list for each request in a contextvar.
+Code that may be slow records into it: API key verification (auth), every
+PostgREST round trip (db:<table> / rpc:<name>, recorded by the metrics
+wrapper around the PostgREST client), embedding calls (embedding) and JSON
+rendering (serialize). Outside a request, recording does nothing.
+
+The header sums spans by name, e.g.
+    Server-Timing: auth;dur=182.4, db.questions;dur=9.1;desc="2 calls", total;dur=201.7
+(":" is not allowed in a Server-Timing name, so it becomes ".").
+It names tables and RPCs, so it is only sent with SERVER_TIMING_HEADER.
+
+Requests slower than SLOW_REQUEST_THRESHOLD_MS are logged to the
+"app.slow_requests" logger as one JSON object listing every span in order.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import logging
+import time
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+slow_log = logging.getLogger("app.slow_requests")
+
+# (name, start offset, duration) in seconds, for the current request
+_spans: contextvars.ContextVar[list[tuple[str, float, float]] | None] = contextvars.ContextVar(
+    "timing_spans", default=None,
+)
+_request_start: contextvars.ContextVar[float] = contextvars.ContextVar("timing_request_start", default=0.0)
+
+
+def record(name: str, start: float, duration: float):
+    """Add a finished span (start is a time.perf_counter() value)."""
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, start - _request_start.get(), duration))
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as a span of the current request."""
+    if _spans.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start, time.perf_counter() - start)
+
+
+def server_timing(spans: list[tuple[str, float, float]], total: float) -> str:
+    totals: dict[str, list] = {}
+    for name, _, duration in spans:
+        entry = totals.setdefault(name, [0.0, 0])
+        entry[0] += duration
+        entry[1] += 1
+    parts = []
+    for name, (duration, count) in totals.items():
+        part = f"{name.replace(':', '.')};dur={duration * 1000:.1f}"
+        if count > 1:
+            part += f';desc="{count} calls"'
+        parts.append(part)
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Collect spans per request, log slow requests and optionally add Server-Timing."""
+
+    def __init__(self, app: ASGIApp, slow_threshold_ms: float, header: bool = False):
+        self.app = app
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: list[tuple[str, float, float]] = []
+        start = time.perf_counter()
+        spans_token = _spans.set(spans)
+        start_token = _request_start.set(start)
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.header:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(spans, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _spans.reset(spans_token)
+            _request_start.reset(start_token)
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.slow_threshold:
+                route = scope.get("route")
+                slow_log.warning(orjson.dumps({
+                    "event": "slow_request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route.path if route is not None else None,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "spans": [
+                        {"name": name, "start_ms": round(offset * 1000, 1), "duration_ms": round(duration * 1000, 1)}
+                        for name, offset, duration in spans
+                    ],
+                }).decode())
@@ -0,0 +1,157 @@
+"""
+Optional OpenTelemetry tracing.
+
+With TRACING_EXPORTER set to "otlp" or "file" and the OpenTelemetry SDK
+installed, every HTTP request gets a server span (continuing the caller's
+trace if it sent a traceparent header), with child spans for each PostgREST
+round trip, embedding call and bcrypt operation. Database spans carry the
+table or function name and the filter shape: the filtered columns and their
+operators, never the values (e.g. "api_key_prefix=eq").
+
+- "otlp": OTLP/HTTP to TRACING_OTLP_ENDPOINT, e.g. a local collector or Jaeger
+- "file": one JSON span per line appended to TRACING_FILE_PATH
+
+TRACING_SAMPLE_RATIO is the fraction of traces started here that are kept;
+a sampled-out request creates no child spans either. Requests continuing a
+trace follow the caller's sampling decision.
+
+With tracing off (the default) or the SDK missing, span() returns a shared
+no-op context manager and no middleware is installed.
+"""
+
+from contextlib import nullcontext
+import logging
+import os
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+except ImportError:  # only needed with TRACING_EXPORTER set
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+
+# PostgREST query parameters that aren't filters; kept as-is in the shape
+_MODIFIERS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+_tracer = None
+_provider = None
+
+
+def setup() -> bool:
+    """Configure the exporter from settings. Returns whether tracing is on."""
+    global _tracer, _provider
+    if settings.tracing_exporter == "off":
+        return False
+    if trace is None:
+        logger.warning("TRACING_EXPORTER is set but opentelemetry-sdk is not installed; tracing is off")
+        return False
+
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    elif settings.tracing_exporter == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(settings.tracing_file_path, "a"),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {settings.tracing_exporter}")
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = _provider.get_tracer(__name__)
+    return True
+
+
+def shutdown():
+    """Flush buffered spans."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def _recording() -> bool:
+    return _tracer is not None and trace.get_current_span().is_recording()
+
+
+def span(name: str, attributes: dict | None = None):
+    """Child span of the current request's span, or a no-op."""
+    if not _recording():
+        return _NOOP
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def filter_shape(params) -> str:
+    """PostgREST query parameters with filter values dropped."""
+    shape = []
+    for key, value in params.multi_items():
+        if key in _MODIFIERS:
+            shape.append(key)
+        else:
+            shape.append(f"{key}={value.partition('.')[0]}")
+    return ",".join(shape)
+
+
+def db_span(kind: str, name: str, method: str, params):
+    """Span for one PostgREST round trip."""
+    if not _recording():
+        return _NOOP
+    attributes = {
+        "db.system": "postgresql",
+        "db.operation.name": method,
+        "db.postgrest.filter": filter_shape(params),
+    }
+    if kind == "rpc":
+        attributes["db.stored_procedure.name"] = name
+    else:
+        attributes["db.collection.name"] = name
+    return _tracer.start_as_current_span(f"{kind} {name}", kind=trace.SpanKind.CLIENT, attributes=attributes)
+
+
+class TracingMiddleware:
+    """Wrap each HTTP request in a server span."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with _tracer.start_as_current_span(
+            method,
+            context=propagate.extract(carrier),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as request_span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    request_span.update_name(f"{method} {route.path}")
+                    request_span.set_attribute("http.route", route.path)
+                request_span.set_attribute("http.response.status_code", status)
+                if status >= 500:
+                    request_span.set_status(trace.StatusCode.ERROR)
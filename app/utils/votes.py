@@ -0,0 +1,253 @@
+"""
+user_vote lookups, served from a per-worker cache of each user's votes.
+
+The first lookup for a user loads all of their question (or answer) votes,
+a page at a time, and keeps them as two packed, sorted runs of 16-byte ids,
+up and down. After that, decorating any page with user_vote is a local
+binary search. The vote endpoints record the votes they apply, so a user
+always sees their own votes on this worker; votes cast through another
+worker show up once the entry expires after VOTE_CACHE_TTL_SECONDS. Users
+with more than VOTE_CACHE_MAX_VOTES_PER_USER votes are not cached and get a
+per-page query until that marker expires too.
+
+At 16 bytes per vote, the cache holds at most VOTE_CACHE_USERS x
+VOTE_CACHE_MAX_VOTES_PER_USER x 16 bytes of ids (80 MB with the defaults),
+and far less in practice since most users cast few votes.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+import uuid
+from app.config import settings
+from app.database import supabase
+
+# Votes read per request when loading a user; PostgREST caps a response at
+# its max-rows setting (1000 by default)
+VOTE_PAGE_SIZE = 1000
+
+# Vote target -> (votes table, target id column)
+VOTE_TABLES = {
+    "question": ("question_votes", "question_id"),
+    "answer": ("answer_votes", "answer_id"),
+}
+
+
+def _key(target_id: str) -> bytes | None:
+    try:
+        return uuid.UUID(target_id).bytes
+    except ValueError:
+        return None
+
+
+class IdSet:
+    """
+    A set of 16-byte ids packed into one sorted bytes object.
+
+    About 16 bytes per id against roughly 90 for a set of bytes objects;
+    lookups are a binary search and changes copy the run, which is cheap at
+    the sizes VoteStateCache allows.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, keys=()):
+        self.data = b"".join(sorted(set(keys)))
+
+    def __len__(self) -> int:
+        return len(self.data) // 16
+
+    def _offset(self, key: bytes) -> int:
+        """Byte offset of key, or of where it would be inserted."""
+        data = self.data
+        lo, hi = 0, len(data) // 16
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[mid * 16:mid * 16 + 16] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo * 16
+
+    def __contains__(self, key: bytes) -> bool:
+        offset = self._offset(key)
+        return self.data[offset:offset + 16] == key
+
+    def add(self, key: bytes):
+        offset = self._offset(key)
+        if self.data[offset:offset + 16] != key:
+            self.data = self.data[:offset] + key + self.data[offset:]
+
+    def discard(self, key: bytes):
+        offset = self._offset(key)
+        if self.data[offset:offset + 16] == key:
+            self.data = self.data[:offset] + self.data[offset + 16:]
+
+
+class VoteState:
+    """One user's votes on one target type."""
+
+    __slots__ = ("up", "down")
+
+    def __init__(self, rows: list[dict], column: str):
+        up = [uuid.UUID(row[column]).bytes for row in rows if row["vote_type"] == "up"]
+        down = [uuid.UUID(row[column]).bytes for row in rows if row["vote_type"] != "up"]
+        self.up = IdSet(up)
+        self.down = IdSet(down)
+
+    def get(self, target_id: str) -> str | None:
+        key = _key(target_id)
+        if key is None:
+            return None
+        if key in self.up:
+            return "up"
+        if key in self.down:
+            return "down"
+        return None
+
+    def set(self, target_id: str, vote: str | None):
+        key = _key(target_id)
+        if key is None:
+            return
+        self.up.discard(key)
+        self.down.discard(key)
+        if vote == "up":
+            self.up.add(key)
+        elif vote == "down":
+            self.down.add(key)
+
+
+class VoteStateCache:
+    """LRU of (user id, target) -> (expiry, VoteState)."""
+
+    def __init__(self, users: int, ttl: float, max_votes: int):
+        self.users = users
+        self.ttl = ttl
+        self.max_votes = max_votes
+        # A None state marks a user with too many votes to cache; it expires
+        # like any other entry, so the user is re-checked after a while
+        self.states: OrderedDict[tuple[str, str], tuple[float, VoteState | None]] = OrderedDict()
+        # Routes run in the threadpool; the lock covers the LRU and vote
+        # state changes, not the database load
+        self.lock = threading.Lock()
+        # (user id, target) -> [loads in flight, votes recorded since the
+        # first of them started]. A load that a vote overlapped may have
+        # read the table before the vote was written, so it isn't stored.
+        self.loading: dict[tuple[str, str], list[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, target: str) -> VoteState | None:
+        """Return the user's vote state, loading it if needed, or None if uncacheable."""
+        key = (user_id, target)
+        with self.lock:
+            entry = self.states.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.states.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            loading = self.loading.setdefault(key, [0, 0])
+            loading[0] += 1
+            votes_before = loading[1]
+
+        self.misses += 1
+        table, column = VOTE_TABLES[target]
+        try:
+            rows = self._load(table, column, user_id)
+        except BaseException:
+            with self.lock:
+                self._finish_load(key, loading)
+            raise
+        state = VoteState(rows, column) if rows is not None else None
+        with self.lock:
+            self._finish_load(key, loading)
+            if loading[1] != votes_before:
+                # Good enough for this request; the next one loads again
+                return state
+            self.states[key] = (time.monotonic() + self.ttl, state)
+            self.states.move_to_end(key)
+            while len(self.states) > self.users:
+                self.states.popitem(last=False)
+        return state
+
+    def _finish_load(self, key: tuple[str, str], loading: list[int]):
+        """Drop a finished load from self.loading; call with the lock held."""
+        loading[0] -= 1
+        if not loading[0]:
+            del self.loading[key]
+
+    def _load(self, table: str, column: str, user_id: str) -> list[dict] | None:
+        """All of a user's votes, or None if there are more than max_votes."""
+        rows: list[dict] = []
+        total = None
+        while total is None or len(rows) < total:
+            # The first page also counts the user's votes, so a heavy voter
+            # costs one request and a truncated page can't pass for all of them
+            result = (
+                supabase.table(table)
+                .select(f"{column}, vote_type", count="exact" if total is None else None)
+                .eq("user_id", user_id)
+                .order(column)
+                .range(len(rows), len(rows) + VOTE_PAGE_SIZE - 1)
+                .execute()
+            )
+            if total is None:
+                total = result.count or 0
+                if total > self.max_votes:
+                    return None
+            if not result.data:
+                break
+            rows += result.data
+        return rows
+
+    def record(self, user_id: str, target: str, target_id: str, vote: str | None):
+        """Apply a vote that was just written, if the user's state is cached."""
+        with self.lock:
+            loading = self.loading.get((user_id, target))
+            if loading is not None:
+                loading[1] += 1
+            entry = self.states.get((user_id, target))
+            if entry is not None and entry[1] is not None:
+                entry[1].set(target_id, vote)
+
+
+vote_states = VoteStateCache(
+    settings.vote_cache_users,
+    settings.vote_cache_ttl_seconds,
+    settings.vote_cache_max_votes_per_user,
+)
+
+
+def get_user_votes(user: dict | None, target_ids: list[str], target: str = "question") -> dict:
+    """Fetch user's votes for a list of question or answer IDs."""
+    if not user or not target_ids:
+        return {}
+
+    state = vote_states.get(user["id"], target)
+    if state is not None:
+        votes = {}
+        for target_id in target_ids:
+            vote = state.get(target_id)
+            if vote is not None:
+                votes[target_id] = vote
+        return votes
+
+    table, column = VOTE_TABLES[target]
+    votes_result = (
+        supabase.table(table)
+        .select(f"{column}, vote_type")
+        .eq("user_id", user["id"])
+        .in_(column, target_ids)
+        .execute()
+    )
+    return {v[column]: v["vote_type"] for v in votes_result.data}
+
+
+def get_user_vote(user: dict | None, target_id: str, target: str = "question") -> str | None:
+    """Fetch user's vote on a single question or answer."""
+    return get_user_votes(user, [target_id], target).get(target_id)
+
+
+def record_vote(user: dict, target_id: str, vote: str | None, target: str = "question"):
+    """Keep the vote cache in step with a vote the caller just applied."""
+    vote_states.record(user["id"], target, target_id, vote)
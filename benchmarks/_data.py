@@ -0,0 +1,101 @@
+"""Synthetic rows shaped like PostgREST responses, for offline benchmarks."""
+
+import hashlib
+import math
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+_WORDS = (
+    "async await python fastapi postgres index query vector embedding cache "
+    "timeout retry agent token latency worker thread memory pool request"
+).split()
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    total = 0
+    while total < chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        total += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def _timestamp(rng: random.Random) -> str:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return (base + timedelta(seconds=rng.randrange(0, 86400 * 200))).isoformat()
+
+
+def question_rows(n: int = 20, body_chars: int = 2000, seed: int = 0) -> list[dict]:
+    """Rows as returned by `questions.select("*, users!...(username), forums(name)")`."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        up, down = rng.randrange(50), rng.randrange(10)
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": _text(rng, 80),
+            "body": _text(rng, body_chars),
+            "forum_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "author_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "upvote_count": up,
+            "downvote_count": down,
+            "score": up - down,
+            "answer_count": rng.randrange(5),
+            "created_at": _timestamp(rng),
+            "is_deleted": False,
+            "users": {"username": f"agent_{rng.randrange(10_000):05d}"},
+            "forums": {"name": rng.choice(["python", "databases", "devops"])},
+        })
+    return rows
+
+
+def answer_rows(n: int = 20, body_chars: int = 2000, seed: int = 1) -> list[dict]:
+    """Rows as returned by `answers.select("*, users!...(username)")`."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        up, down = rng.randrange(50), rng.randrange(10)
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "body": _text(rng, body_chars),
+            "question_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "author_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "status": rng.choice(["success", "attempt", "failure"]),
+            "upvote_count": up,
+            "downvote_count": down,
+            "score": up - down,
+            "created_at": _timestamp(rng),
+            "is_deleted": False,
+            "users": {"username": f"agent_{rng.randrange(10_000):05d}"},
+        })
+    return rows
+
+
+EMBEDDING_DIM = 1536
+
+
+@lru_cache(maxsize=65536)
+def _word_slot(word: str) -> tuple[int, float]:
+    h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+    return h % EMBEDDING_DIM, 1.0 if h >> 63 else -1.0
+
+
+def fake_embedding(text: str) -> list[float]:
+    """Deterministic unit vector from hashed word counts.
+
+    Texts that share words have positive cosine similarity, so semantic
+    search over a synthetic corpus finds related questions without calling
+    an embedding provider.
+    """
+    vector = [0.0] * EMBEDDING_DIM
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        slot, sign = _word_slot(word)
+        vector[slot] += sign
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        vector[0], norm = 1.0, 1.0
+    return [round(v / norm, 6) for v in vector]
@@ -0,0 +1,412 @@
+"""
+End-to-end benchmark: every route against a local Postgres.
+
+Starts a local Postgres (benchmarks/stack.py), builds the schema, seeds a
+synthetic corpus (benchmarks/seed.py), runs the PostgREST stand-in and the
+app under uvicorn, then drives each route in turn with --concurrency
+clients. For each route it reports p50/p95/p99 latency, throughput, status
+codes and PostgREST round trips per request, the last read from the app's
+own /metrics (db_requests_per_http_request, scraped with the corpus's admin
+key). Those cover every worker only with --server gunicorn (multiprocess
+metrics), so keep --workers at 1 under uvicorn when they matter.
+
+Results are written as JSON; pass an earlier file as --baseline to compare.
+Absolute numbers include the stand-in's overhead and the load generator's
+share of this machine, so compare runs made on the same machine.
+
+Usage:
+    python -m benchmarks.e2e [--scale 1] [--requests 200] [--concurrency 8]
+                             [--only search] [--out results.json] [--baseline before.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks import stack
+from benchmarks.seed import TOPICS, Corpus
+
+
+@dataclass
+class Context:
+    """What scenarios draw their parameters from."""
+
+    corpus: Corpus
+    rng: random.Random
+    # (id, API key of its author), filled by the create scenarios
+    created_questions: list[tuple[str, str]] = field(default_factory=list)
+    created_answers: list[tuple[str, str]] = field(default_factory=list)
+    sequence: int = 0
+
+    def question(self) -> str:
+        return self.rng.choice(self.corpus.question_ids)
+
+    def answer(self) -> str:
+        return self.rng.choice(self.corpus.answer_ids)
+
+    def user(self) -> str:
+        return self.rng.choice(self.corpus.user_ids)
+
+    def forum(self) -> str:
+        return self.rng.choice(self.corpus.forum_ids)
+
+    def key(self) -> str:
+        return self.rng.choice(self.corpus.load_users)[1]
+
+    def admin_key(self) -> str:
+        return next(key for _, key, is_admin in self.corpus.load_users if is_admin)
+
+    def some(self, ids: list[str], n: int = 20) -> list[str]:
+        """Up to n distinct ids (small --scale corpora may have fewer)."""
+        return self.rng.sample(ids, min(n, len(ids)))
+
+    def words(self, n: int = 2) -> str:
+        return " ".join(self.rng.sample(TOPICS[self.rng.choice(list(TOPICS))].split(), n))
+
+    def unique(self, prefix: str) -> str:
+        self.sequence += 1
+        return f"{prefix}{int(time.time())}{self.sequence:05d}"
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    key: str | None = None
+    body: dict | None = None
+    # Called with the response, e.g. to remember created IDs
+    after: Callable[[httpx.Response], None] | None = None
+
+
+@dataclass
+class Scenario:
+    method: str
+    # Route template, as the app's metrics label it
+    route: str
+    build: Callable[[Context], Request | None]
+    # Fraction of --requests to send (expensive or state-consuming routes)
+    share: float = 1.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+def _remember(target: list, key: str, id_field: str):
+    def after(response: httpx.Response):
+        if response.status_code == 200:
+            target.append((response.json()[id_field], key))
+    return after
+
+
+def _create_question(ctx: Context) -> Request:
+    key = ctx.key()
+    return Request("POST", "/questions", key, {
+        "title": f"How to {ctx.words(4)}?", "body": ctx.words(10), "forum_id": ctx.forum(),
+    }, _remember(ctx.created_questions, key, "id"))
+
+
+def _create_answer(ctx: Context) -> Request:
+    key = ctx.key()
+    return Request(
+        "POST", f"/questions/{ctx.question()}/answers", key,
+        {"body": ctx.words(10), "status": ctx.rng.choice(["success", "attempt", "failure"])},
+        _remember(ctx.created_answers, key, "id"),
+    )
+
+
+def _delete(created: list, path: str) -> Callable[[Context], Request | None]:
+    def build(ctx: Context) -> Request | None:
+        if not created:
+            return None
+        item_id, key = created.pop()
+        return Request("DELETE", path.format(item_id), key)
+    return build
+
+
+def _vote(ctx: Context) -> str:
+    # "none" is a 400 unless the user already voted on that target
+    return ctx.rng.choice(["up", "down"])
+
+
+SCENARIOS = [
+    # Reads
+    Scenario("GET", "/questions", lambda c: Request("GET", f"/questions?sort={c.rng.choice(['top', 'newest'])}")),
+    Scenario("GET", "/questions/{question_id}", lambda c: Request("GET", f"/questions/{c.question()}", c.key())),
+    Scenario("GET", "/questions/{question_id}/thread", lambda c: Request("GET", f"/questions/{c.question()}/thread")),
+    Scenario("GET", "/questions/{question_id}/answers", lambda c: Request("GET", f"/questions/{c.question()}/answers")),
+    Scenario("GET", "/questions/{question_id}/answers/wait", lambda c: Request(
+        "GET", f"/questions/{c.question()}/answers/wait?timeout=0&since=2000-01-01T00:00:00Z")),
+    Scenario("GET", "/questions/unanswered", lambda c: Request("GET", "/questions/unanswered")),
+    Scenario("POST", "/questions/batch", lambda c: Request(
+        "POST", "/questions/batch", body={"ids": c.some(c.corpus.question_ids)})),
+    Scenario("GET", "/answers/{answer_id}", lambda c: Request("GET", f"/answers/{c.answer()}", c.key())),
+    Scenario("POST", "/answers/batch", lambda c: Request(
+        "POST", "/answers/batch", body={"ids": c.some(c.corpus.answer_ids)})),
+    Scenario("GET", "/forums", lambda c: Request("GET", "/forums")),
+    Scenario("GET", "/forums/{forum_id}", lambda c: Request("GET", f"/forums/{c.forum()}")),
+    Scenario("GET", "/users/me", lambda c: Request("GET", "/users/me", c.key())),
+    Scenario("GET", "/users/top", lambda c: Request("GET", "/users/top")),
+    Scenario("POST", "/users/batch", lambda c: Request(
+        "POST", "/users/batch", body={"ids": c.some(c.corpus.user_ids)})),
+    Scenario("GET", "/users/username/{username}", lambda c: Request(
+        "GET", f"/users/username/{c.rng.choice(c.corpus.usernames)}")),
+    Scenario("GET", "/users/{user_id}", lambda c: Request("GET", f"/users/{c.user()}")),
+    Scenario("GET", "/users/{user_id}/questions", lambda c: Request("GET", f"/users/{c.user()}/questions")),
+    Scenario("GET", "/users/{user_id}/answers", lambda c: Request("GET", f"/users/{c.user()}/answers")),
+    Scenario("GET", "/users/{user_id}/activity", lambda c: Request("GET", f"/users/{c.user()}/activity")),
+    Scenario("GET", "/changes", lambda c: Request("GET", f"/changes?since={c.rng.randrange(1000)}")),
+    # Search and aggregates
+    Scenario("GET", "/questions/search", lambda c: Request("GET", f"/questions/search?q={c.words(3)}")),
+    Scenario("GET", "/users/usage", lambda c: Request(
+        "GET", f"/users/usage?period={c.rng.choice(['24h', '30d', 'all'])}"), share=0.25),
+    Scenario("GET", "/stats", lambda c: Request("GET", "/stats"), share=0.25),
+    Scenario("GET", "/usage-stats", lambda c: Request("GET", "/usage-stats"), share=0.25),
+    Scenario("GET", "/export", lambda c: Request("GET", f"/export?forum_id={c.forum()}", c.admin_key()), share=0.05),
+    # Writes
+    Scenario("POST", "/questions", _create_question, share=0.5),
+    Scenario("POST", "/questions/{question_id}/answers", _create_answer, share=0.5),
+    Scenario("POST", "/questions/{question_id}/vote", lambda c: Request(
+        "POST", f"/questions/{c.question()}/vote", c.key(), {"vote": _vote(c)})),
+    Scenario("POST", "/answers/{answer_id}/vote", lambda c: Request(
+        "POST", f"/answers/{c.answer()}/vote", c.key(), {"vote": _vote(c)})),
+    Scenario("POST", "/votes/batch", lambda c: Request("POST", "/votes/batch", c.key(), {"votes": [
+        {"target_type": "question", "target_id": c.question(), "vote": _vote(c)} for _ in range(10)
+    ]})),
+    Scenario("POST", "/questions/unanswered/claim", lambda c: Request(
+        "POST", "/questions/unanswered/claim", c.key(), {"count": 5, "ttl_seconds": 30})),
+    Scenario("POST", "/forums", lambda c: Request(
+        "POST", "/forums", c.admin_key(), {"name": c.unique("bench-forum-")}), share=0.1),
+    Scenario("POST", "/auth/register", lambda c: Request(
+        "POST", "/auth/register", body={"username": c.unique("bench_")}), share=0.1),
+    # Consume what the create scenarios made
+    Scenario("DELETE", "/answers/{answer_id}", lambda c: _delete(c.created_answers, "/answers/{}")(c), share=0.5),
+    Scenario("DELETE", "/questions/{question_id}", lambda c: _delete(c.created_questions, "/questions/{}")(c), share=0.5),
+]
+
+
+# ============ Load generation ============
+
+def _percentile(samples: list[float], p: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+async def _send(client: httpx.AsyncClient, request: Request) -> tuple[float, int]:
+    headers = {"Authorization": f"Bearer {request.key}"} if request.key else {}
+    start = time.perf_counter()
+    response = await client.request(request.method, request.url, json=request.body, headers=headers)
+    await response.aread()
+    elapsed = time.perf_counter() - start
+    if request.after is not None:
+        request.after(response)
+    return elapsed, response.status_code
+
+
+async def _run(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, count: int, concurrency: int):
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    remaining = count
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            request = scenario.build(ctx)
+            if request is None:
+                return
+            elapsed, status = await _send(client, request)
+            latencies.append(elapsed)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def _db_calls(client: httpx.AsyncClient, admin_key: str) -> dict[str, tuple[float, float]]:
+    """(sum, count) of db_requests_per_http_request per route."""
+    response = await client.get("/metrics", headers={"Authorization": f"Bearer {admin_key}"})
+    response.raise_for_status()
+    text = response.text
+    totals: dict[str, list[float]] = {}
+    for family in text_string_to_metric_families(text):
+        if family.name != "db_requests_per_http_request":
+            continue
+        for sample in family.samples:
+            route = sample.labels.get("route")
+            if sample.name.endswith("_sum"):
+                totals.setdefault(route, [0.0, 0.0])[0] = sample.value
+            elif sample.name.endswith("_count"):
+                totals.setdefault(route, [0.0, 0.0])[1] = sample.value
+    return {route: (s, c) for route, (s, c) in totals.items()}
+
+
+async def run_scenarios(
+    base_url: str, corpus: Corpus, scenarios: list[Scenario], requests: int, concurrency: int, warmup: int,
+) -> dict[str, dict]:
+    ctx = Context(corpus, random.Random(1))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        for scenario in scenarios:
+            count = max(1, int(requests * scenario.share))
+            await _run(client, scenario, ctx, min(warmup, count), min(concurrency, warmup) or 1)
+            before = await _db_calls(client, ctx.admin_key())
+            latencies, statuses, elapsed = await _run(client, scenario, ctx, count, concurrency)
+            after = await _db_calls(client, ctx.admin_key())
+            if not latencies:
+                print(f"{scenario.name:<45} skipped (nothing to act on)")
+                continue
+
+            calls_sum = after.get(scenario.route, (0, 0))[0] - before.get(scenario.route, (0, 0))[0]
+            calls_count = after.get(scenario.route, (0, 0))[1] - before.get(scenario.route, (0, 0))[1]
+            result = {
+                "requests": len(latencies),
+                # 4xx are often the right answer (a repeat vote is a 409);
+                # they're in "status"
+                "errors": sum(n for status, n in statuses.items() if status >= 500),
+                "status": {str(status): n for status, n in sorted(statuses.items())},
+                "mean_ms": statistics.fmean(latencies) * 1000,
+                "p50_ms": _percentile(latencies, 50) * 1000,
+                "p95_ms": _percentile(latencies, 95) * 1000,
+                "p99_ms": _percentile(latencies, 99) * 1000,
+                "throughput_rps": len(latencies) / elapsed,
+                "db_calls_per_request": calls_sum / calls_count if calls_count else None,
+            }
+            results[scenario.name] = result
+            _print_row(scenario.name, result)
+    return results
+
+
+# ============ Reporting ============
+
+def _print_header():
+    print(f"{'route':<45} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'db/req':>7} {'errors':>7}")
+
+
+def _print_row(name: str, r: dict):
+    db = f"{r['db_calls_per_request']:.1f}" if r["db_calls_per_request"] is not None else "-"
+    print(
+        f"{name:<45} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} "
+        f"{r['throughput_rps']:8.1f} {db:>7} {r['errors']:>7}"
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print changes against a baseline. Returns the routes that regressed."""
+    regressions = []
+    print()
+    print(f"Against baseline ({baseline['meta']['timestamp']}, {baseline['meta'].get('commit') or 'unknown commit'})")
+    for setting in ("scale", "requests", "concurrency", "workers", "server", "env"):
+        if results["meta"].get(setting) != baseline["meta"].get(setting):
+            print(f"  warning: {setting} differs ({baseline['meta'].get(setting)} -> {results['meta'].get(setting)})")
+    print(f"{'route':<45} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'db/req':>9}")
+    for name, r in results["routes"].items():
+        b = baseline["routes"].get(name)
+        if b is None:
+            continue
+        changes = {
+            metric: (r[metric] - b[metric]) / b[metric] if b[metric] else 0.0
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+        }
+        db_before, db_after = b.get("db_calls_per_request"), r.get("db_calls_per_request")
+        db = f"{db_before:.1f}->{db_after:.1f}" if db_before is not None and db_after is not None else "-"
+        regressed = (
+            changes["p50_ms"] > threshold or changes["p95_ms"] > threshold
+            or changes["throughput_rps"] < -threshold
+            or (db_before is not None and db_after is not None and db_after > db_before * (1 + threshold))
+        )
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<45} {changes['p50_ms']:+8.1%} {changes['p95_ms']:+8.1%} {changes['p99_ms']:+8.1%} "
+            f"{changes['throughput_rps']:+8.1%} {db:>9}" + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=stack.ROOT, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Corpus size multiplier (see benchmarks/seed.py)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per route first")
+    parser.add_argument("--only", help="Regex selecting routes by 'METHOD /template'")
+    parser.add_argument("--workers", type=int, default=1, help="App worker processes")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn",
+                        help="Plain uvicorn, or the production profile in gunicorn.conf.py")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Simulated provider latency")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="App setting override")
+    parser.add_argument("--data-dir", default=".bench/pgdata")
+    parser.add_argument("--reuse", action="store_true", help="Keep the existing database and corpus")
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.only or re.search(args.only, s.name)]
+    server, corpus = stack.local_database(Path(args.data_dir), args.scale, args.reuse)
+    dsn = server.get_uri()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    with stack.run_standin(dsn, embedding_latency_ms=args.embedding_latency_ms) as standin_url, \
+            stack.run_app(standin_url, env, args.workers, args.server) as app_url:
+        print(f"{len(scenarios)} routes x {args.requests} requests, concurrency {args.concurrency}")
+        _print_header()
+        routes = asyncio.run(run_scenarios(app_url, corpus, scenarios, args.requests, args.concurrency, args.warmup))
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "scale": args.scale,
+            "questions": len(corpus.question_ids),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "server": args.server,
+            "env": env,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "routes": routes,
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-row cost of turning database rows into response payloads.
+
+For each entity the same payload is built three ways: validated into the
+`*Public` model (the routers' previous constructors), built with
+`model_construct` (no validation), and left as the trusted-row dict that
+`app.utils.formatting` returns. The "page" column adds encoding a list of
+`--rows` items with ORJSONResponse, i.e. the full cost of a list response.
+
+Usage:
+    python -m benchmarks.formatting [--rows 20] [--iterations 5000]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from app.models.answer import AnswerPublic
+from app.models.forum import ForumPublic
+from app.models.question import QuestionPublic
+from app.models.user import UserPublic
+from app.utils.formatting import format_answer, format_forum, format_question, format_user
+from app.utils.responses import ORJSONResponse
+from benchmarks._data import answer_rows, question_rows
+
+
+def _forum_rows(questions: list[dict]) -> list[dict]:
+    return [
+        {
+            "id": q["forum_id"],
+            "name": q["forums"]["name"],
+            "description": q["title"],
+            "created_by": q["author_id"],
+            "question_count": q["answer_count"],
+            "created_at": q["created_at"],
+            "users": q["users"],
+        }
+        for q in questions
+    ]
+
+
+def _user_rows(questions: list[dict]) -> list[dict]:
+    return [
+        {
+            "id": q["author_id"],
+            "username": q["users"]["username"],
+            "question_count": q["answer_count"],
+            "answer_count": q["upvote_count"],
+            "reputation": q["score"],
+            "created_at": q["created_at"],
+        }
+        for q in questions
+    ]
+
+
+def _time(fn: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    questions = question_rows(args.rows)
+    cases = [
+        ("question", QuestionPublic, questions, format_question),
+        ("answer", AnswerPublic, answer_rows(args.rows), format_answer),
+        ("forum", ForumPublic, _forum_rows(questions), format_forum),
+        ("user", UserPublic, _user_rows(questions), format_user),
+    ]
+
+    print(f"Per-row build cost, and full {args.rows}-row page (build + ORJSONResponse)")
+    print(f"{'entity':<10} {'path':<16} {'per row':>10} {'page':>11}")
+    for name, model, rows, fmt in cases:
+        paths = {
+            "validated": lambda row: model(**fmt(row)),
+            "model_construct": lambda row: model.model_construct(**fmt(row)),
+            "trusted dict": fmt,
+        }
+        for label, build in paths.items():
+            per_row = _time(lambda: [build(r) for r in rows], args.iterations) / len(rows)
+            page = _time(lambda: ORJSONResponse({"items": [build(r) for r in rows]}).body, args.iterations)
+            print(f"{name:<10} {label:<16} {per_row * 1e6:7.2f} us {page * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Per-request cost of RateLimitMiddleware.
+
+Drives the middleware directly with a no-op app behind it and reports the
+time it adds per request: the memory backend always, and the redis backend
+when --redis-url is given (the Lua check is one round trip, so this mostly
+measures the network to Redis). Requests carry a trusted API key spread
+over --keys callers, with a rate high enough that none are refused.
+
+Usage:
+    python -m benchmarks.ratelimit [--iterations 20000] [--keys 1000] [--redis-url redis://localhost:6379/0]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import settings
+from app.utils import ratelimit
+from app.utils.ratelimit import MemoryBuckets, RateLimitMiddleware, RedisBuckets
+from benchmarks.e2e import _percentile
+
+
+async def _noop_app(scope, receive, send):
+    pass
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+def _scope(prefix: str) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/questions/00000000-0000-4000-8000-000000000000",
+        "headers": [(b"authorization", f"Bearer co_{prefix}_secret".encode())],
+        "client": ("10.0.0.1", 5000),
+    }
+
+
+async def _time(app, scopes: list[dict], iterations: int) -> list[float]:
+    samples = []
+    for i in range(iterations):
+        scope = scopes[i % len(scopes)]
+        start = time.perf_counter()
+        await app(scope, _receive, _send)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run(backend: str, buckets, iterations: int, keys: int) -> dict:
+    scopes = [_scope(f"k{i:06d}") for i in range(keys)]
+    for scope in scopes:
+        ratelimit.trust_key(ratelimit.client_key(scope)[1])
+    middleware = RateLimitMiddleware(
+        _noop_app, buckets, rate=1e9, burst=1e9, costs=settings.rate_limit_costs,
+    )
+    if isinstance(buckets, RedisBuckets):
+        # take() fails open, which would time nothing useful; fail loudly instead
+        await buckets.script(keys=[ratelimit.REDIS_KEY_PREFIX + "probe"], args=[0, 1, 1, "0", 1])
+    # Warm up buckets and connections, then measure bare and wrapped calls
+    await _time(middleware, scopes, min(iterations, keys * 2))
+    bare = await _time(_noop_app, scopes, iterations)
+    wrapped = await _time(middleware, scopes, iterations)
+    overhead = statistics.fmean(wrapped) - statistics.fmean(bare)
+    return {
+        "backend": backend,
+        "mean_us": overhead * 1e6,
+        "p50_us": (_percentile(wrapped, 50) - _percentile(bare, 50)) * 1e6,
+        "p99_us": (_percentile(wrapped, 99) - _percentile(bare, 50)) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--redis-url", help="Also measure the redis backend against this server")
+    args = parser.parse_args()
+
+    runs = [("memory", MemoryBuckets())]
+    if args.redis_url:
+        runs.append(("redis", RedisBuckets(args.redis_url)))
+
+    print(f"RateLimitMiddleware overhead, {args.iterations} requests over {args.keys} keys")
+    print(f"  {'backend':<8} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    for name, buckets in runs:
+        result = asyncio.run(run(name, buckets, args.iterations, args.keys))
+        print(f"  {name:<8} {result['mean_us']:9.1f} {result['p50_us']:9.1f} {result['p99_us']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
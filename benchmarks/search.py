@@ -0,0 +1,377 @@
+"""
+Search quality and latency for semantic_search and alternatives to it.
+
+Runs a labelled query set through each engine, directly against Postgres,
+over a grid of parameters, and reports side by side:
+
+- recall@k: share of each query's top-grade results found in the first k
+- nDCG@k over all grades
+- MRR of the first top-grade result
+- results: how many question IDs the engine returned (what the route paginates)
+- p50/p95/p99 latency of the database call
+
+Engines:
+    semantic_search  the RPC /questions/search calls (SEMANTIC_SEARCH_THRESHOLD,
+                     SEMANTIC_SEARCH_LIMIT). It orders by an aggregate, so it
+                     scans every embedding rather than using the HNSW index.
+    knn              nearest neighbours by index order over questions and
+                     answers, merged by question. Same threshold and limit,
+                     plus hnsw.ef_search (HNSW returns at most ef_search rows
+                     per table).
+    keyword          the fallback when the embedding provider is down.
+
+Without --query-set, queries are generated from the corpus: the title of a
+sampled question with some words dropped, labelled grade 2 for that
+question and grade 1 for the rest of its forum. The set is written to
+--save-queries; replace it with hand-labelled queries in the same format:
+    [{"query": "...", "relevant": {"<question id>": 2}, "forum_id": "<id or null>"}]
+where forum_id, if set, labels every other question in that forum grade 1.
+
+Query embeddings are cached in --embedding-cache by model and text, so
+results are deterministic and later runs need no network. By default they
+come from fake_embedding(), which matches the seeded corpus. Against a real
+corpus (--dsn) use --provider app, which calls the app's configured provider
+(LLM_API_KEY etc.) for cache misses only.
+
+Usage:
+    python -m benchmarks.search [--scale 1] [--queries 200] [--k 10]
+                                [--thresholds 0.2,0.3,0.4] [--ef-search 40,200]
+    python -m benchmarks.search --dsn postgresql://... --provider app
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import platform
+import random
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import psycopg2
+
+from benchmarks import stack
+from benchmarks._data import fake_embedding
+
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_LIMIT = 200
+
+
+@dataclass
+class Query:
+    query: str
+    relevant: dict[str, int]
+    forum_id: str | None = None
+
+
+# ============ Query set ============
+
+def generate_queries(cur, n: int, drop: float, seed: int) -> list[Query]:
+    """Known-item queries: a question's title with some words dropped."""
+    rng = random.Random(seed)
+    cur.execute(
+        "SELECT id::text, forum_id::text, title FROM public.questions "
+        "WHERE NOT is_deleted AND embedding IS NOT NULL ORDER BY id"
+    )
+    rows = cur.fetchall()
+    queries = []
+    for question_id, forum_id, title in rng.sample(rows, min(n, len(rows))):
+        words = re.findall(r"\w+", title.lower())
+        kept = [w for w in words if rng.random() >= drop] or words
+        queries.append(Query(" ".join(kept), {question_id: 2}, forum_id))
+    return queries
+
+
+def load_queries(path: str) -> list[Query]:
+    with open(path) as f:
+        return [Query(**item) for item in json.load(f)]
+
+
+def save_queries(queries: list[Query], path: str):
+    with open(path, "w") as f:
+        json.dump([q.__dict__ for q in queries], f, indent=1)
+
+
+# ============ Embeddings ============
+
+class EmbeddingCache:
+    """Query embeddings by (model, text), persisted as JSON."""
+
+    def __init__(self, path: Path, provider: str):
+        self.path = path
+        self.provider = provider
+        self.vectors: dict[str, list[float]] = json.loads(path.read_text()) if path.exists() else {}
+        self.misses = 0
+        if provider == "app":
+            # Imported here: the app's settings need its environment
+            from app.config import settings
+            from app.utils.embeddings import get_embedding
+            self.model, self._embed = settings.embedding_model, get_embedding
+        else:
+            self.model, self._embed = "fake", fake_embedding
+
+    def get(self, text: str) -> list[float]:
+        key = hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+        if key not in self.vectors:
+            vector = self._embed(text)
+            if vector is None:
+                raise RuntimeError("No embedding model configured (LLM_API_KEY)")
+            self.vectors[key] = vector
+            self.misses += 1
+        return self.vectors[key]
+
+    def save(self):
+        if self.misses:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self.vectors))
+
+
+def _vector(values: list[float]) -> str:
+    return "[" + ",".join(repr(v) for v in values) + "]"
+
+
+# ============ Engines ============
+
+@dataclass
+class Variant:
+    engine: str
+    threshold: float | None = None
+    limit: int = DEFAULT_LIMIT
+    ef_search: int | None = None
+
+    @property
+    def label(self) -> str:
+        params = [f"threshold={self.threshold}"] if self.threshold is not None else []
+        params.append(f"limit={self.limit}")
+        if self.ef_search is not None:
+            params.append(f"ef_search={self.ef_search}")
+        return f"{self.engine} " + " ".join(params)
+
+
+KNN_SQL = """
+SELECT question_id::text FROM (
+    SELECT question_id, max(similarity) AS similarity FROM (
+        (SELECT q.id AS question_id, 1 - (q.embedding <=> %(v)s::extensions.vector) AS similarity
+         FROM public.questions q WHERE q.embedding IS NOT NULL
+         ORDER BY q.embedding <=> %(v)s::extensions.vector LIMIT %(limit)s)
+        UNION ALL
+        (SELECT a.question_id, 1 - (a.embedding <=> %(v)s::extensions.vector)
+         FROM public.answers a WHERE a.embedding IS NOT NULL
+         ORDER BY a.embedding <=> %(v)s::extensions.vector LIMIT %(limit)s)
+    ) nearest
+    WHERE similarity > %(threshold)s
+    GROUP BY question_id
+) merged
+ORDER BY similarity DESC LIMIT %(limit)s
+"""
+
+
+def _keyword_sql(words: list[str]) -> str:
+    # Same query as _keyword_search_ids in app/routers/questions.py
+    clauses = "".join(f" AND (title ILIKE %(w{i})s OR body ILIKE %(w{i})s)" for i in range(len(words)))
+    return (
+        f"SELECT id::text FROM public.questions WHERE NOT is_deleted{clauses} "
+        "ORDER BY score DESC, created_at DESC LIMIT %(limit)s"
+    )
+
+
+def run_engine(cur, variant: Variant, query: Query, vector: str) -> list[str]:
+    if variant.engine == "semantic_search":
+        cur.execute(
+            "SELECT question_id::text FROM public.semantic_search(%s::extensions.vector, %s, %s)",
+            (vector, variant.threshold, variant.limit),
+        )
+    elif variant.engine == "knn":
+        cur.execute(KNN_SQL, {"v": vector, "threshold": variant.threshold, "limit": variant.limit})
+    else:
+        words = [w for w in (re.sub(r"[,.()*%\\]", "", word) for word in query.query.split()) if w]
+        params = {f"w{i}": f"%{w}%" for i, w in enumerate(words)}
+        cur.execute(_keyword_sql(words), {**params, "limit": variant.limit})
+    return [row[0] for row in cur.fetchall()]
+
+
+# ============ Metrics ============
+
+def _grades(query: Query, ranked: list[str], forums: dict[str, str]) -> list[int]:
+    return [
+        query.relevant.get(qid, 1 if query.forum_id and forums.get(qid) == query.forum_id else 0)
+        for qid in ranked
+    ]
+
+
+def _ideal(query: Query, forum_sizes: dict[str, int], k: int) -> list[int]:
+    grades = sorted(query.relevant.values(), reverse=True)
+    if query.forum_id:
+        others = forum_sizes.get(query.forum_id, 0) - len(query.relevant)
+        grades += [1] * max(0, min(k, others))
+    return sorted(grades, reverse=True)[:k]
+
+
+def _dcg(grades: list[int]) -> float:
+    return sum((2 ** g - 1) / math.log2(i + 2) for i, g in enumerate(grades))
+
+
+def score(query: Query, ranked: list[str], forums: dict[str, str], forum_sizes: dict[str, int], k: int):
+    """(recall@k, nDCG@k, reciprocal rank) for one query."""
+    grades = _grades(query, ranked, forums)
+    top = max(query.relevant.values())
+    wanted = sum(1 for g in query.relevant.values() if g == top)
+    recall = sum(1 for g in grades[:k] if g == top) / wanted
+    ideal = _dcg(_ideal(query, forum_sizes, k))
+    ndcg = _dcg(grades[:k]) / ideal if ideal else 0.0
+    rank = next((i for i, g in enumerate(grades) if g == top), None)
+    return recall, ndcg, 1 / (rank + 1) if rank is not None else 0.0
+
+
+def _percentile(samples: list[float], p: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+def evaluate(conn, variants: list[Variant], queries: list[Query], vectors: list[str], k: int) -> list[dict]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT id::text, forum_id::text FROM public.questions")
+        forums = dict(cur.fetchall())
+    forum_sizes: dict[str, int] = {}
+    for forum_id in forums.values():
+        forum_sizes[forum_id] = forum_sizes.get(forum_id, 0) + 1
+
+    results = []
+    for variant in variants:
+        with conn.cursor() as cur:
+            if variant.ef_search is not None:
+                cur.execute("SET hnsw.ef_search = %s", (variant.ef_search,))
+            # One unmeasured pass so every variant starts with a warm cache
+            for query, vector in zip(queries, vectors):
+                run_engine(cur, variant, query, vector)
+            latencies, recalls, ndcgs, rrs, counts = [], [], [], [], []
+            for query, vector in zip(queries, vectors):
+                start = time.perf_counter()
+                ranked = run_engine(cur, variant, query, vector)
+                latencies.append(time.perf_counter() - start)
+                recall, ndcg, rr = score(query, ranked, forums, forum_sizes, k)
+                recalls.append(recall)
+                ndcgs.append(ndcg)
+                rrs.append(rr)
+                counts.append(len(ranked))
+            if variant.ef_search is not None:
+                cur.execute("RESET hnsw.ef_search")
+        result = {
+            **variant.__dict__,
+            "label": variant.label,
+            f"recall@{k}": statistics.fmean(recalls),
+            f"ndcg@{k}": statistics.fmean(ndcgs),
+            "mrr": statistics.fmean(rrs),
+            "results": statistics.fmean(counts),
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p95_ms": _percentile(latencies, 95) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+        }
+        results.append(result)
+        _print_row(result, k)
+    return results
+
+
+def _print_header(k: int):
+    print(
+        f"{'variant':<50} {f'recall@{k}':>9} {f'nDCG@{k}':>8} {'MRR':>6} {'results':>7} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}"
+    )
+
+
+def _print_row(r: dict, k: int):
+    print(
+        f"{r['label']:<50} {r[f'recall@{k}']:9.3f} {r[f'ndcg@{k}']:8.3f} {r['mrr']:6.3f} {r['results']:7.1f} "
+        f"{r['p50_ms']:7.2f} {r['p95_ms']:7.2f} {r['p99_ms']:7.2f}"
+    )
+
+
+def _floats(value: str) -> list[float]:
+    return [float(v) for v in value.split(",")]
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="Existing database to evaluate (default: the local seeded one)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Corpus size when seeding locally")
+    parser.add_argument("--data-dir", default=".bench/pgdata")
+    parser.add_argument("--reuse", action="store_true", help="Keep the local database an earlier run seeded")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to generate")
+    parser.add_argument("--drop", type=float, default=0.25, help="Share of title words dropped from generated queries")
+    parser.add_argument("--query-set", help="Labelled queries to use instead of generating them")
+    parser.add_argument("--save-queries", default=".bench/queries.json")
+    parser.add_argument("--provider", choices=["fake", "app"], default="fake")
+    parser.add_argument("--embedding-cache", default=".bench/query-embeddings.json")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--engines", default="semantic_search,knn,keyword")
+    parser.add_argument("--thresholds", type=_floats, default=[DEFAULT_THRESHOLD])
+    parser.add_argument("--limits", type=_ints, default=[DEFAULT_LIMIT])
+    parser.add_argument("--ef-search", type=_ints, default=[40, DEFAULT_LIMIT])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="search-results.json")
+    args = parser.parse_args()
+
+    server = None
+    if args.dsn:
+        dsn = args.dsn
+    else:
+        server, _ = stack.local_database(Path(args.data_dir), args.scale, args.reuse)
+        dsn = server.get_uri()
+
+    engines = args.engines.split(",")
+    variants = []
+    for limit in args.limits:
+        if "semantic_search" in engines:
+            variants += [Variant("semantic_search", t, limit) for t in args.thresholds]
+        if "knn" in engines:
+            variants += [Variant("knn", t, limit, ef) for t in args.thresholds for ef in args.ef_search]
+        if "keyword" in engines:
+            variants.append(Variant("keyword", None, limit))
+
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("SET search_path = public, extensions")
+        if args.query_set:
+            queries = load_queries(args.query_set)
+        else:
+            queries = generate_queries(cur, args.queries, args.drop, args.seed)
+            Path(args.save_queries).parent.mkdir(parents=True, exist_ok=True)
+            save_queries(queries, args.save_queries)
+
+    cache = EmbeddingCache(Path(args.embedding_cache), args.provider)
+    vectors = [_vector(cache.get(q.query)) for q in queries]
+    cache.save()
+
+    print(f"{len(queries)} queries, {len(variants)} variants, {cache.misses} new query embeddings")
+    _print_header(args.k)
+    results = evaluate(conn, variants, queries, vectors, args.k)
+    conn.close()
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "queries": len(queries),
+                "query_set": args.query_set,
+                "provider": args.provider,
+                "model": cache.model,
+                "k": args.k,
+                "python": platform.python_version(),
+            },
+            "variants": results,
+        }, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Synthetic corpus for end-to-end benchmarks, loaded straight into Postgres
+with COPY.
+
+Each forum is a topic with its own vocabulary, so questions in a forum share
+words with each other and fake_embedding() gives semantic search real
+neighbours to find. Counters are fixed up afterwards with
+recompute_counters() (sql/recompute_counters.sql), and the HNSW indexes are
+rebuilt once at the end rather than maintained row by row.
+
+A handful of "load users" get real API keys (bcrypt at the app's cost) for
+the load generator; the first is an admin. Everyone else shares one hash
+and never logs in.
+
+Usage:
+    python -m benchmarks.seed --dsn postgresql://... [--scale 1] [--out corpus.json]
+"""
+
+import argparse
+import io
+import json
+import random
+import secrets
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import bcrypt
+import psycopg2
+
+from benchmarks._data import fake_embedding
+
+TOPICS = {
+    "python": "python asyncio generator decorator typing pip venv import coroutine gil dataclass pytest",
+    "databases": "postgres index query vacuum transaction lock replica schema migration join planner",
+    "devops": "docker kubernetes deploy container helm terraform ci pipeline image registry rollout",
+    "web": "http cors cookie header fastapi starlette middleware websocket json request response",
+    "ml": "embedding vector model training tensor gpu inference tokenizer batch gradient dataset",
+    "security": "auth token jwt bcrypt tls certificate secret permission injection csrf oauth",
+    "frontend": "react css component state render hook browser dom bundle typescript layout",
+    "systems": "linux kernel memory thread socket process signal filesystem cpu cache syscall",
+    "agents": "agent tool prompt context planner memory retry loop llm function call",
+    "data": "pandas parquet csv etl spark schema partition stream kafka warehouse query",
+}
+COMMON = "how why error fails slow when using with after the a to in of and fix best way".split()
+
+# Per unit of --scale
+USERS = 200
+QUESTIONS = 2000
+ANSWERS_PER_QUESTION = 3
+VOTES_PER_QUESTION = 5
+VOTES_PER_ANSWER = 2
+LOAD_USERS = 8
+
+
+@dataclass
+class Corpus:
+    """IDs the load generator draws from."""
+
+    forum_ids: list[str] = field(default_factory=list)
+    user_ids: list[str] = field(default_factory=list)
+    usernames: list[str] = field(default_factory=list)
+    question_ids: list[str] = field(default_factory=list)
+    answer_ids: list[str] = field(default_factory=list)
+    # (user id, API key, is admin)
+    load_users: list[tuple[str, str, bool]] = field(default_factory=list)
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(asdict(self), f)
+
+    @classmethod
+    def load(cls, path: str) -> "Corpus":
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def _sentence(rng: random.Random, words: list[str], n: int) -> str:
+    return " ".join(rng.choice(words) if rng.random() < 0.6 else rng.choice(COMMON) for _ in range(n))
+
+
+def _vector(text: str) -> str:
+    return "[" + ",".join(repr(v) for v in fake_embedding(text)) + "]"
+
+
+def _copy(cur, table: str, columns: list[str], rows: list[tuple]):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(
+            "\\N" if v is None else str(v).replace("\\", "\\\\").replace("\t", " ").replace("\n", "\\n")
+            for v in row
+        ))
+        buffer.write("\n")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY public.{table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def seed(dsn: str, scale: float = 1.0, body_words: int = 120, embeddings: bool = True, seed: int = 0) -> Corpus:
+    """Empty the tables and load a corpus of the given scale."""
+    rng = random.Random(seed)
+    corpus = Corpus()
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def stamp() -> str:
+        return (base + timedelta(seconds=rng.randrange(0, 86400 * 180))).isoformat()
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    # Users: load users with real keys first, then the rest
+    shared_hash = bcrypt.hashpw(b"co_00000000_unused", bcrypt.gensalt()).decode()
+    users = []
+    for i in range(max(LOAD_USERS, int(USERS * scale))):
+        user_id = new_id()
+        prefix = f"co_{rng.getrandbits(32):08x}"
+        if i < LOAD_USERS:
+            key = f"{prefix}_{secrets.token_urlsafe(32)}"
+            key_hash = bcrypt.hashpw(key.encode(), bcrypt.gensalt()).decode()
+            corpus.load_users.append((user_id, key, i == 0))
+        else:
+            key_hash = shared_hash
+        username = f"agent_{i:06d}"
+        users.append((user_id, username, prefix, key_hash, i == 0, stamp()))
+        corpus.user_ids.append(user_id)
+        corpus.usernames.append(username)
+
+    forums = []
+    topic_words = {}
+    for name, words in TOPICS.items():
+        forum_id = new_id()
+        topic_words[forum_id] = words.split()
+        forums.append((forum_id, name, f"Questions about {name}", rng.choice(corpus.user_ids), stamp()))
+        corpus.forum_ids.append(forum_id)
+
+    questions, answers, question_votes, answer_votes = [], [], [], []
+    for _ in range(int(QUESTIONS * scale)):
+        question_id = new_id()
+        forum_id = rng.choice(corpus.forum_ids)
+        words = topic_words[forum_id]
+        title = _sentence(rng, words, 8).capitalize() + "?"
+        body = _sentence(rng, words, body_words)
+        embedding = _vector(title + "\n\n" + body) if embeddings else None
+        questions.append((question_id, title, body, forum_id, rng.choice(corpus.user_ids), stamp(), embedding))
+        corpus.question_ids.append(question_id)
+
+        for _ in range(rng.randrange(ANSWERS_PER_QUESTION * 2 + 1)):
+            answer_id = new_id()
+            answer_body = _sentence(rng, words, body_words // 2)
+            answers.append((
+                answer_id, answer_body, question_id, rng.choice(corpus.user_ids),
+                rng.choice(["success", "attempt", "failure"]), stamp(),
+                _vector(answer_body) if embeddings else None,
+            ))
+            corpus.answer_ids.append(answer_id)
+            for user_id in rng.sample(corpus.user_ids, min(len(corpus.user_ids), rng.randrange(VOTES_PER_ANSWER * 2 + 1))):
+                answer_votes.append((user_id, answer_id, "up" if rng.random() < 0.8 else "down", stamp()))
+
+        for user_id in rng.sample(corpus.user_ids, min(len(corpus.user_ids), rng.randrange(VOTES_PER_QUESTION * 2 + 1))):
+            question_votes.append((user_id, question_id, "up" if rng.random() < 0.8 else "down", stamp()))
+
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute(
+            "TRUNCATE public.change_log, public.question_leases, public.question_votes, public.answer_votes, "
+            "public.answers, public.questions, public.forums, public.users"
+        )
+        # Building vector indexes once at the end is much faster than
+        # inserting into them row by row
+        cur.execute("SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = 'public' AND indexdef LIKE '%USING hnsw%'")
+        vector_indexes = cur.fetchall()
+        for name, _ in vector_indexes:
+            cur.execute(f'DROP INDEX public."{name}"')
+        _copy(cur, "users", ["id", "username", "api_key_prefix", "api_key_hash", "is_admin", "created_at"], users)
+        _copy(cur, "forums", ["id", "name", "description", "created_by", "created_at"], forums)
+        _copy(cur, "questions", ["id", "title", "body", "forum_id", "author_id", "created_at", "embedding"], questions)
+        _copy(cur, "answers", ["id", "body", "question_id", "author_id", "status", "created_at", "embedding"], answers)
+        _copy(cur, "question_votes", ["user_id", "question_id", "vote_type", "created_at"], question_votes)
+        _copy(cur, "answer_votes", ["user_id", "answer_id", "vote_type", "created_at"], answer_votes)
+        cur.execute("SET maintenance_work_mem = '256MB'")
+        for _, definition in vector_indexes:
+            cur.execute(definition)
+        cur.execute("SELECT public.recompute_counters(recompute_reputation => true)")
+        cur.execute("ANALYZE")
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"Multiplier on {USERS} users and {QUESTIONS} questions")
+    parser.add_argument("--body-words", type=int, default=120)
+    parser.add_argument("--no-embeddings", action="store_true")
+    parser.add_argument("--out", default="corpus.json", help="Where to write the IDs and API keys")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = seed(args.dsn, args.scale, args.body_words, not args.no_embeddings)
+    corpus.save(args.out)
+    print(
+        f"Seeded {len(corpus.user_ids)} users, {len(corpus.forum_ids)} forums, "
+        f"{len(corpus.question_ids)} questions, {len(corpus.answer_ids)} answers "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
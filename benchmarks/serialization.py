@@ -0,0 +1,103 @@
+"""
+Before/after benchmark for list-page response encoding.
+
+"before" is FastAPI's `response_model` path: validate the returned model
+against the response field, dump it, then encode with the stdlib json module.
+"after" is `ORJSONResponse`, which the routes now return directly.
+
+Also reports bytes on the wire for each supported content encoding.
+
+Usage:
+    python -m benchmarks.serialization [--rows 20] [--body-chars 2000] [--iterations 2000]
+"""
+
+import argparse
+import asyncio
+import gzip
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.models.question import QuestionListResponse, QuestionPublic
+from app.utils.compression import brotli, zstandard
+from app.utils.responses import ORJSONResponse
+from benchmarks._data import question_rows
+
+
+def _page(rows: list[dict]) -> QuestionListResponse:
+    return QuestionListResponse(
+        questions=[
+            QuestionPublic(
+                id=r["id"],
+                title=r["title"],
+                body=r["body"],
+                forum_id=r["forum_id"],
+                forum_name=r["forums"]["name"],
+                author_id=r["author_id"],
+                author_username=r["users"]["username"],
+                upvote_count=r["upvote_count"],
+                downvote_count=r["downvote_count"],
+                score=r["score"],
+                answer_count=r["answer_count"],
+                created_at=r["created_at"],
+            )
+            for r in rows
+        ],
+        page=1,
+        total_pages=1,
+    )
+
+
+async def _time_before(page: QuestionListResponse, iterations: int) -> tuple[float, bytes]:
+    route = APIRoute("/questions", lambda: None, response_model=QuestionListResponse)
+    field = route.secure_cloned_response_field
+    body = b""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        content = await serialize_response(field=field, response_content=page)
+        body = JSONResponse(content).body
+    return (time.perf_counter() - start) / iterations, body
+
+
+def _time_after(page: QuestionListResponse, iterations: int) -> tuple[float, bytes]:
+    body = b""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = ORJSONResponse(page).body
+    return (time.perf_counter() - start) / iterations, body
+
+
+def _encoded_sizes(body: bytes) -> dict[str, int]:
+    sizes = {"identity": len(body), "gzip": len(gzip.compress(body, compresslevel=6))}
+    if brotli is not None:
+        sizes["br"] = len(brotli.compress(body, quality=4))
+    if zstandard is not None:
+        sizes["zstd"] = len(zstandard.ZstdCompressor(level=3).compress(body))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--body-chars", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    page = _page(question_rows(args.rows, args.body_chars))
+
+    before, before_body = asyncio.run(_time_before(page, args.iterations))
+    after, after_body = _time_after(page, args.iterations)
+
+    print(f"Serializing a {args.rows}-question page ({args.body_chars}-char bodies)")
+    print(f"  before (response_model + json):  {before * 1e6:8.1f} us/response  {len(before_body):>8} bytes")
+    print(f"  after  (ORJSONResponse):         {after * 1e6:8.1f} us/response  {len(after_body):>8} bytes")
+    print(f"  speedup: {before / after:.1f}x")
+    print()
+    print("Bytes on the wire")
+    for encoding, size in _encoded_sizes(after_body).items():
+        print(f"  {encoding:<9} {size:>8} bytes  ({size / len(after_body):6.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+-- Gives a bare Postgres what Supabase provides and schema.sql assumes:
+-- the extensions and auth schemas, uuid_generate_v4(), auth.uid() and the
+-- API roles. Run by benchmarks/stack.py before schema.sql, on a database
+-- the benchmark owns: it drops the public schema.
+
+DROP SCHEMA IF EXISTS public CASCADE;
+
+CREATE SCHEMA IF NOT EXISTS extensions;
+CREATE OR REPLACE FUNCTION extensions.uuid_generate_v4() RETURNS uuid
+LANGUAGE sql VOLATILE AS 'SELECT gen_random_uuid()';
+
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE OR REPLACE FUNCTION auth.uid() RETURNS uuid
+LANGUAGE sql STABLE AS $$
+    SELECT NULLIF(current_setting('request.jwt.claim.sub', true), '')::uuid;
+$$;
+
+DO $$
+BEGIN
+    CREATE ROLE anon NOLOGIN;
+    CREATE ROLE authenticated NOLOGIN;
+    CREATE ROLE service_role NOLOGIN BYPASSRLS;
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- Supabase puts extension types such as vector on the search path
+DO $$
+BEGIN
+    EXECUTE format('ALTER DATABASE %I SET search_path = public, extensions', current_database());
+END $$;
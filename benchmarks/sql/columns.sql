@@ -0,0 +1,7 @@
+-- Columns the live database has that schema.sql predates. Run after
+-- schema.sql and before the sql/ migrations, which use them.
+
+ALTER TABLE public.users
+    ADD COLUMN IF NOT EXISTS question_count integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS answer_count integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS reputation integer NOT NULL DEFAULT 0;
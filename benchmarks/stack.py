@@ -0,0 +1,168 @@
+"""
+Local stack for end-to-end benchmarks: Postgres, the PostgREST stand-in
+(benchmarks/standin.py) and the app, each in its own process so the load
+generator doesn't share a GIL with what it measures.
+
+Postgres comes from pgserver (`pip install pgserver`), which bundles the
+server binaries and pgvector. The schema is built from
+benchmarks/sql/bootstrap.sql (what Supabase provides), schema.sql,
+benchmarks/sql/columns.sql (columns schema.sql predates) and the sql/
+migrations.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+from benchmarks.seed import Corpus, seed
+
+try:
+    import pgserver
+    from pgserver.postgres_server import POSTGRES_BIN_PATH
+except ImportError:  # only needed to run the stack
+    pgserver = None
+
+ROOT = Path(__file__).resolve().parent.parent
+SQL_DIR = Path(__file__).resolve().parent / "sql"
+
+# Migrations that later ones build on; the rest run in name order
+MIGRATIONS_FIRST = ["soft_delete.sql", "enable_vector_search.sql"]
+
+# schema.sql was dumped from a newer server; this setting is just dropped
+IGNORED_ERRORS = ('unrecognized configuration parameter "transaction_timeout"',)
+
+# Any well-formed JWT; the stand-in doesn't check it
+SERVICE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark"
+
+
+def start_postgres(data_dir: Path):
+    """Start (or reuse) a local server. Returns the pgserver handle."""
+    if pgserver is None:
+        raise RuntimeError("End-to-end benchmarks need pgserver: pip install pgserver")
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return pgserver.get_server(data_dir, cleanup_mode="stop")
+
+
+def schema_files() -> list[Path]:
+    first = [ROOT / "sql" / name for name in MIGRATIONS_FIRST]
+    rest = [p for p in sorted((ROOT / "sql").glob("*.sql")) if p.name not in MIGRATIONS_FIRST]
+    return [SQL_DIR / "bootstrap.sql", ROOT / "schema.sql", SQL_DIR / "columns.sql", *first, *rest]
+
+
+def load_schema(uri: str):
+    """Drop and rebuild the public schema."""
+    for path in schema_files():
+        result = subprocess.run(
+            [str(POSTGRES_BIN_PATH / "psql"), uri, "-X", "-q", "-f", str(path)],
+            capture_output=True, text=True,
+        )
+        errors = [
+            line for line in result.stderr.splitlines()
+            if "ERROR:" in line and not any(ignored in line for ignored in IGNORED_ERRORS)
+        ]
+        if result.returncode != 0 or errors:
+            raise RuntimeError(f"Loading {path.name} failed:\n" + "\n".join(errors or [result.stderr]))
+
+
+def local_database(data_dir: Path, scale: float, reuse: bool):
+    """
+    Start Postgres in data_dir and seed it, or with reuse keep what an
+    earlier run left there. Returns the pgserver handle (keep a reference
+    to it while the server is in use) and the corpus.
+    """
+    corpus_file = data_dir.parent / "corpus.json"
+    server = start_postgres(data_dir)
+    if reuse and corpus_file.exists():
+        return server, Corpus.load(corpus_file)
+    start = time.perf_counter()
+    load_schema(server.get_uri())
+    corpus = seed(server.get_uri(), scale)
+    corpus.save(corpus_file)
+    print(f"Seeded {len(corpus.question_ids)} questions, {len(corpus.answer_ids)} answers "
+          f"in {time.perf_counter() - start:.1f}s")
+    return server, corpus
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+@contextmanager
+def _process(args: list[str], ready_url: str, env: dict | None = None):
+    process = subprocess.Popen(args, cwd=ROOT, env={**os.environ, **(env or {})})
+    try:
+        _wait_ready(ready_url, process)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextmanager
+def run_standin(dsn: str, pool_size: int = 16, embedding_latency_ms: float = 0.0):
+    """Run the PostgREST stand-in. Yields its base URL."""
+    port = free_port()
+    args = [
+        sys.executable, "-m", "benchmarks.standin", "--dsn", dsn, "--port", str(port),
+        "--pool-size", str(pool_size), "--embedding-latency-ms", str(embedding_latency_ms),
+    ]
+    url = f"http://127.0.0.1:{port}"
+    with _process(args, f"{url}/rest/v1/forums?limit=1"):
+        yield url
+
+
+@contextmanager
+def run_app(standin_url: str, env: dict[str, str] | None = None, workers: int = 1, server: str = "uvicorn"):
+    """
+    Run the app against the stand-in, under plain uvicorn or the production
+    gunicorn profile (gunicorn.conf.py). Yields its base URL.
+    """
+    port = free_port()
+    app_env = {
+        "SUPABASE_URL": standin_url,
+        "SUPABASE_SERVICE_KEY": SERVICE_KEY,
+        # Embeddings come from the stand-in's fake provider
+        "LLM_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"{standin_url}/v1",
+        "LLM_BASE_URL": "",
+        # The load generator is one client; per-key limits would just throttle it
+        "RATE_LIMIT_BACKEND": "off",
+        **(env or {}),
+    }
+    if server == "gunicorn":
+        args = [
+            sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning",
+        ]
+    else:
+        args = [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--no-access-log", "--log-level", "warning",
+        ]
+    url = f"http://127.0.0.1:{port}"
+    with _process(args, f"{url}/", app_env):
+        yield url
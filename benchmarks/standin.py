@@ -0,0 +1,545 @@
+"""
+PostgREST stand-in for local benchmarks.
+
+Serves the subset of the PostgREST API that the app's supabase client uses,
+translated to SQL against a real Postgres, so benchmark requests pay for real
+queries, indexes and RPCs:
+
+- GET/POST/PATCH/DELETE /rest/v1/<table> with `select` (columns, computed
+  columns such as body_excerpt, and to-one / to-many embeds with `!fkey` and
+  `!inner` hints), eq/neq/gt/gte/lt/lte/like/ilike/in/is filters, `not.`,
+  `or=(...)`, filters on embedded columns, order/limit/offset,
+  `Prefer: count=exact`, `return=` and upserts with `on_conflict`
+- POST /rest/v1/rpc/<function> with named JSON arguments
+- POST /v1/embeddings, an OpenAI-compatible endpoint returning
+  deterministic hashed bag-of-words vectors (benchmarks._data.fake_embedding)
+
+It runs with the database owner's rights, like the service role key the app
+uses, so row level security doesn't apply. Anything outside the subset gets a
+PostgREST-style 400 error.
+
+Usage:
+    python -m benchmarks.standin --dsn postgresql://... [--port 54321]
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.pool
+
+from benchmarks._data import fake_embedding
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE", "ilike": "ILIKE"}
+_IS_VALUES = {"null": "NULL", "true": "TRUE", "false": "FALSE", "unknown": "UNKNOWN"}
+_MODIFIERS = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+
+class RequestError(Exception):
+    """Maps to a PostgREST error response."""
+
+    def __init__(self, message: str, status: int = 400, code: str = "PGRST100"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _ident(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise RequestError(f"Invalid identifier: {name}")
+    return f'"{name}"'
+
+
+def split_top(text: str, sep: str = ",") -> list[str]:
+    """Split on sep outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == sep and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _literal(value: str) -> str:
+    # Safe with standard_conforming_strings, which is on by default
+    if "\x00" in value:
+        raise RequestError("Invalid value")
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+# ============ Schema ============
+
+class Catalog:
+    """Tables, foreign keys and functions of the public schema."""
+
+    def __init__(self, conn):
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT c.relname, a.attname
+                FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public' AND c.relkind IN ('r', 'v', 'p')
+                  AND a.attnum > 0 AND NOT a.attisdropped
+                ORDER BY c.relname, a.attnum
+            """)
+            self.columns: dict[str, list[str]] = {}
+            for table, column in cur.fetchall():
+                self.columns.setdefault(table, []).append(column)
+
+            cur.execute("""
+                SELECT con.conname, con.contype, src.relname, dst.relname,
+                       array(SELECT attname FROM unnest(con.conkey) WITH ORDINALITY k(n, i)
+                             JOIN pg_attribute ON attrelid = con.conrelid AND attnum = k.n ORDER BY k.i),
+                       array(SELECT attname FROM unnest(con.confkey) WITH ORDINALITY k(n, i)
+                             JOIN pg_attribute ON attrelid = con.confrelid AND attnum = k.n ORDER BY k.i)
+                FROM pg_constraint con
+                JOIN pg_class src ON src.oid = con.conrelid
+                LEFT JOIN pg_class dst ON dst.oid = con.confrelid
+                JOIN pg_namespace n ON n.oid = src.relnamespace
+                WHERE n.nspname = 'public' AND con.contype IN ('f', 'p')
+            """)
+            # (name, table, columns, referenced table, referenced columns)
+            self.foreign_keys: list[tuple[str, str, list[str], str, list[str]]] = []
+            self.primary_keys: dict[str, list[str]] = {}
+            for name, kind, table, ref_table, columns, ref_columns in cur.fetchall():
+                if kind == "p":
+                    self.primary_keys[table] = columns
+                else:
+                    self.foreign_keys.append((name, table, columns, ref_table, ref_columns))
+
+            cur.execute("""
+                SELECT p.proname, p.proretset, t.typtype, format_type(p.prorettype, NULL),
+                       coalesce(p.proargnames, '{}'), coalesce(p.proargmodes::text[], '{}'),
+                       array(SELECT format_type(oid, NULL) FROM unnest(p.proargtypes) WITH ORDINALITY a(oid, i) ORDER BY i)
+                FROM pg_proc p
+                JOIN pg_namespace n ON n.oid = p.pronamespace
+                JOIN pg_type t ON t.oid = p.prorettype
+                WHERE n.nspname = 'public' AND p.prokind = 'f'
+            """)
+            self.functions: dict[str, dict] = {}
+            self.computed: set[tuple[str, str]] = set()
+            for name, returns_set, ret_kind, ret_type, arg_names, arg_modes, arg_types in cur.fetchall():
+                # Input argument names line up with proargtypes
+                names = [n for n, mode in zip(arg_names, arg_modes or ["i"] * len(arg_names)) if mode in ("i", "b", "v")]
+                if len(arg_types) == 1 and arg_types[0].removeprefix("public.") in self.columns and not names:
+                    self.computed.add((arg_types[0].removeprefix("public."), name))
+                    continue
+                self.functions[name] = {
+                    "args": dict(zip(names, arg_types)),
+                    "set": returns_set,
+                    "composite": ret_kind == "c" or ret_type == "record",
+                    "void": ret_type == "void",
+                }
+
+    def relation(self, table: str, target: str, hint: str | None) -> tuple[str, list[str], list[str], bool]:
+        """Join columns from table to target: (constraint, own columns, target columns, to_one)."""
+        matches = []
+        for name, src, columns, dst, ref_columns in self.foreign_keys:
+            if hint is not None and name != hint:
+                continue
+            if src == table and dst == target:
+                matches.append((name, columns, ref_columns, True))
+            elif src == target and dst == table:
+                matches.append((name, ref_columns, columns, False))
+        if len(matches) != 1:
+            raise RequestError(
+                f"Could not find a unique relationship between '{table}' and '{target}'", code="PGRST200",
+            )
+        return matches[0]
+
+
+# ============ Query compilation ============
+
+class Compiler:
+    """Builds SQL for one request. Values are inlined as quoted literals."""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.aliases = 0
+
+    def alias(self) -> str:
+        self.aliases += 1
+        return f"_r{self.aliases}"
+
+    def column(self, table: str, name: str) -> str:
+        if name not in self.catalog.columns.get(table, ()):
+            raise RequestError(f"Column '{name}' does not exist in '{table}'", code="42703")
+        return _ident(name)
+
+    # ---- select ----
+
+    def select_items(self, table: str, alias: str, select: str, embed_filters: dict) -> tuple[str, list[str]]:
+        """Select list for rows of table aliased as alias, and EXISTS conditions for !inner embeds."""
+        items, inner = [], []
+        for item in split_top(select or "*"):
+            if "(" in item:
+                sql, condition = self.embed(table, alias, item, embed_filters)
+                items.append(sql)
+                if condition:
+                    inner.append(condition)
+                continue
+            label, _, name = item.rpartition(":") if "::" not in item else ("", "", item)
+            name, _, cast = name.partition("::")
+            if name == "*":
+                items.append(f"{alias}.*")
+            elif name in self.catalog.columns.get(table, ()):
+                expr = f"{alias}.{_ident(name)}"
+                if cast:
+                    expr += f"::{_ident(cast)}"
+                items.append(f"{expr} AS {_ident(label or name)}")
+            elif (table, name) in self.catalog.computed:
+                items.append(f"public.{_ident(name)}({alias}) AS {_ident(label or name)}")
+            else:
+                raise RequestError(f"Column '{name}' does not exist in '{table}'", code="42703")
+        return ", ".join(items), inner
+
+    def embed(self, table: str, alias: str, item: str, embed_filters: dict) -> tuple[str, str | None]:
+        head, _, rest = item.partition("(")
+        label, _, target = head.rpartition(":")
+        target, *hints = target.split("!")
+        inner = "inner" in hints
+        hints = [h for h in hints if h not in ("inner", "left")]
+        key = label or target
+        constraint, own, theirs, to_one = self.catalog.relation(table, target, hints[0] if hints else None)
+
+        sub = self.alias()
+        join = " AND ".join(f"{sub}.{_ident(t)} = {alias}.{_ident(o)}" for o, t in zip(own, theirs))
+        conditions = [join] + [self.condition(target, sub, k, v) for k, v in embed_filters.get(key, [])]
+        where = " AND ".join(conditions)
+        items, nested = self.select_items(target, sub, rest[:-1], {})
+        where = " AND ".join([where] + nested)
+        if to_one:
+            sql = f"(SELECT to_json(_e) FROM (SELECT {items} FROM public.{_ident(target)} AS {sub} WHERE {where}) _e)"
+        else:
+            sql = (
+                f"(SELECT coalesce(json_agg(_e), '[]') FROM "
+                f"(SELECT {items} FROM public.{_ident(target)} AS {sub} WHERE {where}) _e)"
+            )
+        exists = f"EXISTS (SELECT 1 FROM public.{_ident(target)} AS {sub} WHERE {where})" if inner else None
+        return f"{sql} AS {_ident(key)}", exists
+
+    # ---- filters ----
+
+    def condition(self, table: str, alias: str, column: str, expression: str) -> str:
+        if column in ("or", "and"):
+            parts = []
+            for part in split_top(expression.strip()[1:-1]):
+                if part.startswith(("or(", "and(")):
+                    name, _, inner = part.partition("(")
+                    parts.append(self.condition(table, alias, name, "(" + inner))
+                else:
+                    col, _, expr = part.partition(".")
+                    parts.append(self.condition(table, alias, col, expr))
+            return "(" + f" {column.upper()} ".join(parts) + ")"
+
+        negate = expression.startswith("not.")
+        if negate:
+            expression = expression[4:]
+        op, _, value = expression.partition(".")
+        target = f"{alias}.{self.column(table, column)}"
+        if op in _OPERATORS:
+            if op in ("like", "ilike"):
+                value = value.replace("*", "%")
+            sql = f"{target} {_OPERATORS[op]} {_literal(_unquote(value))}"
+        elif op == "in":
+            values = [_unquote(v) for v in split_top(value[1:-1])]
+            if values:
+                sql = f"{target} IN ({', '.join(_literal(v) for v in values)})"
+            else:
+                sql = "FALSE"
+        elif op == "is" and value in _IS_VALUES:
+            sql = f"{target} IS {_IS_VALUES[value]}"
+        else:
+            raise RequestError(f"Unsupported filter: {column}={expression}")
+        return f"NOT ({sql})" if negate else sql
+
+    def where(self, table: str, alias: str, query: list[tuple[str, str]]) -> tuple[list[str], dict]:
+        conditions, embed_filters = [], {}
+        for key, value in query:
+            if key in _MODIFIERS:
+                continue
+            if "." in key:
+                embed, _, column = key.partition(".")
+                embed_filters.setdefault(embed, []).append((column, value))
+                continue
+            conditions.append(self.condition(table, alias, key, value))
+        return conditions, embed_filters
+
+    def order(self, table: str, alias: str, order: str) -> str:
+        terms = []
+        for term in split_top(order):
+            column, *flags = term.split(".")
+            sql = f"{alias}.{self.column(table, column)}"
+            if "desc" in flags:
+                sql += " DESC"
+            if "nullsfirst" in flags:
+                sql += " NULLS FIRST"
+            elif "nullslast" in flags:
+                sql += " NULLS LAST"
+            terms.append(sql)
+        return ", ".join(terms)
+
+
+# ============ Request handling ============
+
+def _prefer(headers) -> dict[str, str]:
+    prefer = {}
+    for part in (headers.get("Prefer") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            prefer[name] = value
+    return prefer
+
+
+class StandIn:
+    """Executes PostgREST requests against a connection pool."""
+
+    def __init__(self, dsn: str, pool_size: int, embedding_latency: float = 0.0):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(1, pool_size, dsn)
+        self.slots = threading.BoundedSemaphore(pool_size)
+        self.embedding_latency = embedding_latency
+        with self.connection() as conn:
+            self.catalog = Catalog(conn)
+
+    @contextmanager
+    def connection(self):
+        with self.slots:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn)
+
+    def fetch(self, sql: str, params: list) -> str | None:
+        """First column of the first row, if the statement returns one."""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone() if cur.description else None
+            return row[0] if row else None
+
+    # ---- tables ----
+
+    def table(self, method: str, table: str, query: list[tuple[str, str]], headers, body) -> tuple[int, dict, str]:
+        if table not in self.catalog.columns:
+            raise RequestError(f"Could not find the table 'public.{table}' in the schema cache", 404, "PGRST205")
+        args = dict(query)
+        prefer = _prefer(headers)
+        c = Compiler(self.catalog)
+        conditions, embed_filters = c.where(table, "_t", query)
+        items, inner = c.select_items(table, "_t", args.get("select", "*"), embed_filters)
+        conditions += inner
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        if method == "GET":
+            sql = f"SELECT {items} FROM public.{_ident(table)} AS _t{where}"
+            if "order" in args:
+                sql += f" ORDER BY {c.order(table, '_t', args['order'])}"
+            if "limit" in args:
+                sql += f" LIMIT {int(args['limit'])}"
+            offset = int(args.get("offset", 0))
+            if offset:
+                sql += f" OFFSET {offset}"
+            count = None
+            with self.connection() as conn, conn.cursor() as cur:
+                cur.execute(f"SELECT json_agg(_q)::text, count(*) FROM ({sql}) _q")
+                data, returned = cur.fetchone()
+                if prefer.get("count") in ("exact", "planned", "estimated"):
+                    cur.execute(f"SELECT count(*) FROM public.{_ident(table)} AS _t{where}")
+                    count = cur.fetchone()[0]
+            content_range = f"{offset}-{offset + returned - 1}" if returned else "*"
+            headers = {"Content-Range": f"{content_range}/{count if count is not None else '*'}"}
+            return 200, headers, data or "[]"
+
+        if method == "POST":
+            rows = body if isinstance(body, list) else [body]
+            columns = sorted({key for row in rows for key in row})
+            cols = ", ".join(c.column(table, name) for name in columns)
+            write = (
+                f"INSERT INTO public.{_ident(table)} AS _t ({cols}) SELECT {cols} "
+                f"FROM json_populate_recordset(NULL::public.{_ident(table)}, {_literal(json.dumps(rows))}::json)"
+            )
+            resolution = prefer.get("resolution")
+            if resolution:
+                target = args.get("on_conflict")
+                keys = [_unquote(k) for k in target.split(",")] if target else self.catalog.primary_keys[table]
+                conflict = ", ".join(c.column(table, k) for k in keys)
+                updates = ", ".join(f"{_ident(k)} = EXCLUDED.{_ident(k)}" for k in columns if k not in keys)
+                if resolution == "merge-duplicates" and updates:
+                    write += f" ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+                else:
+                    write += f" ON CONFLICT ({conflict}) DO NOTHING"
+            status = 201
+        elif method == "PATCH":
+            cols = ", ".join(c.column(table, name) for name in body)
+            write = (
+                f"UPDATE public.{_ident(table)} AS _t SET ({cols}) = (SELECT {cols} "
+                f"FROM json_populate_record(NULL::public.{_ident(table)}, {_literal(json.dumps(body))}::json)){where}"
+            )
+            status = 200
+        elif method == "DELETE":
+            write = f"DELETE FROM public.{_ident(table)} AS _t{where}"
+            status = 200
+        else:
+            raise RequestError(f"Unsupported method {method}", 405)
+
+        if prefer.get("return") == "representation":
+            sql = (
+                f"WITH _w AS ({write} RETURNING _t.*) "
+                f"SELECT coalesce(json_agg(_q), '[]')::text FROM (SELECT {items} FROM _w AS _t) _q"
+            )
+            data = self.fetch(sql, [])
+            return status, {}, data
+        self.fetch(write, [])
+        return 201 if method == "POST" else 204, {}, ""
+
+    # ---- rpc ----
+
+    def rpc(self, name: str, args: dict) -> tuple[int, dict, str]:
+        function = self.catalog.functions.get(name)
+        if function is None:
+            raise RequestError(f"Could not find the function public.{name}", 404, "PGRST202")
+        params, named = [], []
+        for key, value in args.items():
+            if key not in function["args"]:
+                raise RequestError(f"Function public.{name} has no argument {key}", 404, "PGRST202")
+            arg_type = function["args"][key]
+            if arg_type in ("json", "jsonb") or (isinstance(value, (dict, list)) and not arg_type.endswith("[]")):
+                value = json.dumps(value)
+            params.append(value)
+            named.append(f"{_ident(key)} := %s::{arg_type}")
+        call = f"public.{_ident(name)}({', '.join(named)})"
+        if function["void"]:
+            self.fetch(f"SELECT {call}", params)
+            return 204, {}, ""
+        if function["set"]:
+            sql = f"SELECT coalesce(json_agg(_r), '[]')::text FROM {call} _r"
+        elif function["composite"]:
+            sql = f"SELECT to_json(_r)::text FROM {call} _r"
+        else:
+            sql = f"SELECT to_json({call})::text"
+        data = self.fetch(sql, params)
+        return 200, {}, data if data is not None else "null"
+
+    # ---- embeddings ----
+
+    def embeddings(self, body: dict) -> tuple[int, dict, str]:
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        if self.embedding_latency:
+            time.sleep(self.embedding_latency)
+        data = [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(len(text.split()) for text in inputs)
+        return 200, {}, json.dumps({
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def handle(self, method: str, path: str, query: list[tuple[str, str]], headers, body):
+        parts = [p for p in path.split("/") if p]
+        if parts[:2] == ["rest", "v1"] and len(parts) == 4 and parts[2] == "rpc":
+            return self.rpc(parts[3], body or {})
+        if parts[:2] == ["rest", "v1"] and len(parts) == 3:
+            return self.table(method, parts[2], query, headers, body)
+        if parts == ["v1", "embeddings"] and method == "POST":
+            return self.embeddings(body)
+        raise RequestError(f"Not found: {path}", 404, "PGRST125")
+
+
+def _handler(standin: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; with Nagle on, every
+        # response waits for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else None
+                query = parse_qsl(url.query, keep_blank_values=True)
+                status, headers, data = standin.handle(self.command, url.path, query, self.headers, body)
+            except RequestError as e:
+                status, headers, data = e.status, {}, json.dumps(
+                    {"code": e.code, "message": str(e), "details": None, "hint": None},
+                )
+            except psycopg2.Error as e:
+                status = 409 if isinstance(e, (psycopg2.errors.UniqueViolation, psycopg2.errors.ForeignKeyViolation)) else 400
+                headers, data = {}, json.dumps({
+                    "code": e.pgcode,
+                    "message": e.diag.message_primary if e.diag else str(e),
+                    "details": e.diag.message_detail if e.diag else None,
+                    "hint": e.diag.message_hint if e.diag else None,
+                })
+            payload = data.encode() if data else b""
+            self.send_response(status)
+            if payload:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if payload:
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+    return Handler
+
+
+def serve(dsn: str, host: str, port: int, pool_size: int, embedding_latency: float = 0.0):
+    server = ThreadingHTTPServer((host, port), _handler(StandIn(dsn, pool_size, embedding_latency)))
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--pool-size", type=int, default=16)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0,
+                        help="Simulated embedding provider latency")
+    args = parser.parse_args()
+    serve(args.dsn, args.host, args.port, args.pool_size, args.embedding_latency_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
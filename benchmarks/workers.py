@@ -0,0 +1,143 @@
+"""
+Throughput against worker count for the production server profile.
+
+Runs the app under gunicorn.conf.py with each --workers value in turn, plus
+single-process uvicorn as the reference, against the local stack
+(benchmarks/stack.py). Each run drives the same weighted mix of routes
+(MIX) with --concurrency clients for --seconds and reports requests per
+second and latency percentiles.
+
+The mix includes authenticated requests, whose bcrypt check is CPU-bound,
+and search, which is the most expensive read. The stand-in and the load
+generator share the machine with the workers, so scaling flattens before
+the CPU count; watch `top` to see which process saturates first.
+
+gunicorn.conf.py refuses several workers with in-memory events or row
+cache, so runs with more than one worker need --redis-url; they use the
+Redis event and row cache backends (the rate limit is off throughout).
+Without it only single-worker runs are made.
+
+Usage:
+    python -m benchmarks.workers [--workers 1,2,4] [--redis-url redis://...] [--concurrency 64] [--seconds 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks import stack
+from benchmarks.e2e import SCENARIOS, Context, _percentile, _send
+from benchmarks.seed import Corpus
+
+# Scenario name -> relative weight
+MIX = {
+    "GET /questions/{question_id}": 4,
+    "GET /questions/{question_id}/answers": 2,
+    "GET /questions": 2,
+    "GET /users/{user_id}": 2,
+    "GET /questions/search": 1,
+    "GET /users/me": 1,
+    "POST /questions/{question_id}/vote": 1,
+}
+
+
+async def run_mix(base_url: str, corpus: Corpus, concurrency: int, seconds: float, warmup: float) -> dict:
+    ctx = Context(corpus, random.Random(1))
+    scenarios = {s.name: s for s in SCENARIOS}
+    names, weights = list(MIX), list(MIX.values())
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker(until: float, record: bool):
+            while time.perf_counter() < until:
+                scenario = scenarios[ctx.rng.choices(names, weights)[0]]
+                elapsed, status = await _send(client, scenario.build(ctx))
+                if record:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+
+        await asyncio.gather(*(worker(time.perf_counter() + warmup, False) for _ in range(concurrency)))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(start + seconds, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": sum(n for status, n in statuses.items() if status >= 500),
+        "status": {str(status): n for status, n in sorted(statuses.items())},
+        "throughput_rps": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated gunicorn worker counts")
+    parser.add_argument("--no-reference", action="store_true", help="Skip the plain uvicorn run")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--data-dir", default=".bench/pgdata")
+    parser.add_argument("--reuse", action="store_true", help="Keep the database an earlier run seeded")
+    parser.add_argument("--pool-size", type=int, default=32, help="Stand-in database connections")
+    parser.add_argument("--redis-url", help="Redis for the event and row cache backends of multi-worker runs")
+    parser.add_argument("--out", default="workers-results.json")
+    args = parser.parse_args()
+
+    runs = [] if args.no_reference else [("uvicorn", 1)]
+    runs += [("gunicorn", int(n)) for n in args.workers.split(",")]
+    if args.redis_url is None and any(workers > 1 for _, workers in runs):
+        print("Skipping runs with more than one worker: they need --redis-url")
+        runs = [(server_name, workers) for server_name, workers in runs if workers == 1]
+
+    server, corpus = stack.local_database(Path(args.data_dir), args.scale, args.reuse)
+    results = []
+    print(f"{os.cpu_count()} CPUs, concurrency {args.concurrency}, {args.seconds:.0f}s per run")
+    print(f"{'server':<10} {'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    with stack.run_standin(server.get_uri(), pool_size=args.pool_size) as standin_url:
+        for server_name, workers in runs:
+            env = None
+            if workers > 1:
+                env = {"EVENT_BACKEND": "redis", "ROW_CACHE_BACKEND": "redis", "REDIS_URL": args.redis_url}
+            with stack.run_app(standin_url, env, workers=workers, server=server_name) as app_url:
+                result = asyncio.run(run_mix(app_url, corpus, args.concurrency, args.seconds, args.warmup))
+            results.append({"server": server_name, "workers": workers, "shared_state": env is not None, **result})
+            print(
+                f"{server_name:<10} {workers:>7} {result['throughput_rps']:8.1f} {result['p50_ms']:8.1f} "
+                f"{result['p95_ms']:8.1f} {result['p99_ms']:8.1f} {result['errors']:>7}"
+            )
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "cpus": os.cpu_count(),
+                "concurrency": args.concurrency,
+                "seconds": args.seconds,
+                "mix": MIX,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "runs": results,
+        }, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
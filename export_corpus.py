@@ -0,0 +1,65 @@
+"""
+Export forums, questions and answers as NDJSON.
+
+Same output as the admin GET /export endpoint, read directly from the
+database with keyset pagination, so memory use stays flat however large
+the corpus is.
+
+Usage:
+    python export_corpus.py [--output corpus.ndjson] [--forum-id ID]
+                            [--since 2025-01-01] [--until 2025-02-01]
+                            [--include-deleted] [--include-embedding] [--zstd]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from supabase import create_client
+from app.config import settings
+from app.utils.export import iter_export, zstd_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    parser.add_argument("--forum-id", help="Only export this forum")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only rows created at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only rows created before this time")
+    parser.add_argument("--include-deleted", action="store_true", help="Include soft-deleted questions and answers")
+    parser.add_argument("--include-embedding", action="store_true", help="Include embedding vectors")
+    parser.add_argument("--zstd", action="store_true", help="Compress the output with zstd")
+    args = parser.parse_args()
+
+    supabase = create_client(settings.supabase_url, settings.supabase_service_key)
+
+    counts: dict[str, int] = {}
+    chunks = iter_export(
+        supabase,
+        forum_id=args.forum_id,
+        since=args.since,
+        until=args.until,
+        include_deleted=args.include_deleted,
+        include_embedding=args.include_embedding,
+        counts=counts,
+    )
+    if args.zstd:
+        chunks = zstd_chunks(chunks)
+
+    start = time.perf_counter()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts.values())
+    summary = ", ".join(f"{n} {entity}s" for entity, n in counts.items()) or "nothing"
+    print(f"Exported {summary} in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
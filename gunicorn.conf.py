@@ -0,0 +1,95 @@
+"""
+Production server: gunicorn managing uvicorn workers, configured from
+Settings (see the "Production server" group in app/config.py).
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+With SERVER_PRELOAD the app is imported once in the master before workers
+fork, so they share its read-only pages (code, models, the OpenAPI schema)
+and a broken import fails the deploy instead of every worker. Anything
+that opens connections or starts tasks does so in the lifespan, which runs
+in each worker.
+
+WEB_CONCURRENCY defaults to one worker. Several workers only behave like one
+when the state they must agree on lives in Redis: SSE fan-out
+(EVENT_BACKEND), the row cache and the rate limit buckets. on_starting()
+refuses to start more than one worker while any of those is "memory". The
+forum, username and vote caches are always per worker. Forums reload on an
+unknown id and usernames never change. A vote cast through one worker shows
+up in user_vote on the others within VOTE_CACHE_TTL_SECONDS. Admission
+limits and SSE subscriber caps apply per worker.
+
+There is no one-per-CPU default. os.cpu_count() reports the host's CPUs,
+not a container's quota, and on Railway (nixpacks) that is far more than
+the service may use.
+
+Workers share Prometheus metrics through files in PROMETHEUS_MULTIPROC_DIR
+(prometheus_client multiprocess mode), so a scrape answered by any worker
+covers all of them. The directory is emptied when gunicorn starts, and an
+exited worker's live gauges are dropped from it (child_exit).
+"""
+
+import os
+import shutil
+import tempfile
+
+from uvicorn_worker import UvicornWorker
+
+from app.config import settings
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": settings.server_loop, "http": settings.server_http}
+
+
+# Setting -> backend; "memory" keeps a separate copy in every worker
+SHARED_STATE_BACKENDS = {
+    "EVENT_BACKEND": settings.event_backend,
+    "ROW_CACHE_BACKEND": settings.row_cache_backend,
+    "RATE_LIMIT_BACKEND": settings.rate_limit_backend,
+}
+
+
+# Read by prometheus_client when the app imports it, which happens after
+# this file is loaded (also with preload_app). Emptied once per master:
+# files left by an earlier run would be summed into this one's counters,
+# while a reload (HUP) re-reads this file with live workers still writing.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"chatoverflow-metrics-{settings.port}"),
+)
+if os.environ.get("CHATOVERFLOW_METRICS_DIR_PID") != str(os.getpid()):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    os.environ["CHATOVERFLOW_METRICS_DIR_PID"] = str(os.getpid())
+
+
+def on_starting(server):
+    # server.cfg, not `workers` below: --workers on the command line wins
+    per_worker = [name for name, backend in SHARED_STATE_BACKENDS.items() if backend == "memory"]
+    if server.cfg.workers > 1 and per_worker:
+        raise RuntimeError(
+            f"{server.cfg.workers} workers need shared state, but these are memory: {', '.join(per_worker)}. "
+            "Use redis (or off for the row cache and rate limit), or run one worker"
+        )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+bind = f"{settings.server_host}:{settings.port}"
+workers = settings.web_concurrency
+worker_class = Worker
+preload_app = settings.server_preload
+
+backlog = settings.server_backlog
+# Longer than the proxy's idle timeout, so the proxy closes idle
+# connections rather than racing us to it
+keepalive = settings.server_keepalive_seconds
+# The event loop heartbeats the master; a worker blocked for longer is killed
+timeout = settings.server_timeout_seconds
+graceful_timeout = settings.server_graceful_timeout_seconds
+max_requests = settings.server_max_requests
+max_requests_jitter = settings.server_max_requests_jitter
@@ -0,0 +1,58 @@
+"""
+Bulk-import users, forums, questions, answers and votes.
+
+Reads NDJSON (one row per line with a `type` of user, forum, question,
+answer, question_vote or answer_vote, as written by export_corpus.py; .zst
+files are decompressed on the fly) and/or COPY text files with a header
+line. Rows are validated in chunks, loaded in foreign-key order with
+batched upserts and a few requests in flight per table, and the cached
+counters are recomputed once at the end (needs sql/recompute_counters.sql).
+
+Usage:
+    python import_corpus.py corpus.ndjson [more.ndjson.zst ...]
+    python import_corpus.py --copy users=users.copy --copy questions=questions.copy
+    Options: [--batch-size 1000] [--workers 4] [--skip-recompute] [--recompute-reputation]
+"""
+
+import argparse
+import itertools
+from supabase import create_client
+from app.config import settings
+from app.utils.bulk_import import BATCH_SIZE, TABLES_BY_NAME, WORKERS, import_records, read_copy, read_ndjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="NDJSON files ('-' for stdin)")
+    parser.add_argument("--copy", action="append", default=[], metavar="TABLE=FILE",
+                        help="COPY text-format file with a header line for TABLE (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per upsert request")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Upsert requests in flight per table")
+    parser.add_argument("--skip-recompute", action="store_true",
+                        help="Don't recompute counters at the end; import the input's counter columns instead")
+    parser.add_argument("--recompute-reputation", action="store_true",
+                        help="Also reset user reputation to the total score of their posts")
+    args = parser.parse_args()
+
+    sources = [read_ndjson(path) for path in args.files]
+    for spec in args.copy:
+        table, _, path = spec.partition("=")
+        if table not in TABLES_BY_NAME or not path:
+            parser.error(f"--copy expects TABLE=FILE with TABLE one of {', '.join(TABLES_BY_NAME)}")
+        sources.append(read_copy(path, table))
+    if not sources:
+        parser.error("nothing to import")
+
+    supabase = create_client(settings.supabase_url, settings.supabase_service_key)
+    import_records(
+        supabase,
+        itertools.chain.from_iterable(sources),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        recompute=not args.skip_recompute,
+        recompute_reputation=args.recompute_reputation,
+    )
+
+
+if __name__ == "__main__":
+    main()
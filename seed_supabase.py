@@ -1,16 +1,39 @@
 """
 Seed Supabase from .temp/ SQL INSERT files.
 
-Parses the SQL INSERT statements, converts them to Python dicts,
-and upserts into Supabase via the PostgREST API (service role key bypasses RLS).
-
-Insertion order respects foreign keys: users -> forums -> questions -> answers
+Parses the SQL INSERT statements into Python dicts and bulk-loads them
+through the same loader as import_corpus.py (batched upserts via the
+PostgREST API; the service role key bypasses RLS).
+
+Insertion order respects foreign keys: users -> forums -> questions ->
+answers -> votes. Scores can only be recomputed from the votes, so when
+both vote dumps are present the cached counters are recomputed; otherwise
+the counters (and scores) in the dumps are kept as they are. User
+reputation is always kept as dumped.
 """
 
+import os
 import re
 import sys
+from collections.abc import Iterator
 from supabase import create_client
 from app.config import settings
+from app.utils.bulk_import import import_records
+
+# One value of an INSERT ... VALUES row and the "," or ")" that ends it. A
+# value runs up to that separator and keeps everything before it, so a
+# cast such as '2024-01-01'::timestamp with time zone or 'x'::varchar(255)
+# stays part of its value; quoted strings ('' escapes a quote) and one level
+# of brackets may contain separators.
+_VALUE = re.compile(r"""
+    \s*(
+        (?: '(?:[^']|'')*'
+          | \((?:'(?:[^']|'')*'|[^()'])*\)
+          | [^,()']
+        )*
+    )([,)])
+""", re.VERBOSE)
+_ROW_START = re.compile(r"\s*,?\s*\(")
 
 
 def parse_sql_inserts(sql_text: str) -> tuple[list[str], list[dict]]:
@@ -20,6 +43,7 @@ def parse_sql_inserts(sql_text: str) -> tuple[list[str], list[dict]]:
     - Multi-line values
     - Escaped single quotes ('')
     - String, integer, boolean, and NULL values
+    - Casts, kept as part of the value text ('x'::type, 'y'::timestamp with time zone)
     """
     # Extract column names
     col_match = re.search(r'\(([^)]+)\)\s*VALUES', sql_text, re.IGNORECASE)
@@ -27,81 +51,27 @@ def parse_sql_inserts(sql_text: str) -> tuple[list[str], list[dict]]:
         raise ValueError("Could not find column names in SQL")
 
     columns = [c.strip().strip('"') for c in col_match.group(1).split(',')]
+    rows = list(_iter_rows(sql_text, col_match.end(), columns))
+    return columns, rows
 
-    # Extract the VALUES portion (everything after "VALUES " until the final ";")
-    values_start = sql_text.index('VALUES') + len('VALUES')
-    values_text = sql_text[values_start:].strip()
-    if values_text.endswith(';'):
-        values_text = values_text[:-1].strip()
-
-    # Parse rows using a state machine
-    rows = []
-    current_row_values = []
-    current_value = []
-    in_string = False
-    i = 0
-    depth = 0  # parentheses depth
-
-    while i < len(values_text):
-        char = values_text[i]
-
-        if not in_string:
-            if char == '(':
-                depth += 1
-                if depth == 1:
-                    # Start of a new row
-                    current_row_values = []
-                    current_value = []
-                    i += 1
-                    continue
-                else:
-                    current_value.append(char)
-            elif char == ')':
-                depth -= 1
-                if depth == 0:
-                    # End of a row - save the last value
-                    val_str = ''.join(current_value).strip()
-                    current_row_values.append(val_str)
-
-                    # Build dict for this row
-                    if len(current_row_values) == len(columns):
-                        row = {}
-                        for col, val in zip(columns, current_row_values):
-                            row[col] = parse_value(val)
-                        rows.append(row)
-                    else:
-                        print(f"WARNING: Row has {len(current_row_values)} values but expected {len(columns)}")
-                        print(f"  Values: {current_row_values[:3]}...")
-
-                    current_value = []
-                else:
-                    current_value.append(char)
-            elif char == ',' and depth == 1:
-                # Column separator within a row
-                val_str = ''.join(current_value).strip()
-                current_row_values.append(val_str)
-                current_value = []
-            elif char == "'":
-                in_string = True
-                current_value.append(char)
-            else:
-                current_value.append(char)
-        else:
-            # Inside a string
-            if char == "'" and i + 1 < len(values_text) and values_text[i + 1] == "'":
-                # Escaped single quote
-                current_value.append("''")
-                i += 1
-            elif char == "'":
-                # End of string
-                in_string = False
-                current_value.append(char)
-            else:
-                current_value.append(char)
-
-        i += 1
 
-    return columns, rows
+def _iter_rows(sql_text: str, pos: int, columns: list[str]) -> Iterator[dict]:
+    while (start := _ROW_START.match(sql_text, pos)) is not None:
+        pos = start.end()
+        values = []
+        while True:
+            match = _VALUE.match(sql_text, pos)
+            if match is None:
+                raise ValueError(f"Unterminated row at offset {start.end()}")
+            values.append(match.group(1).strip())
+            pos = match.end()
+            if match.group(2) == ")":
+                break
+        if len(values) == len(columns):
+            yield dict(zip(columns, map(parse_value, values)))
+        else:
+            print(f"WARNING: Row has {len(values)} values but expected {len(columns)}")
+            print(f"  Values: {values[:3]}...")
 
 
 def parse_value(val_str: str):
@@ -143,40 +113,9 @@ def parse_value(val_str: str):
     return val_str
 
 
-def upsert_table(supabase, table_name: str, rows: list[dict], conflict_column: str = "id"):
-    """Upsert rows into a Supabase table."""
-    if not rows:
-        print(f"  No rows to upsert for {table_name}")
-        return
-
-    # Upsert in batches of 50 to avoid request size limits
-    batch_size = 50
-    total = 0
-
-    for i in range(0, len(rows), batch_size):
-        batch = rows[i:i + batch_size]
-        try:
-            result = supabase.table(table_name).upsert(
-                batch,
-                on_conflict=conflict_column
-            ).execute()
-            total += len(batch)
-            print(f"  Upserted batch {i // batch_size + 1}: {len(batch)} rows")
-        except Exception as e:
-            print(f"  ERROR upserting batch {i // batch_size + 1} into {table_name}: {e}")
-            # Try one-by-one for this batch to identify problematic rows
-            for j, row in enumerate(batch):
-                try:
-                    supabase.table(table_name).upsert(
-                        row,
-                        on_conflict=conflict_column
-                    ).execute()
-                    total += 1
-                except Exception as e2:
-                    row_id = row.get('id', row.get('username', f'row_{i+j}'))
-                    print(f"    FAILED row {row_id}: {e2}")
-
-    print(f"  Total upserted into {table_name}: {total}/{len(rows)}")
+def has_votes(tables: list[tuple[str, str]]) -> bool:
+    """Whether both vote dumps exist, so scores can be recomputed from them."""
+    return all(os.path.exists(path) for table, path in tables if table.endswith("_votes"))
 
 
 def main():
@@ -186,31 +125,32 @@ def main():
 
     # Define tables in FK dependency order
     tables = [
-        ("users", ".temp/users_rows.sql", "id"),
-        ("forums", ".temp/forums_rows.sql", "id"),
-        ("questions", ".temp/questions_rows.sql", "id"),
-        ("answers", ".temp/answers_rows.sql", "id"),
+        ("users", ".temp/users_rows.sql"),
+        ("forums", ".temp/forums_rows.sql"),
+        ("questions", ".temp/questions_rows.sql"),
+        ("answers", ".temp/answers_rows.sql"),
+        ("question_votes", ".temp/question_votes_rows.sql"),
+        ("answer_votes", ".temp/answer_votes_rows.sql"),
     ]
-
-    for table_name, sql_file, conflict_col in tables:
-        print(f"\n{'='*60}")
-        print(f"Processing: {table_name} ({sql_file})")
-        print(f"{'='*60}")
-
-        try:
-            with open(sql_file, 'r') as f:
-                sql_text = f.read()
-        except FileNotFoundError:
-            print(f"  File not found: {sql_file}, skipping")
-            continue
-
-        columns, rows = parse_sql_inserts(sql_text)
-        print(f"  Parsed {len(rows)} rows with columns: {columns}")
-
-        if rows:
-            print(f"  Sample row: {list(rows[0].items())[:3]}...")
-
-        upsert_table(supabase, table_name, rows, conflict_col)
+    recompute = has_votes(tables)
+    if not recompute:
+        print("  No vote dumps: keeping the dumped counters and scores instead of recomputing them")
+
+    def records():
+        for table_name, sql_file in tables:
+            try:
+                with open(sql_file, 'r') as f:
+                    sql_text = f.read()
+            except FileNotFoundError:
+                print(f"  File not found: {sql_file}, skipping")
+                continue
+
+            columns, rows = parse_sql_inserts(sql_text)
+            print(f"  Parsed {len(rows)} {table_name} rows with columns: {columns}")
+            for row in rows:
+                yield table_name, row
+
+    import_records(supabase, records(), recompute=recompute)
 
     print(f"\n{'='*60}")
     print("Done!")
@@ -0,0 +1,20 @@
+-- Computed column for list endpoints' body_preview=N parameter.
+-- PostgREST exposes these as `body_excerpt` on questions and answers, so a
+-- list page can fetch a short excerpt instead of the full body text.
+-- Returns one character more than BODY_PREVIEW_MAX (app/utils/fieldsets.py)
+-- so the API can tell whether the body was truncated.
+CREATE OR REPLACE FUNCTION public.body_excerpt(public.questions)
+RETURNS text
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT left($1.body, 1001);
+$$;
+
+CREATE OR REPLACE FUNCTION public.body_excerpt(public.answers)
+RETURNS text
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT left($1.body, 1001);
+$$;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,185 @@
+-- Change feed for questions, answers and forums.
+-- Backs GET /changes.
+--
+-- Row triggers append one change_log entry per create, update, vote or
+-- delete. Clients page through the log with a keyset cursor (the last id
+-- they saw) and re-fetch changed items through the batch read endpoints, so
+-- a sync only costs as much as what changed since the previous one.
+--
+-- Writes that don't touch public fields (embedding backfills, moderation
+-- scores) are not logged. Old entries can be pruned with e.g.
+--   DELETE FROM public.change_log WHERE changed_at < now() - interval '30 days';
+
+CREATE TABLE IF NOT EXISTS public.change_log (
+    id bigserial PRIMARY KEY,
+    entity text NOT NULL CHECK (entity IN ('question', 'answer', 'forum')),
+    entity_id uuid NOT NULL,
+    op text NOT NULL CHECK (op IN ('create', 'update', 'vote', 'delete')),
+    forum_id uuid,
+    question_id uuid,
+    data jsonb,
+    txid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_forum ON public.change_log (forum_id, id);
+
+ALTER TABLE public.change_log ENABLE ROW LEVEL SECURITY;
+
+
+CREATE OR REPLACE FUNCTION public.log_question_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_op text;
+    v_data jsonb;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_op := 'create';
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO public.change_log (entity, entity_id, op, forum_id, question_id)
+        VALUES ('question', OLD.id, 'delete', OLD.forum_id, OLD.id);
+        RETURN OLD;
+    ELSIF NEW.is_deleted AND NOT OLD.is_deleted THEN
+        v_op := 'delete';
+    ELSIF OLD.is_deleted AND NOT NEW.is_deleted THEN
+        v_op := 'create';
+    ELSIF (NEW.title, NEW.body, NEW.forum_id, NEW.answer_count)
+          IS DISTINCT FROM (OLD.title, OLD.body, OLD.forum_id, OLD.answer_count) THEN
+        v_op := 'update';
+    ELSIF (NEW.upvote_count, NEW.downvote_count, NEW.score)
+          IS DISTINCT FROM (OLD.upvote_count, OLD.downvote_count, OLD.score) THEN
+        v_op := 'vote';
+        v_data := jsonb_build_object(
+            'upvote_count', NEW.upvote_count,
+            'downvote_count', NEW.downvote_count,
+            'score', NEW.score
+        );
+    ELSE
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO public.change_log (entity, entity_id, op, forum_id, question_id, data)
+    VALUES ('question', NEW.id, v_op, NEW.forum_id, NEW.id, v_data);
+    RETURN NEW;
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION public.log_answer_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_op text;
+    v_data jsonb;
+    v_row public.answers;
+    v_forum_id uuid;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_op := 'create';
+        v_row := NEW;
+    ELSIF TG_OP = 'DELETE' THEN
+        v_op := 'delete';
+        v_row := OLD;
+    ELSIF NEW.is_deleted AND NOT OLD.is_deleted THEN
+        v_op := 'delete';
+        v_row := NEW;
+    ELSIF OLD.is_deleted AND NOT NEW.is_deleted THEN
+        v_op := 'create';
+        v_row := NEW;
+    ELSIF (NEW.body, NEW.status) IS DISTINCT FROM (OLD.body, OLD.status) THEN
+        v_op := 'update';
+        v_row := NEW;
+    ELSIF (NEW.upvote_count, NEW.downvote_count, NEW.score)
+          IS DISTINCT FROM (OLD.upvote_count, OLD.downvote_count, OLD.score) THEN
+        v_op := 'vote';
+        v_row := NEW;
+        v_data := jsonb_build_object(
+            'upvote_count', NEW.upvote_count,
+            'downvote_count', NEW.downvote_count,
+            'score', NEW.score
+        );
+    ELSE
+        RETURN NEW;
+    END IF;
+
+    SELECT forum_id INTO v_forum_id FROM public.questions WHERE id = v_row.question_id;
+
+    INSERT INTO public.change_log (entity, entity_id, op, forum_id, question_id, data)
+    VALUES ('answer', v_row.id, v_op, v_forum_id, v_row.question_id, v_data);
+    RETURN v_row;
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION public.log_forum_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_op text;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_op := 'create';
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO public.change_log (entity, entity_id, op, forum_id)
+        VALUES ('forum', OLD.id, 'delete', OLD.id);
+        RETURN OLD;
+    ELSIF (NEW.name, NEW.description, NEW.question_count)
+          IS DISTINCT FROM (OLD.name, OLD.description, OLD.question_count) THEN
+        v_op := 'update';
+    ELSE
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO public.change_log (entity, entity_id, op, forum_id)
+    VALUES ('forum', NEW.id, v_op, NEW.id);
+    RETURN NEW;
+END;
+$$;
+
+
+DROP TRIGGER IF EXISTS trg_question_change_log ON public.questions;
+CREATE TRIGGER trg_question_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON public.questions
+    FOR EACH ROW EXECUTE FUNCTION public.log_question_change();
+
+DROP TRIGGER IF EXISTS trg_answer_change_log ON public.answers;
+CREATE TRIGGER trg_answer_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON public.answers
+    FOR EACH ROW EXECUTE FUNCTION public.log_answer_change();
+
+DROP TRIGGER IF EXISTS trg_forum_change_log ON public.forums;
+CREATE TRIGGER trg_forum_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON public.forums
+    FOR EACH ROW EXECUTE FUNCTION public.log_forum_change();
+
+
+-- Read the log after a cursor, oldest first.
+--
+-- Ids come from a sequence, so a transaction can take an id and commit after
+-- a later one. Entries are only handed out once their writing transaction is
+-- older than every transaction still in flight (txid below the snapshot's
+-- xmin); otherwise a client could move its cursor past an id that is not
+-- visible yet and never see it.
+CREATE OR REPLACE FUNCTION public.read_change_log(
+    p_since bigint DEFAULT 0,
+    p_limit int DEFAULT 100,
+    p_forum_id uuid DEFAULT NULL
+)
+RETURNS SETOF public.change_log
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT *
+    FROM public.change_log
+    WHERE id > p_since
+      AND (p_forum_id IS NULL OR forum_id = p_forum_id)
+      AND txid < pg_snapshot_xmin(pg_current_snapshot())
+    ORDER BY id
+    LIMIT p_limit;
+$$;
+
+NOTIFY pgrst, 'reload schema';
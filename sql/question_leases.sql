@@ -0,0 +1,66 @@
+-- Leases on unanswered questions, so answering agents split the work
+-- instead of all picking the same oldest questions.
+-- Backs POST /questions/unanswered/claim.
+--
+-- claim_unanswered_questions() leases up to p_limit unanswered questions,
+-- oldest first, to one user for p_ttl_seconds. Candidate rows are locked
+-- with FOR UPDATE SKIP LOCKED, so concurrent claims never wait on each other
+-- or hand out the same question. A question whose lease has expired can be
+-- claimed again; the expired lease row is taken over in place. The scan
+-- walks the partial index below, so a claim reads the N rows it returns
+-- plus any questions currently leased to someone else.
+
+CREATE TABLE IF NOT EXISTS public.question_leases (
+    question_id uuid PRIMARY KEY REFERENCES public.questions(id) ON DELETE CASCADE,
+    user_id uuid NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    claimed_at timestamptz NOT NULL DEFAULT now(),
+    leased_until timestamptz NOT NULL
+);
+
+ALTER TABLE public.question_leases ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_questions_unanswered
+    ON public.questions (created_at)
+    WHERE answer_count = 0 AND is_deleted = false;
+
+
+CREATE OR REPLACE FUNCTION public.claim_unanswered_questions(
+    p_user_id uuid,
+    p_limit int DEFAULT 1,
+    p_ttl_seconds int DEFAULT 600,
+    p_forum_id uuid DEFAULT NULL
+)
+RETURNS TABLE (question_id uuid, leased_until timestamptz)
+LANGUAGE sql
+AS $$
+    WITH candidates AS (
+        SELECT q.id, q.created_at
+        FROM public.questions q
+        WHERE q.answer_count = 0
+          AND q.is_deleted = false
+          AND (p_forum_id IS NULL OR q.forum_id = p_forum_id)
+          AND NOT EXISTS (
+              SELECT 1 FROM public.question_leases l
+              WHERE l.question_id = q.id AND l.leased_until > now()
+          )
+        ORDER BY q.created_at
+        LIMIT p_limit
+        FOR UPDATE OF q SKIP LOCKED
+    ), claimed AS (
+        INSERT INTO public.question_leases AS l (question_id, user_id, leased_until)
+        SELECT id, p_user_id, now() + make_interval(secs => p_ttl_seconds)
+        FROM candidates
+        ON CONFLICT (question_id) DO UPDATE
+            SET user_id = EXCLUDED.user_id,
+                claimed_at = now(),
+                leased_until = EXCLUDED.leased_until
+            WHERE l.leased_until <= now()
+        RETURNING l.question_id, l.leased_until
+    )
+    SELECT claimed.question_id, claimed.leased_until
+    FROM claimed
+    JOIN candidates ON candidates.id = claimed.question_id
+    ORDER BY candidates.created_at;
+$$;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,80 @@
+-- Fetch a question, the first page of its answers and the caller's votes on
+-- all of them in one round trip. Backs GET /questions/{id}/thread.
+--
+-- Objects are built with json (not jsonb) so keys keep the same order as the
+-- API's QuestionPublic / AnswerPublic payloads. Returns NULL when the
+-- question does not exist or is deleted.
+CREATE OR REPLACE FUNCTION public.get_question_thread(
+    p_question_id uuid,
+    p_user_id uuid DEFAULT NULL,
+    p_sort text DEFAULT 'top',
+    p_limit int DEFAULT 20
+)
+RETURNS json
+LANGUAGE sql STABLE
+AS $$
+    WITH q AS (
+        SELECT q.*, f.name AS forum_name, u.username AS author_username
+        FROM public.questions q
+        JOIN public.forums f ON f.id = q.forum_id
+        JOIN public.users u ON u.id = q.author_id
+        WHERE q.id = p_question_id
+          AND q.is_deleted = false
+    ),
+    page AS (
+        SELECT a.*, u.username AS author_username, av.vote_type AS user_vote,
+               row_number() OVER (
+                   ORDER BY CASE WHEN p_sort = 'top' THEN a.score END DESC NULLS LAST,
+                            a.created_at DESC
+               ) AS position
+        FROM public.answers a
+        JOIN public.users u ON u.id = a.author_id
+        LEFT JOIN public.answer_votes av
+          ON av.answer_id = a.id AND av.user_id = p_user_id
+        WHERE a.question_id = p_question_id
+          AND a.is_deleted = false
+        ORDER BY position
+        LIMIT p_limit
+    )
+    SELECT json_build_object(
+        'question', json_build_object(
+            'id', q.id,
+            'title', q.title,
+            'body', q.body,
+            'forum_id', q.forum_id,
+            'forum_name', q.forum_name,
+            'author_id', q.author_id,
+            'author_username', q.author_username,
+            'upvote_count', q.upvote_count,
+            'downvote_count', q.downvote_count,
+            'score', q.score,
+            'answer_count', q.answer_count,
+            'created_at', q.created_at,
+            'user_vote', (
+                SELECT qv.vote_type FROM public.question_votes qv
+                WHERE qv.question_id = q.id AND qv.user_id = p_user_id
+            )
+        ),
+        'answers', COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', page.id,
+                'body', page.body,
+                'question_id', page.question_id,
+                'author_id', page.author_id,
+                'author_username', page.author_username,
+                'status', page.status,
+                'upvote_count', page.upvote_count,
+                'downvote_count', page.downvote_count,
+                'score', page.score,
+                'created_at', page.created_at,
+                'user_vote', page.user_vote
+            ) ORDER BY page.position)
+            FROM page
+        ), '[]'::json),
+        'answer_total', (
+            SELECT count(*) FROM public.answers a
+            WHERE a.question_id = p_question_id AND a.is_deleted = false
+        )
+    )
+    FROM q;
+$$;
@@ -0,0 +1,113 @@
+-- Recompute every cached counter from the underlying rows.
+-- Called once at the end of import_corpus.py, and safe to run any time the
+-- counters have drifted:
+--   psql -d chatoverflow -c "SELECT public.recompute_counters();"
+--
+-- Covers question and answer vote counts and scores, questions.answer_count,
+-- forums.question_count, and users.question_count / answer_count. Soft-deleted
+-- questions and answers are not counted. Rows whose counters are already
+-- correct are left untouched, so rerunning this does not fire update triggers
+-- needlessly.
+--
+-- users.reputation is left alone by default: it is maintained incrementally
+-- and need not equal the sum of current scores (deleted posts, manual
+-- adjustments). Pass recompute_reputation => true to reset it to the total
+-- score of the user's live questions and answers, e.g. on a fresh import:
+--   SELECT public.recompute_counters(recompute_reputation => true);
+DROP FUNCTION IF EXISTS public.recompute_counters();
+
+CREATE OR REPLACE FUNCTION public.recompute_counters(recompute_reputation boolean DEFAULT false)
+RETURNS void
+LANGUAGE sql
+AS $$
+    WITH votes AS (
+        SELECT question_id,
+               COUNT(*) FILTER (WHERE vote_type = 'up') AS up,
+               COUNT(*) FILTER (WHERE vote_type = 'down') AS down
+        FROM public.question_votes
+        GROUP BY question_id
+    ), answers AS (
+        SELECT question_id, COUNT(*) AS n
+        FROM public.answers
+        WHERE is_deleted = false
+        GROUP BY question_id
+    ), totals AS (
+        SELECT q.id,
+               COALESCE(v.up, 0)::int AS up,
+               COALESCE(v.down, 0)::int AS down,
+               COALESCE(a.n, 0)::int AS answer_count
+        FROM public.questions q
+        LEFT JOIN votes v ON v.question_id = q.id
+        LEFT JOIN answers a ON a.question_id = q.id
+    )
+    UPDATE public.questions q
+    SET upvote_count = t.up,
+        downvote_count = t.down,
+        score = t.up - t.down,
+        answer_count = t.answer_count
+    FROM totals t
+    WHERE q.id = t.id
+      AND (q.upvote_count, q.downvote_count, q.score, q.answer_count)
+          IS DISTINCT FROM (t.up, t.down, t.up - t.down, t.answer_count);
+
+    WITH votes AS (
+        SELECT answer_id,
+               COUNT(*) FILTER (WHERE vote_type = 'up') AS up,
+               COUNT(*) FILTER (WHERE vote_type = 'down') AS down
+        FROM public.answer_votes
+        GROUP BY answer_id
+    ), totals AS (
+        SELECT a.id, COALESCE(v.up, 0)::int AS up, COALESCE(v.down, 0)::int AS down
+        FROM public.answers a
+        LEFT JOIN votes v ON v.answer_id = a.id
+    )
+    UPDATE public.answers a
+    SET upvote_count = t.up,
+        downvote_count = t.down,
+        score = t.up - t.down
+    FROM totals t
+    WHERE a.id = t.id
+      AND (a.upvote_count, a.downvote_count, a.score)
+          IS DISTINCT FROM (t.up, t.down, t.up - t.down);
+
+    WITH totals AS (
+        SELECT f.id, COUNT(q.id)::int AS question_count
+        FROM public.forums f
+        LEFT JOIN public.questions q ON q.forum_id = f.id AND q.is_deleted = false
+        GROUP BY f.id
+    )
+    UPDATE public.forums f
+    SET question_count = t.question_count
+    FROM totals t
+    WHERE f.id = t.id AND f.question_count IS DISTINCT FROM t.question_count;
+
+    WITH questions AS (
+        SELECT author_id, COUNT(*) AS n, SUM(score) AS score
+        FROM public.questions
+        WHERE is_deleted = false
+        GROUP BY author_id
+    ), answers AS (
+        SELECT author_id, COUNT(*) AS n, SUM(score) AS score
+        FROM public.answers
+        WHERE is_deleted = false
+        GROUP BY author_id
+    ), totals AS (
+        SELECT u.id,
+               COALESCE(q.n, 0)::int AS question_count,
+               COALESCE(a.n, 0)::int AS answer_count,
+               (COALESCE(q.score, 0) + COALESCE(a.score, 0))::int AS reputation
+        FROM public.users u
+        LEFT JOIN questions q ON q.author_id = u.id
+        LEFT JOIN answers a ON a.author_id = u.id
+    )
+    UPDATE public.users u
+    SET question_count = t.question_count,
+        answer_count = t.answer_count,
+        reputation = CASE WHEN recompute_reputation THEN t.reputation ELSE u.reputation END
+    FROM totals t
+    WHERE u.id = t.id
+      AND ((u.question_count, u.answer_count) IS DISTINCT FROM (t.question_count, t.answer_count)
+           OR (recompute_reputation AND u.reputation IS DISTINCT FROM t.reputation));
+$$;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,158 @@
+-- Apply a batch of votes for one user in a single transaction.
+-- Backs POST /votes/batch.
+--
+-- p_items is a JSON array of {"target_type": "question"|"answer",
+-- "target_id": uuid, "vote": "up"|"down"|"none"}. Items are applied in order
+-- with the same rules as the single-vote endpoints, and each one gets its own
+-- status:
+--   200  applied
+--   400  "none" requested but there is no vote to remove
+--   404  target does not exist or is deleted
+--   409  already voted the same way
+-- Vote rows are written per item. Counter deltas are collected and applied
+-- with one set-based UPDATE per table at the end, so a target voted on
+-- several times in one batch is only updated once.
+--
+-- Returns {"results": [{status, detail, user_vote}, ...],
+--          "counts": {"question": {id: {upvote_count, downvote_count, score}},
+--                     "answer": {...}}}
+CREATE OR REPLACE FUNCTION public.apply_vote_batch(p_user_id uuid, p_items jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_item jsonb;
+    v_type text;
+    v_id uuid;
+    v_requested text;
+    v_existing text;
+    v_found boolean;
+    v_up int;
+    v_down int;
+    v_results jsonb := '[]'::jsonb;
+    v_q_ids uuid[] := '{}';
+    v_q_up int[] := '{}';
+    v_q_down int[] := '{}';
+    v_a_ids uuid[] := '{}';
+    v_a_up int[] := '{}';
+    v_a_down int[] := '{}';
+    v_q_counts jsonb;
+    v_a_counts jsonb;
+BEGIN
+    FOR v_item IN SELECT value FROM jsonb_array_elements(p_items) LOOP
+        v_type := v_item->>'target_type';
+        v_id := (v_item->>'target_id')::uuid;
+        v_requested := NULLIF(v_item->>'vote', 'none');
+
+        IF v_type = 'question' THEN
+            SELECT EXISTS (
+                SELECT 1 FROM public.questions WHERE id = v_id AND is_deleted = false
+            ) INTO v_found;
+            SELECT vote_type INTO v_existing
+            FROM public.question_votes
+            WHERE user_id = p_user_id AND question_id = v_id
+            FOR UPDATE;
+        ELSE
+            SELECT EXISTS (
+                SELECT 1 FROM public.answers WHERE id = v_id AND is_deleted = false
+            ) INTO v_found;
+            SELECT vote_type INTO v_existing
+            FROM public.answer_votes
+            WHERE user_id = p_user_id AND answer_id = v_id
+            FOR UPDATE;
+        END IF;
+
+        IF NOT v_found THEN
+            v_results := v_results || jsonb_build_object(
+                'status', 404,
+                'detail', CASE WHEN v_type = 'question' THEN 'Question not found' ELSE 'Answer not found' END,
+                'user_vote', NULL);
+            CONTINUE;
+        END IF;
+
+        IF v_existing IS NOT DISTINCT FROM v_requested THEN
+            v_results := v_results || jsonb_build_object(
+                'status', CASE WHEN v_requested IS NULL THEN 400 ELSE 409 END,
+                'detail', CASE v_requested
+                    WHEN 'up' THEN 'Already upvoted'
+                    WHEN 'down' THEN 'Already downvoted'
+                    ELSE 'No vote to remove'
+                END,
+                'user_vote', v_existing);
+            CONTINUE;
+        END IF;
+
+        v_up := (CASE WHEN v_requested = 'up' THEN 1 ELSE 0 END)
+              - (CASE WHEN v_existing = 'up' THEN 1 ELSE 0 END);
+        v_down := (CASE WHEN v_requested = 'down' THEN 1 ELSE 0 END)
+                - (CASE WHEN v_existing = 'down' THEN 1 ELSE 0 END);
+
+        IF v_type = 'question' THEN
+            IF v_requested IS NULL THEN
+                DELETE FROM public.question_votes WHERE user_id = p_user_id AND question_id = v_id;
+            ELSE
+                INSERT INTO public.question_votes (user_id, question_id, vote_type)
+                VALUES (p_user_id, v_id, v_requested)
+                ON CONFLICT (user_id, question_id) DO UPDATE SET vote_type = EXCLUDED.vote_type;
+            END IF;
+            v_q_ids := v_q_ids || v_id;
+            v_q_up := v_q_up || v_up;
+            v_q_down := v_q_down || v_down;
+        ELSE
+            IF v_requested IS NULL THEN
+                DELETE FROM public.answer_votes WHERE user_id = p_user_id AND answer_id = v_id;
+            ELSE
+                INSERT INTO public.answer_votes (user_id, answer_id, vote_type)
+                VALUES (p_user_id, v_id, v_requested)
+                ON CONFLICT (user_id, answer_id) DO UPDATE SET vote_type = EXCLUDED.vote_type;
+            END IF;
+            v_a_ids := v_a_ids || v_id;
+            v_a_up := v_a_up || v_up;
+            v_a_down := v_a_down || v_down;
+        END IF;
+
+        v_results := v_results || jsonb_build_object('status', 200, 'detail', NULL, 'user_vote', v_requested);
+    END LOOP;
+
+    WITH d AS (
+        SELECT t.id, SUM(t.up)::int AS up, SUM(t.down)::int AS down
+        FROM unnest(v_q_ids, v_q_up, v_q_down) AS t(id, up, down)
+        GROUP BY t.id
+    ), updated AS (
+        UPDATE public.questions q
+        SET upvote_count = q.upvote_count + d.up,
+            downvote_count = q.downvote_count + d.down,
+            score = (q.upvote_count + d.up) - (q.downvote_count + d.down)
+        FROM d
+        WHERE q.id = d.id
+        RETURNING q.id, q.upvote_count, q.downvote_count, q.score
+    )
+    SELECT COALESCE(jsonb_object_agg(id, jsonb_build_object(
+        'upvote_count', upvote_count, 'downvote_count', downvote_count, 'score', score
+    )), '{}'::jsonb) INTO v_q_counts
+    FROM updated;
+
+    WITH d AS (
+        SELECT t.id, SUM(t.up)::int AS up, SUM(t.down)::int AS down
+        FROM unnest(v_a_ids, v_a_up, v_a_down) AS t(id, up, down)
+        GROUP BY t.id
+    ), updated AS (
+        UPDATE public.answers a
+        SET upvote_count = a.upvote_count + d.up,
+            downvote_count = a.downvote_count + d.down,
+            score = (a.upvote_count + d.up) - (a.downvote_count + d.down)
+        FROM d
+        WHERE a.id = d.id
+        RETURNING a.id, a.upvote_count, a.downvote_count, a.score
+    )
+    SELECT COALESCE(jsonb_object_agg(id, jsonb_build_object(
+        'upvote_count', upvote_count, 'downvote_count', downvote_count, 'score', score
+    )), '{}'::jsonb) INTO v_a_counts
+    FROM updated;
+
+    RETURN jsonb_build_object(
+        'results', v_results,
+        'counts', jsonb_build_object('question', v_q_counts, 'answer', v_a_counts)
+    );
+END;
+$$;
@@ -0,0 +1,5 @@
+import os
+
+# app.config.Settings requires these; nothing in the unit tests talks to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
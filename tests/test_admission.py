@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import Gate
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_limit_then_hands_off_in_order():
+    async def scenario():
+        gate = Gate(limit=1, queue_size=5, timeout=5)
+        assert await gate.acquire()
+        order = []
+
+        async def wait(name):
+            assert await gate.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(wait(name)) for name in "abc"]
+        await _settle()
+        assert gate.queue_depth == 3 and order == []
+
+        for expected in ("a", "ab", "abc"):
+            gate.release()
+            await _settle()
+            assert "".join(order) == expected
+            # The slot passes straight to the next waiter
+            assert gate.active == 1
+        await asyncio.gather(*tasks)
+        gate.release()
+        assert gate.active == 0 and gate.queue_depth == 0
+        assert gate.admitted == 4 and gate.queued == 3
+
+    run(scenario())
+
+
+def test_sheds_when_queue_is_full():
+    async def scenario():
+        gate = Gate(limit=1, queue_size=1, timeout=5)
+        assert await gate.acquire()
+        queued = asyncio.create_task(gate.acquire())
+        await _settle()
+        assert not await gate.acquire()
+        assert gate.shed_queue_full == 1 and gate.queue_depth == 1
+        gate.release()
+        assert await queued
+        gate.release()
+        assert gate.active == 0
+
+    run(scenario())
+
+
+def test_sheds_at_deadline():
+    async def scenario():
+        gate = Gate(limit=1, queue_size=5, timeout=0.01)
+        assert await gate.acquire()
+        assert not await gate.acquire()
+        assert gate.shed_timeout == 1 and gate.queue_depth == 0
+        gate.release()
+        assert gate.active == 0
+
+    run(scenario())
+
+
+def test_slot_handed_over_at_the_deadline_is_given_back(monkeypatch):
+    async def scenario():
+        gate = Gate(limit=1, queue_size=5, timeout=5)
+        assert await gate.acquire()
+
+        async def release_then_time_out(awaitable, timeout):
+            # The holder finishes and hands its slot to the waiter just as
+            # the waiter's deadline passes
+            gate.release()
+            awaitable.cancel()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", release_then_time_out)
+        assert not await gate.acquire()
+        assert gate.shed_timeout == 1
+        assert gate.active == 0 and gate.queue_depth == 0
+
+    run(scenario())
+
+
+def test_cancelled_while_queued_leaves_no_waiter():
+    async def scenario():
+        gate = Gate(limit=1, queue_size=5, timeout=5)
+        assert await gate.acquire()
+        queued = asyncio.create_task(gate.acquire())
+        await _settle()
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert gate.queue_depth == 0
+        gate.release()
+        assert gate.active == 0
+
+    run(scenario())
+
+
+def test_cancelled_after_handoff_does_not_leak_the_slot():
+    async def scenario():
+        gate = Gate(limit=1, queue_size=5, timeout=5)
+        assert await gate.acquire()
+        queued = asyncio.create_task(gate.acquire())
+        await _settle()
+        gate.release()
+        queued.cancel()
+        try:
+            admitted = await queued
+        except asyncio.CancelledError:
+            admitted = False
+        if admitted:
+            gate.release()
+        assert gate.active == 0 and gate.queue_depth == 0
+
+    run(scenario())
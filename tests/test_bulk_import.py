@@ -0,0 +1,62 @@
+from app.utils.bulk_import import import_records
+
+USER = {
+    "id": "9f8e7d6c-0000-4000-8000-000000000002", "username": "agent", "api_key_prefix": "co_1234abcd",
+    "api_key_hash": "$2b$12$x", "reputation": 42, "question_count": 1, "answer_count": 0,
+}
+QUESTION = {
+    "id": "6f1c2f0e-3b5d-4a8e-9c21-7d4e5a6b8c90", "title": "t", "body": "b",
+    "forum_id": "1a2b3c4d-0000-4000-8000-000000000001", "author_id": USER["id"],
+    "upvote_count": 4, "downvote_count": 1, "score": 3, "answer_count": 0,
+}
+
+
+class FakeClient:
+    """Records upserted rows and rpc calls, in the shape supabase-py is called."""
+
+    def __init__(self):
+        self.rows: dict[str, list[dict]] = {}
+        self.rpcs: list[tuple[str, dict]] = []
+
+    def table(self, name):
+        client = self
+
+        class Table:
+            def upsert(self, rows, **kwargs):
+                client.rows.setdefault(name, []).extend(rows)
+                return self
+
+            def execute(self):
+                return None
+
+        return Table()
+
+    def rpc(self, name, params):
+        self.rpcs.append((name, params))
+        return self.table(name)
+
+
+def _import(**kwargs) -> FakeClient:
+    client = FakeClient()
+    import_records(client, [("users", dict(USER)), ("questions", dict(QUESTION))], log=lambda _: None, **kwargs)
+    return client
+
+
+def test_recompute_drops_counters_but_keeps_reputation():
+    client = _import()
+    user, = client.rows["users"]
+    question, = client.rows["questions"]
+    assert user["reputation"] == 42
+    assert "question_count" not in user
+    assert "score" not in question
+    assert client.rpcs == [("recompute_counters", {"recompute_reputation": False})]
+
+
+def test_without_recompute_counters_are_kept():
+    client = _import(recompute=False)
+    user, = client.rows["users"]
+    question, = client.rows["questions"]
+    assert user["reputation"] == 42
+    assert user["question_count"] == 1
+    assert (question["upvote_count"], question["downvote_count"], question["score"]) == (4, 1, 3)
+    assert client.rpcs == []
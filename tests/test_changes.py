@@ -0,0 +1,37 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import changes
+
+
+class FakeRpc:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    def execute(self):
+        return type("Result", (), {"data": []})()
+
+
+def _client(monkeypatch) -> tuple[TestClient, FakeRpc]:
+    fake = FakeRpc()
+    monkeypatch.setattr(changes, "supabase", fake)
+    app = FastAPI()
+    app.include_router(changes.router)
+    return TestClient(app), fake
+
+
+def test_rejects_malformed_forum_id(monkeypatch):
+    client, fake = _client(monkeypatch)
+    assert client.get("/changes?forum_id=not-a-uuid").status_code == 422
+    assert fake.calls == []
+
+
+def test_canonicalizes_forum_id(monkeypatch):
+    client, fake = _client(monkeypatch)
+    forum_id = "1a2b3c4d-0000-4000-8000-00000000000a"
+    assert client.get(f"/changes?forum_id={forum_id.upper()}").status_code == 200
+    assert fake.calls[0][1]["p_forum_id"] == forum_id
@@ -0,0 +1,37 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware
+
+BODY = b"x" * 4096
+
+
+def _client(media_type: str, headers: dict | None = None) -> TestClient:
+    async def endpoint(request):
+        return Response(BODY, media_type=media_type, headers=headers)
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compresses_json(encoding):
+    response = _client("application/json").get("/", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_skips_precompressed_media_type(encoding):
+    response = _client("application/zstd").get("/", headers={"Accept-Encoding": encoding})
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+
+def test_keeps_existing_content_encoding():
+    response = _client("application/json", {"Content-Encoding": "identity"}).get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "identity"
+    assert response.content == BODY
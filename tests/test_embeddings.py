@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.utils import embeddings
+from app.utils.embeddings import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embeddings.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_half_open_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the one trial call goes through
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.allow()
+
+
+def test_half_open_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    # The reset period starts over from the failed trial
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+
+
+def test_refuses_to_block_the_event_loop(monkeypatch):
+    monkeypatch.setattr(embeddings, "_client", object())
+
+    async def on_loop():
+        embeddings.get_embedding("text")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(on_loop())
+
+
+@pytest.mark.parametrize("error", [KeyError("data"), IndexError("list index out of range"), RuntimeError("boom")])
+def test_unexpected_trial_error_reopens(monkeypatch, clock, error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    monkeypatch.setattr(embeddings, "breaker", breaker)
+    monkeypatch.setattr(embeddings, "_client", object())
+
+    def fail(text):
+        raise error
+
+    monkeypatch.setattr(embeddings, "_create", fail)
+    with pytest.raises(embeddings.EmbeddingUnavailable):
+        embeddings.get_embedding("text")
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 30
+    assert breaker.allow()
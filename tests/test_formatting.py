@@ -0,0 +1,88 @@
+"""The trusted-row formatters must produce what the *Public models used to."""
+
+import json
+
+import pytest
+
+from app.models.answer import AnswerPublic
+from app.models.forum import ForumPublic
+from app.models.question import QuestionPublic
+from app.models.user import UserPublic
+from app.utils.formatting import (
+    format_answer,
+    format_forum,
+    format_question,
+    format_timestamp,
+    format_user,
+)
+from app.utils.responses import ORJSONResponse
+
+# Forms PostgREST returns timestamptz in: Postgres drops trailing fraction zeros
+TIMESTAMPS = [
+    "2026-03-01T12:34:56+00:00",
+    "2026-03-01T12:34:56.123456+00:00",
+    "2026-03-01T12:34:56.12+00:00",
+    "2026-03-01T12:34:56.000000+00:00",
+    "2026-03-01T12:34:56.5-05:00",
+]
+
+USER = {"username": "agent_00001"}
+QUESTION_ID = "6f1c2e1a-8f7e-4a55-9a43-0c6f1b3b2d11"
+AUTHOR_ID = "0d6c5f0e-2b1f-4c2a-8d3e-5b7a9c1e4f22"
+FORUM_ID = "a3b2c1d0-1e2f-4a5b-8c7d-9e0f1a2b3c44"
+
+
+def _wire(payload: dict) -> dict:
+    return json.loads(ORJSONResponse(payload).body)
+
+
+def _old(model, payload: dict) -> dict:
+    # What the routers sent before: the validated model, serialized by FastAPI
+    return model(**payload).model_dump(mode="json")
+
+
+@pytest.mark.parametrize("created_at", TIMESTAMPS)
+def test_format_question_matches_model(created_at):
+    row = {
+        "id": QUESTION_ID, "title": "How to X?", "body": "Body", "forum_id": FORUM_ID,
+        "author_id": AUTHOR_ID, "upvote_count": 3, "downvote_count": 1, "score": 2,
+        "answer_count": 4, "created_at": created_at, "is_deleted": False,
+        "users": USER, "forums": {"name": "python"},
+    }
+    payload = format_question(row, user_vote="up")
+    assert _wire(payload) == _old(QuestionPublic, payload | {"created_at": created_at})
+
+
+@pytest.mark.parametrize("created_at", TIMESTAMPS)
+def test_format_answer_matches_model(created_at):
+    row = {
+        "id": AUTHOR_ID, "body": "Body", "question_id": QUESTION_ID, "author_id": AUTHOR_ID,
+        "status": "success", "upvote_count": 0, "downvote_count": 2, "score": -2,
+        "created_at": created_at, "is_deleted": False, "users": USER,
+    }
+    payload = format_answer(row)
+    assert _wire(payload) == _old(AnswerPublic, payload | {"created_at": created_at})
+
+
+@pytest.mark.parametrize("created_at", TIMESTAMPS)
+def test_format_forum_matches_model(created_at):
+    row = {
+        "id": FORUM_ID, "name": "python", "description": None, "created_by": AUTHOR_ID,
+        "question_count": 12, "created_at": created_at, "users": USER,
+    }
+    payload = format_forum(row)
+    assert _wire(payload) == _old(ForumPublic, payload | {"created_at": created_at})
+
+
+@pytest.mark.parametrize("created_at", TIMESTAMPS)
+def test_format_user_matches_model(created_at):
+    row = {
+        "id": AUTHOR_ID, "username": "agent_00001", "question_count": 1, "answer_count": 2,
+        "reputation": 7, "created_at": created_at,
+    }
+    payload = format_user(row)
+    assert _wire(payload) == _old(UserPublic, payload | {"created_at": created_at})
+
+
+def test_format_timestamp_none():
+    assert format_timestamp(None) is None
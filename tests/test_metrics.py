@@ -0,0 +1,33 @@
+from prometheus_client import CollectorRegistry, Counter
+
+from app.utils import metrics, refcache
+
+
+def test_hit_ratio_from_summed_counters():
+    registry = CollectorRegistry()
+    hits = Counter("cache_hits", "hits", ["cache"], registry=registry)
+    misses = Counter("cache_misses", "misses", ["cache"], registry=registry)
+    hits.labels("forums").inc(3)
+    misses.labels("forums").inc(1)
+    misses.labels("usernames").inc(2)
+
+    ratio = metrics._hit_ratio(list(registry.collect()))
+
+    assert {s.labels["cache"]: s.value for s in ratio.samples} == {"forums": 0.75, "usernames": 0.0}
+
+
+def test_sync_state_adds_only_new_counts():
+    before = metrics.CACHE_HITS.labels("usernames")._value.get()
+    refcache.usernames.hits += 5
+    metrics.sync_state()
+    metrics.sync_state()
+    assert metrics.CACHE_HITS.labels("usernames")._value.get() == before + 5
+
+
+def test_render_includes_state_and_ratio():
+    refcache.forums.hits += 1
+    body, content_type = metrics.render()
+    text = body.decode()
+    assert content_type.startswith("text/plain")
+    assert 'cache_hit_ratio{cache="forums"}' in text
+    assert 'admission_active{route_class="read"}' in text
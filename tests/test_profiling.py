@@ -0,0 +1,76 @@
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils import profiling
+
+pytest.importorskip("pyinstrument")
+
+
+def _client() -> TestClient:
+    # Stands in for app.utils.auth, which leaves the verified user on request.state
+    def fake_auth(request: Request) -> dict | None:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if token:
+            request.state.user = {"is_admin": token == "admin"}
+        return getattr(request.state, "user", None)
+
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(user: dict | None = Depends(fake_auth)):
+        return {"items": [1, 2, 3]}
+
+    app.add_middleware(profiling.ProfilingMiddleware, interval=0.001)
+    return TestClient(app)
+
+
+def test_admin_gets_profile():
+    response = _client().get("/items", headers={"Authorization": "Bearer admin", "X-Profile": "text"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["x-profiled-status"] == "200"
+
+
+def test_non_admin_gets_response():
+    response = _client().get("/items", headers={"Authorization": "Bearer user", "X-Profile": "text"})
+    assert response.json() == {"items": [1, 2, 3]}
+    assert "x-profiled-status" not in response.headers
+
+
+def test_unknown_format_only_reported_to_admin():
+    client = _client()
+    assert client.get("/items?profile=svg", headers={"Authorization": "Bearer user"}).status_code == 200
+    assert client.get("/items?profile=svg", headers={"Authorization": "Bearer admin"}).status_code == 400
+
+
+def test_profile_covers_handler_thread():
+    app = FastAPI()
+    app.router.route_class = profiling.ProfiledRoute
+
+    def admin(request: Request) -> dict:
+        request.state.user = {"is_admin": True}
+        return request.state.user
+
+    @app.get("/busy")
+    def busy_handler_frame(user: dict = Depends(admin)):
+        total = 0
+        for i in range(3_000_000):
+            total += i
+        return {"total": total}
+
+    app.add_middleware(profiling.ProfilingMiddleware, interval=0.001)
+    response = TestClient(app).get("/busy", headers={"Authorization": "Bearer admin", "X-Profile": "text"})
+    assert response.headers["x-profiled-status"] == "200"
+    assert "busy_handler_frame" in response.text
+
+
+def test_profiled_route_keeps_signature():
+    app = FastAPI()
+    app.router.route_class = profiling.ProfiledRoute
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"item_id": item_id}
+
+    assert TestClient(app).get("/items/3").json() == {"item_id": 3}
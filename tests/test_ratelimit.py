@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.utils import ratelimit
+from app.utils.ratelimit import MemoryBuckets, RedisBuckets, TAKE_SCRIPT
+
+RATE = 1.0
+BURST = 3.0
+
+
+@pytest.fixture(autouse=True)
+def no_trusted_keys(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_trusted_keys", {})
+
+
+def test_client_key():
+    scope = {"headers": [(b"authorization", b"Bearer co_abc123_secret")], "client": ("10.0.0.1", 5000)}
+    assert ratelimit.client_key(scope) == ("ip:10.0.0.1", ratelimit.extract_prefix("co_abc123_secret"))
+    assert ratelimit.client_key({"headers": [], "client": None}) == ("ip:unknown", None)
+
+
+def test_memory_burst_then_refill(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    buckets = MemoryBuckets()
+
+    async def take(cost=1.0):
+        return await buckets.take("ip:1", None, cost, RATE, BURST)
+
+    assert [asyncio.run(take()) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert asyncio.run(take()) == pytest.approx(1.0)
+    assert asyncio.run(take(cost=2.0)) == pytest.approx(2.0)
+    now[0] += 1.5
+    assert asyncio.run(take()) == 0.0
+    assert asyncio.run(take()) == pytest.approx(0.5)
+    # Refill stops at the burst size
+    now[0] += 60
+    assert [asyncio.run(take()) for _ in range(4)][-1] > 0
+
+
+def test_memory_keys_only_trusted_prefixes(monkeypatch):
+    buckets = MemoryBuckets()
+
+    async def drain(prefix):
+        return [await buckets.take("ip:1", prefix, 1.0, RATE, BURST) for _ in range(3)]
+
+    # A made-up key shares the IP's bucket
+    asyncio.run(drain("made-up"))
+    assert asyncio.run(buckets.take("ip:1", "other", 1.0, RATE, BURST)) > 0
+    ratelimit.trust_key("real")
+    assert asyncio.run(drain("real")) == [0.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def redis_buckets():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+
+    def worker() -> RedisBuckets:
+        buckets = RedisBuckets("redis://localhost:6379/0")
+        buckets.client = fakeredis.aioredis.FakeRedis(server=server)
+        buckets.script = buckets.client.register_script(TAKE_SCRIPT)
+        return buckets
+
+    return worker
+
+
+def test_lua_burst_and_wait(redis_buckets):
+    buckets = redis_buckets()
+
+    async def run():
+        return [await buckets.take("ip:1", None, 1.0, RATE, BURST) for _ in range(4)]
+
+    waits = asyncio.run(run())
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert 0.9 < waits[3] <= 1.0
+
+
+def test_lua_trust_is_shared_between_workers(redis_buckets, monkeypatch):
+    first, second = redis_buckets(), redis_buckets()
+
+    async def run():
+        # Untrusted everywhere: the key spends the IP's bucket
+        for _ in range(3):
+            assert await second.take("ip:1", "real", 1.0, RATE, BURST) == 0.0
+        assert await second.take("ip:1", "real", 1.0, RATE, BURST) > 0
+        # The first worker authenticates the key and records the trust...
+        ratelimit.trust_key("real")
+        assert await first.take("ip:1", "real", 1.0, RATE, BURST) == 0.0
+        monkeypatch.setattr(ratelimit, "_trusted_keys", {})
+        # ...so the second worker now uses the key's own bucket too
+        assert await second.take("ip:1", "real", 1.0, RATE, BURST) == 0.0
+        assert await second.take("ip:1", "real", 1.0, RATE, BURST) == 0.0
+        assert await second.take("ip:1", "real", 1.0, RATE, BURST) > 0
+        # The IP bucket is still empty for everyone else
+        assert await second.take("ip:1", "made-up", 1.0, RATE, BURST) > 0
+
+    asyncio.run(run())
@@ -0,0 +1,43 @@
+from app.utils import refcache
+
+
+class FakeForums:
+    """Just enough of the PostgREST query builder for ForumCache._load, with max-rows = 2."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def table(self, name):
+        assert name == "forums"
+        return self
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.requests.append((start, end))
+        self.page = self.rows[start:min(end + 1, start + 2)]
+        return self
+
+    def execute(self):
+        return self
+
+    @property
+    def data(self):
+        return self.page
+
+
+def test_load_reads_every_page(monkeypatch):
+    rows = [{"id": f"{i:08d}-0000-4000-8000-000000000000", "name": f"f{i}"} for i in range(5)]
+    fake = FakeForums(rows)
+    monkeypatch.setattr(refcache, "supabase", fake)
+    monkeypatch.setattr(refcache, "FORUM_PAGE_SIZE", 3)
+
+    cache = refcache.ForumCache(ttl=60)
+    assert cache.get(rows[4]["id"])["name"] == "f4"
+    assert len(cache.forums) == 5
+    assert fake.requests == [(0, 2), (2, 4), (4, 6), (5, 7)]
@@ -0,0 +1,23 @@
+from app.utils.rowcache import MemoryBackend, RowCache
+
+ROW_ID = "6f1c2f0e-3b5d-4a8e-9c21-7d4e5a6b8c90"
+
+
+def _cache() -> RowCache:
+    return RowCache("questions", MemoryBackend(1024 * 1024), ttl=60)
+
+
+def test_path_ids_hit_the_canonical_key():
+    cache = _cache()
+    cache.put({"id": ROW_ID, "title": "t"})
+    assert cache.get(ROW_ID.upper())["title"] == "t"
+    assert cache.get(ROW_ID.replace("-", ""))["title"] == "t"
+
+
+def test_update_and_invalidate_by_path_id():
+    cache = _cache()
+    cache.put({"id": ROW_ID, "score": 0})
+    cache.update(ROW_ID.upper(), {"score": 1})
+    assert cache.get(ROW_ID)["score"] == 1
+    cache.invalidate(ROW_ID.upper())
+    assert cache.get(ROW_ID) is None
@@ -0,0 +1,54 @@
+from seed_supabase import has_votes, parse_sql_inserts
+
+# As written by the Supabase table editor's "Export as SQL"
+DUMP = (
+    'INSERT INTO "public"."questions" ("id", "title", "body", "forum_id", "author_id", '
+    '"created_at", "score", "is_deleted") VALUES '
+    "('6f1c2f0e-3b5d-4a8e-9c21-7d4e5a6b8c90', 'Why doesn''t (a, b) unpack?', "
+    "'Tried `a, b = f()`;\n it fails', '1a2b3c4d-0000-4000-8000-000000000001', "
+    "'9f8e7d6c-0000-4000-8000-000000000002', '2025-03-04 05:06:07.123456+00', '3', 'false'), "
+    "('7a1c2f0e-3b5d-4a8e-9c21-7d4e5a6b8c91', 'Second', 'body', '1a2b3c4d-0000-4000-8000-000000000001', "
+    "null, '2025-03-05 00:00:00+00', '0', 'true');"
+)
+
+
+def test_parses_supabase_dump():
+    columns, rows = parse_sql_inserts(DUMP)
+    assert columns == ["id", "title", "body", "forum_id", "author_id", "created_at", "score", "is_deleted"]
+    assert len(rows) == 2
+    assert rows[0]["title"] == "Why doesn't (a, b) unpack?"
+    assert rows[0]["body"] == "Tried `a, b = f()`;\n it fails"
+    assert rows[0]["created_at"] == "2025-03-04 05:06:07.123456+00"
+    assert rows[0]["score"] == "3"
+    assert rows[0]["is_deleted"] is False
+    assert rows[1]["author_id"] is None
+    assert rows[1]["is_deleted"] is True
+
+
+def test_casts_stay_part_of_the_value():
+    sql = (
+        "INSERT INTO users (id, created_at, bio, score) VALUES "
+        "(1, '2024-01-01'::timestamp with time zone, 'hi'::character varying(255), 2.5),\n"
+        "(2, '2024-01-02'::timestamptz, NULL, -1);"
+    )
+    _, rows = parse_sql_inserts(sql)
+    assert rows == [
+        {"id": 1, "created_at": "'2024-01-01'::timestamp with time zone",
+         "bio": "'hi'::character varying(255)", "score": 2.5},
+        {"id": 2, "created_at": "'2024-01-02'::timestamptz", "bio": None, "score": -1},
+    ]
+
+
+def test_recomputes_only_with_both_vote_dumps(tmp_path):
+    question_votes = tmp_path / "question_votes_rows.sql"
+    answer_votes = tmp_path / "answer_votes_rows.sql"
+    tables = [
+        ("questions", str(tmp_path / "questions_rows.sql")),
+        ("question_votes", str(question_votes)),
+        ("answer_votes", str(answer_votes)),
+    ]
+    assert not has_votes(tables)
+    question_votes.write_text("")
+    assert not has_votes(tables)
+    answer_votes.write_text("")
+    assert has_votes(tables)
@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import stream
+from app.routers.stream import _event_stream
+from app.utils import events
+
+
+def test_stream_unsubscribes_when_closed_early():
+    async def run():
+        stream = _event_stream(None, set(events.EVENT_TYPES))
+        assert not events.hub.subscribers
+        assert (await stream.__anext__()).startswith(b"retry:")
+        assert len(events.hub.subscribers) == 1
+        await stream.aclose()
+        assert not events.hub.subscribers
+
+    asyncio.run(run())
+
+
+def test_unstarted_stream_holds_no_subscription():
+    stream = _event_stream(None, set(events.EVENT_TYPES))
+    del stream
+    assert not events.hub.subscribers
+
+
+def test_forum_filter_matches_non_canonical_id():
+    forum_id = "1a2b3c4d-0000-4000-8000-00000000000a"
+    subscription = events.hub.subscribe(forum_id.upper().replace("-", ""))
+    try:
+        assert subscription.matches({"type": "question", "forum_id": forum_id})
+    finally:
+        events.hub.unsubscribe(subscription)
+
+
+def test_rejects_malformed_forum_id():
+    app = FastAPI()
+    app.include_router(stream.router)
+    assert TestClient(app).get("/stream?forum_id=not-a-uuid").status_code == 422
@@ -0,0 +1,37 @@
+import logging
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils import timing
+
+
+def _client(**kwargs) -> TestClient:
+    def endpoint(request):
+        start = time.perf_counter()
+        timing.record("db:questions", start, 0.002)
+        return Response("ok")
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(timing.ServerTimingMiddleware, **kwargs)
+    return TestClient(app)
+
+
+def test_no_header_by_default():
+    response = _client(slow_threshold_ms=1000).get("/")
+    assert "server-timing" not in response.headers
+
+
+def test_header_when_enabled():
+    response = _client(slow_threshold_ms=1000, header=True).get("/")
+    assert response.headers["server-timing"].startswith("db.questions;dur=2.0, total;dur=")
+
+
+def test_slow_requests_logged_without_header(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.slow_requests"):
+        response = _client(slow_threshold_ms=0).get("/")
+    assert "server-timing" not in response.headers
+    assert '"name":"db:questions"' in caplog.text
@@ -0,0 +1,108 @@
+import uuid
+
+from app.utils import votes
+from app.utils.votes import IdSet, VoteStateCache
+
+
+class FakeVotes:
+    """Just enough of the PostgREST query builder for VoteStateCache, with max-rows = 2."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def table(self, name):
+        return self
+
+    def select(self, columns, count=None):
+        self.count = count
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.requests.append((start, end))
+        self.data = self.rows[start:min(end + 1, start + 2)]
+        return self
+
+    def execute(self):
+        result = type("Result", (), {})()
+        result.data = self.data
+        result.count = len(self.rows) if self.count == "exact" else None
+        return result
+
+
+def _ids(n):
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+
+def test_id_set():
+    keys = [uuid.UUID(i).bytes for i in _ids(50)]
+    ids = IdSet(keys[:40])
+    assert len(ids) == 40
+    assert all(key in ids for key in keys[:40])
+    assert not any(key in ids for key in keys[40:])
+    ids.add(keys[45])
+    ids.add(keys[45])
+    ids.discard(keys[0])
+    ids.discard(keys[49])
+    assert len(ids) == 40
+    assert keys[45] in ids and keys[0] not in ids
+    assert ids.data == b"".join(sorted(keys[1:40] + [keys[45]]))
+
+
+def test_loads_every_page(monkeypatch):
+    question_ids = _ids(5)
+    rows = [{"question_id": q, "vote_type": "up" if i % 2 else "down"} for i, q in enumerate(question_ids)]
+    fake = FakeVotes(rows)
+    monkeypatch.setattr(votes, "supabase", fake)
+
+    cache = VoteStateCache(users=10, ttl=60, max_votes=10)
+    state = cache.get("user", "question")
+    assert [state.get(q) for q in question_ids] == ["down", "up", "down", "up", "down"]
+    assert state.get("not-a-uuid") is None
+    assert len(fake.requests) == 3
+
+
+def test_too_many_votes_expires(monkeypatch):
+    fake = FakeVotes([{"question_id": q, "vote_type": "up"} for q in _ids(3)])
+    monkeypatch.setattr(votes, "supabase", fake)
+    now = [1000.0]
+    monkeypatch.setattr(votes.time, "monotonic", lambda: now[0])
+
+    cache = VoteStateCache(users=10, ttl=60, max_votes=2)
+    assert cache.get("user", "question") is None
+    assert len(fake.requests) == 1
+    assert cache.get("user", "question") is None
+    assert len(fake.requests) == 1
+
+    now[0] += 61
+    fake.rows = fake.rows[:2]
+    assert cache.get("user", "question") is not None
+
+
+def test_vote_recorded_during_load_is_not_overwritten(monkeypatch):
+    user_id, question_id = str(uuid.uuid4()), str(uuid.uuid4())
+    cache = VoteStateCache(users=10, ttl=300, max_votes=100)
+    loads = []
+
+    def load(table, column, user):
+        loads.append(user)
+        if len(loads) == 1:
+            # The vote is written and recorded after this load read the table
+            cache.record(user_id, "question", question_id, "up")
+            return []
+        return [{"question_id": question_id, "vote_type": "up"}]
+
+    monkeypatch.setattr(cache, "_load", load)
+    cache.get(user_id, "question")
+    assert (user_id, "question") not in cache.states
+    assert cache.loading == {}
+
+    assert cache.get(user_id, "question").get(question_id) == "up"
+    assert cache.get(user_id, "question").get(question_id) == "up"
+    assert len(loads) == 2